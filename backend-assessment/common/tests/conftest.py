@@ -42,3 +42,39 @@ def participant_api(api, participant):
     assert response.status_code == 200, response.content
     api.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
     return api
+
+
+@pytest.fixture
+def quiz_factory(owner):
+    """Builds a quiz with `size` questions of four options each (one correct)."""
+    from quiz.models import Quiz
+    from quiz.services import create_questions
+
+    def make(size, **fields):
+        quiz = Quiz.objects.create(owner=owner, title=f"Quiz {size}", **fields)
+        create_questions(
+            quiz,
+            [
+                {
+                    "body": f"Q{i}",
+                    "points": 1,
+                    "options": [{"text": str(j), "correct": j == 0} for j in range(4)],
+                }
+                for i in range(size)
+            ],
+        )
+        quiz.refresh_totals()
+        return quiz
+
+    return make
+
+
+@pytest.fixture
+def user_factory(db):
+    def make(count, role="PARTICIPANT"):
+        return User.objects.bulk_create(
+            User(email=f"user{i}@example.com", role=role, first_name=f"U{i}")
+            for i in range(count)
+        )
+
+    return make
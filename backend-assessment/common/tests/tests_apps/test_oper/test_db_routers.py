@@ -0,0 +1,111 @@
+import copy
+import json
+from collections import deque
+
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from quiz.models import Membership, QuizState
+from users.authentication import access_token_for
+
+from ..test_quiz.test_quiz_api import make_quiz
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def replica(settings):
+    """A second alias with its own query log on the default test database."""
+    primary = connections["default"]
+    primary.ensure_connection()
+    replica = copy.copy(primary)
+    replica.alias = "replica"
+    replica.queries_log = deque(maxlen=primary.queries_log.maxlen)
+    connections["replica"] = replica
+    settings.DATABASE_REPLICAS = ["replica"]
+    cache.clear()
+    yield replica
+    replica.connection = None
+    del connections["replica"]
+
+
+def login(api, user):
+    api.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token_for(user)}")
+
+
+def test_reads_leave_the_replica_after_the_user_writes(
+    api, owner, participant, replica
+):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    progress = reverse("quiz:quiz-progress", args=[quiz.id])
+    question_id, (option, _) = next(iter(qmap.items()))
+    answer = {
+        "quiz_id": str(quiz.id),
+        "question_id": str(question_id),
+        "option_id": str(option.id),
+    }
+
+    login(api, participant)
+    with CaptureQueriesContext(replica) as reads:
+        assert api.get(reverse("quiz:quiz-list")).status_code == 200
+        assert api.get(progress).status_code == 200
+    assert len(reads) >= 2
+
+    with CaptureQueriesContext(replica) as reads:
+        response = api.post(
+            reverse("quiz:quiz-submit", args=[quiz.id]), answer, format="json"
+        )
+        assert response.status_code == 201
+        assert api.get(progress).data["data"]["total_score"] == 5
+    assert len(reads) == 0
+
+    # the window is per user
+    login(api, owner)
+    with CaptureQueriesContext(replica) as reads:
+        assert api.get(progress).status_code == 200
+    assert len(reads) > 0
+
+    cache.clear()  # window expired
+    login(api, participant)
+    with CaptureQueriesContext(replica) as reads:
+        assert api.get(progress).status_code == 200
+    assert len(reads) > 0
+
+
+def test_async_views_follow_the_same_window(api, owner, participant, replica):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    progress = reverse("quiz_async:quiz-progress", args=[quiz.id])
+    question_id, (option, _) = next(iter(qmap.items()))
+
+    login(api, participant)
+    with CaptureQueriesContext(replica) as reads:
+        assert api.get(progress).status_code == 200
+    assert len(reads) > 0
+
+    response = api.post(
+        reverse("quiz_async:quiz-submit", args=[quiz.id]),
+        {
+            "quiz_id": str(quiz.id),
+            "question_id": str(question_id),
+            "option_id": str(option.id),
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    with CaptureQueriesContext(replica) as reads:
+        response = api.get(progress)
+    assert json.loads(response.content)["data"]["total_score"] == 5
+    assert len(reads) == 0
+
+
+def test_users_listing_and_stream_read_from_the_replica(api, owner, replica):
+    login(api, owner)
+    with CaptureQueriesContext(replica) as reads:
+        assert api.get(reverse("users:user-list")).status_code == 200
+        response = api.get(reverse("users:user-stream"))
+        assert b"".join(response.streaming_content).count(b"\n") == 1
+    assert len(reads) >= 2
@@ -0,0 +1,119 @@
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from django.urls import reverse
+from oper import profiling
+from quiz.models import Membership, Quiz
+from users.authentication import access_token_for
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_histograms():
+    for histogram in profiling.HISTOGRAMS:
+        histogram.clear()
+
+
+def test_histogram_exposes_cumulative_buckets():
+    histogram = profiling.Histogram("h", "Test.", (1, 5))
+    for value in (0, 1, 3, 7):
+        histogram.observe(value, view='a"b')
+    assert histogram.expose().splitlines()[2:] == [
+        'h_bucket{view="a\\"b",le="1"} 2',
+        'h_bucket{view="a\\"b",le="5"} 3',
+        'h_bucket{view="a\\"b",le="+Inf"} 4',
+        'h_sum{view="a\\"b"} 11.0',
+        'h_count{view="a\\"b"} 4',
+    ]
+
+
+def test_requests_are_recorded_per_view_action(owner_api, owner):
+    Quiz.objects.create(owner=owner, title="QZ")
+    response = owner_api.get(reverse("quiz:quiz-list"))
+    assert response.status_code == 200
+
+    count, queries = profiling.DB_QUERIES.samples(view="QuizViewSet.list")
+    assert count == 1 and queries >= 1
+    count, serializing = profiling.SERIALIZER_SECONDS.samples(view="QuizViewSet.list")
+    assert count == 1 and serializing > 0
+    count, size = profiling.RESPONSE_BYTES.samples(view="QuizViewSet.list")
+    assert size == len(response.content)
+
+
+def test_server_timing_is_opt_in_and_staff_only(api, owner, settings):
+    staff = User.objects.create_user(
+        email="staff@example.com", password="staffpass", role="OWNER", is_staff=True
+    )
+    Quiz.objects.create(owner=owner, title="QZ")
+    url = reverse("quiz:quiz-list")
+
+    def server_timing(user):
+        api.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token_for(user)}")
+        return api.get(url).headers.get("Server-Timing")
+
+    assert server_timing(staff) is None
+
+    settings.PROFILING = {**profiling.DEFAULTS, "ENABLED": True, "SERVER_TIMING": True}
+    assert "db;dur=" in server_timing(staff)
+    assert server_timing(owner) is None
+    api.credentials()
+    assert "Server-Timing" not in api.get(url).headers
+
+    settings.DEBUG = True
+    assert "db;dur=" in server_timing(owner)
+
+
+def test_asgi_requests_count_the_queries_of_their_threads(owner, participant):
+    quiz = Quiz.objects.create(owner=owner, title="QZ")
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    headers = {"authorization": f"Bearer {access_token_for(owner)}"}
+
+    async def get(name):
+        response = await AsyncClient().get(
+            reverse(name, args=[quiz.id]), headers=headers
+        )
+        assert response.status_code == 200
+
+    for name, view in [
+        ("quiz_async:quiz-progress", "quiz_async:quiz-progress"),
+        ("quiz:quiz-progress", "QuizViewSet.progress"),
+    ]:
+        async_to_sync(get)(name)
+        count, queries = profiling.DB_QUERIES.samples(view=view)
+        assert count == 1 and queries > 0, view
+
+
+def test_metrics_endpoint_requires_token(api, settings):
+    settings.PROFILING = {
+        **profiling.DEFAULTS,
+        "ENABLED": True,
+        "METRICS_TOKEN": "s3cret",
+    }
+    assert api.get("/metrics").status_code == 404
+
+    response = api.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+    assert response.status_code == 200
+    assert "# TYPE http_request_db_queries histogram" in response.content.decode()
+    # the rejected scrape above was itself recorded
+    assert (
+        'http_request_db_queries_count{view="metrics"} 1' in response.content.decode()
+    )
+
+
+def test_slow_sql_logging_is_opt_in(owner_api, owner, settings, caplog):
+    Quiz.objects.create(owner=owner, title="QZ")
+    caplog.set_level(logging.WARNING, logger="oper.profiling")
+    owner_api.get(reverse("quiz:quiz-list"))
+    assert not caplog.records
+
+    settings.PROFILING = {**profiling.DEFAULTS, "ENABLED": True, "SLOW_SQL": 2}
+    owner_api.get(reverse("quiz:quiz-list"))
+    (record,) = caplog.records
+    assert "QuizViewSet.list" in record.getMessage()
+    assert record.getMessage().count(" ms  ") == 2
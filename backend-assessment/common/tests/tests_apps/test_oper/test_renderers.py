@@ -0,0 +1,61 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from oper import renderers
+from rest_framework import renderers as drf_renderers
+
+PAYLOAD = {
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "title": "Ünïcode \u2028 line separator",
+    "score": Decimal("12.50"),
+    "at": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+    "day": datetime.date(2025, 1, 2),
+    "label": gettext_lazy("Bad request"),
+    "flags": [True, False, None],
+    "nested": {"ratio": 0.5, "count": 3},
+}
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_output_matches_drf_renderer(monkeypatch, fast):
+    if fast:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(renderers, "orjson", None)
+    expected = drf_renderers.JSONRenderer().render(PAYLOAD)
+    assert renderers.JSONRenderer().render(PAYLOAD) == expected
+    assert renderers.loads(renderers.dumps(PAYLOAD)) == json.loads(expected)
+
+
+def test_values_orjson_rejects_fall_back():
+    data = {"big": 2**70}
+    assert renderers.dumps(data) == drf_renderers.JSONRenderer().render(data)
+
+
+def test_indent_falls_back_to_drf():
+    content = renderers.JSONRenderer().render(
+        {"a": 1}, accepted_media_type="application/json; indent=2"
+    )
+    assert content == b'{\n  "a": 1\n}'
+    assert renderers.JSONRenderer().render(None) == b""
+
+
+@pytest.mark.django_db
+def test_error_envelope_success_is_boolean(api):
+    response = api.post(reverse("users:login"), {"email": "x"}, format="json")
+    body = json.loads(response.content)
+    assert response.status_code == 400 and body["success"] is False
+    assert body["message"] and "password" in body["data"]
+
+
+@pytest.mark.django_db
+def test_api_response_success(owner_api, owner, quiz_factory):
+    quiz = quiz_factory(3)
+    response = owner_api.get(reverse("quiz:quiz-progress", args=[quiz.id]))
+    body = json.loads(response.content)
+    assert response.status_code == 200 and body["success"] is True
@@ -0,0 +1,95 @@
+import uuid
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from quiz.answer_keys import AnswerKey, get_answer_key, load_answer_key
+from quiz.models import Membership, Option
+from users.authentication import access_token_for
+
+from .test_quiz_api import make_quiz
+
+pytestmark = pytest.mark.django_db
+
+
+def _reads_content(queries):
+    return any(
+        table in query["sql"]
+        for query in queries
+        for table in ('FROM "quiz_option"', 'FROM "quiz_question"')
+    )
+
+
+def test_publish_builds_the_key_and_edits_replace_it(
+    api, owner, participant, django_assert_max_num_queries
+):
+    quiz, qmap = make_quiz(owner)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    (q1, (right1, _)), (q2, (old_right, new_right)) = qmap.items()
+    url = reverse("quiz:quiz-submit", args=[quiz.id])
+
+    api.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token_for(owner)}")
+    assert api.post(reverse("quiz:quiz-publish", args=[quiz.id])).status_code == 200
+
+    api.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token_for(participant)}")
+    answer = {"quiz_id": str(quiz.id), "question_id": str(q1)}
+    with django_assert_max_num_queries(6) as ctx:
+        response = api.post(url, {**answer, "option_id": str(right1.id)})
+    assert response.status_code == 201
+    assert not _reads_content(ctx.captured_queries)
+
+    # editing the answer key bumps Quiz.version; the next submit reloads it
+    Option.objects.filter(pk=old_right.pk).update(correct=False)
+    new_right.correct = True
+    new_right.save()
+    answer = {"quiz_id": str(quiz.id), "question_id": str(q2)}
+    with django_assert_max_num_queries(7) as ctx:
+        response = api.post(url, {**answer, "option_id": str(new_right.id)})
+    assert response.status_code == 201
+    assert _reads_content(ctx.captured_queries)
+    assert response.data["data"]["correct"] is True
+    assert response.data["data"]["correct_answer"] == "7"
+
+
+def test_key_grades_only_the_questions_own_options():
+    q1, q2, a, b, c = (uuid.uuid4() for _ in range(5))
+    key = AnswerKey(
+        3,
+        [
+            (q1, "2+2", 5, a, "4", True),
+            (q1, "2+2", 5, b, "5", False),
+            (q2, "open", 1, c, "any", False),
+        ],
+    )
+    assert key.grade(q1, b) == ("2+2", 5, "5", False, "4")
+    assert key.grade(q2, c).correct_answer is None
+    assert key.grade(q2, a) is None
+    assert key.grade(uuid.uuid4(), a) is None
+    assert q1 in key and uuid.uuid4() not in key
+
+
+def test_key_accepts_every_correct_option():
+    question, first, second, wrong = (uuid.uuid4() for _ in range(4))
+    key = AnswerKey(
+        1,
+        [
+            (question, "a prime", 2, first, "2", True),
+            (question, "a prime", 2, second, "3", True),
+            (question, "a prime", 2, wrong, "4", False),
+        ],
+    )
+    assert key.grade(question, first).correct is True
+    assert key.grade(question, second) == ("a prime", 2, "3", True, "2")
+    assert key.grade(question, wrong).correct is False
+
+
+@override_settings(QUIZ_ANSWER_KEY_CACHE_SIZE=1)
+def test_keys_are_evicted_least_recently_used(owner, django_assert_num_queries):
+    first, _ = make_quiz(owner)
+    second, _ = make_quiz(owner)
+    first_key = load_answer_key(first.id)
+    second_key = load_answer_key(second.id)
+    with django_assert_num_queries(0):
+        assert get_answer_key(second.id, second_key.version) is second_key
+    with django_assert_num_queries(1):
+        get_answer_key(first.id, first_key.version)
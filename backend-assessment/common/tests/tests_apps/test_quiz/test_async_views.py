@@ -0,0 +1,217 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from django.urls import reverse
+from quiz.events import RedisEventBackend, channel, get_event_backend
+from quiz.models import Membership, QuizState, Submission
+from quiz.services import submit_answer
+from users.authentication import access_token_for
+
+from .test_quiz_api import make_quiz
+
+pytestmark = pytest.mark.django_db
+
+
+def _answer(quiz, qmap, correct=True):
+    question_id, (right, wrong) = next(iter(qmap.items()))
+    option = right if correct else wrong
+    return {
+        "quiz_id": str(quiz.id),
+        "question_id": str(question_id),
+        "option_id": str(option.id),
+    }
+
+
+def test_async_views_require_a_token(api, owner):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    response = api.post(
+        reverse("quiz_async:quiz-submit", args=[quiz.id]),
+        _answer(quiz, qmap),
+        format="json",
+    )
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"].startswith("Bearer")
+    response = api.get(reverse("quiz_async:quiz-progress", args=[quiz.id]))
+    assert response.status_code == 401
+
+
+def test_async_submit_matches_the_sync_view(participant_api, owner, participant):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    url = reverse("quiz_async:quiz-submit", args=[quiz.id])
+
+    response = participant_api.post(url, _answer(quiz, qmap), format="json")
+    assert response.status_code == 201, response.content
+    body = json.loads(response.content)
+    assert body["success"] is True
+    assert body["data"]["score_total"] == 5
+
+    response = participant_api.post(url, _answer(quiz, qmap), format="json")
+    assert response.status_code == 400
+    assert Submission.objects.count() == 1
+
+    response = participant_api.get(reverse("quiz_async:quiz-progress", args=[quiz.id]))
+    assert response.status_code == 200
+    data = json.loads(response.content)["data"]
+    assert data["total_score"] == 5 and "progress_pct" in data
+
+
+def test_async_submit_rejects_a_closed_quiz(participant_api, owner, participant):
+    quiz, qmap = make_quiz(owner, state=QuizState.CLOSED)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    response = participant_api.post(
+        reverse("quiz_async:quiz-submit", args=[quiz.id]),
+        _answer(quiz, qmap),
+        format="json",
+    )
+    assert response.status_code == 400
+    assert json.loads(response.content)["detail"] == (
+        "This quiz is not open for submissions."
+    )
+
+
+def test_async_progress_for_owner_and_strangers(owner_api, owner, participant):
+    quiz, _ = make_quiz(owner)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    url = reverse("quiz_async:quiz-progress", args=[quiz.id])
+
+    response = owner_api.get(url)
+    assert response.status_code == 200
+    assert isinstance(json.loads(response.content)["data"], list)
+
+    other, _ = make_quiz(participant)
+    response = owner_api.get(reverse("quiz_async:quiz-progress", args=[other.id]))
+    assert response.status_code == 404
+
+
+def _events(chunk):
+    lines = chunk.decode().strip().splitlines()
+    return lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: "))
+
+
+def test_owner_stream_coalesces_submits_per_tick(
+    settings, owner, participant, user_factory, django_capture_on_commit_callbacks
+):
+    settings.QUIZ_EVENTS_TICK = 0.2
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    other = user_factory(1)[0]
+    for user in (participant, other):
+        Membership.objects.create(quiz=quiz, user=user, active=True)
+    url = reverse("quiz_async:quiz-events", args=[quiz.id])
+    headers = {"authorization": f"Bearer {access_token_for(owner)}"}
+
+    def submit_all():
+        with django_capture_on_commit_callbacks(execute=True):
+            for question_id, (right, wrong) in qmap.items():
+                submit_answer(participant, quiz.id, question_id, right.id)
+            question_id, (right, _) = next(iter(qmap.items()))
+            submit_answer(other, quiz.id, question_id, right.id)
+
+    async def scenario():
+        response = await AsyncClient().get(url, headers=headers)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/event-stream"
+        stream = aiter(response.streaming_content)
+        first = await anext(stream)
+        await sync_to_async(submit_all)()
+        second = await anext(stream)
+        # a client going away cancels the stream, which unsubscribes it
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        await asyncio.gather(pending, return_exceptions=True)
+        return first, second
+
+    first, second = async_to_sync(scenario)()
+
+    name, rows = _events(first)
+    assert name == "dashboard"
+    assert {row["member"] for row in rows} == {str(participant.id), str(other.id)}
+    # three submits, one event with the latest row per member
+    name, rows = _events(second)
+    assert name == "progress"
+    assert sorted((row["total_score"], row["rank"]) for row in rows) == [
+        (5, 2),
+        (10, 1),
+    ]
+    assert not get_event_backend()._subscribers[channel(quiz.id)]
+
+
+def test_event_stream_is_for_the_owner_only(api, owner, participant):
+    quiz, _ = make_quiz(owner, state=QuizState.LIVE)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    url = reverse("quiz_async:quiz-events", args=[quiz.id])
+
+    api.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token_for(participant)}")
+    assert api.get(url).status_code == 403
+    other, _ = make_quiz(owner)
+    response = api.get(reverse("quiz_async:quiz-events", args=[other.id]))
+    assert response.status_code == 404
+
+
+class FakePubSub:
+    """Just enough of redis.asyncio's PubSub for RedisEventBackend."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.messages = asyncio.Queue()
+
+    async def subscribe(self, name):
+        self.broker.setdefault(name, []).append(self.messages)
+
+    async def listen(self):
+        while True:
+            yield await self.messages.get()
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.broker = {}
+
+    def pubsub(self):
+        return FakePubSub(self.broker)
+
+    def publish(self, name, data):
+        for messages in self.broker.get(name, []):
+            messages.put_nowait({"type": "message", "data": data})
+
+
+def test_redis_subscription_is_live_when_subscribe_returns():
+    redis = FakeRedis()
+    backend = RedisEventBackend(client=redis, async_client=redis)
+
+    async def scenario():
+        subscription = await backend.subscribe("c")
+        # published right after subscribe() returns, before the listener ran
+        backend.publish("c", {"member": "m"})
+        message = await subscription.get(1)
+        await subscription.close()
+        return message
+
+    assert async_to_sync(scenario)() == {"member": "m"}
+
+
+def test_a_failing_event_backend_does_not_fail_the_submit(
+    participant_api, owner, participant, monkeypatch, django_capture_on_commit_callbacks
+):
+    class Down:
+        def publish(self, channel, message):
+            raise ConnectionError("broker is down")
+
+    monkeypatch.setattr("quiz.events.get_event_backend", Down)
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        response = participant_api.post(
+            reverse("quiz:quiz-submit", args=[quiz.id]),
+            _answer(quiz, qmap),
+            format="json",
+        )
+    assert response.status_code == 201
+    assert len(callbacks) == 2  # leaderboard, events
@@ -0,0 +1,150 @@
+import time
+import uuid
+
+import pytest
+from django.urls import reverse
+from quiz.leaderboard import (
+    InMemoryLeaderboardBackend,
+    SortedSetLeaderboardBackend,
+    get_warm_leaderboard,
+)
+from quiz.models import Membership, QuizState
+
+from .test_quiz_api import _payload, make_quiz
+
+
+class FakeSortedSetClient:
+    """Just enough of the redis-py API for SortedSetLeaderboardBackend."""
+
+    def __init__(self):
+        self.zsets, self.hashes, self.strings = {}, {}, {}
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+    def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update(mapping)
+
+    def _ordered(self, name):
+        items = self.zsets.get(name, {}).items()
+        return sorted(items, key=lambda item: (item[1], item[0]), reverse=True)
+
+    def zrevrange(self, name, start, end, withscores=False):
+        stop = None if end == -1 else end + 1
+        return self._ordered(name)[start:stop]
+
+    def zrevrank(self, name, member):
+        members = [m for m, _ in self._ordered(name)]
+        return members.index(member) if member in members else None
+
+    def zcard(self, name):
+        return len(self.zsets.get(name, {}))
+
+    def hset(self, name, mapping):
+        self.hashes.setdefault(name, {}).update(mapping)
+
+    def hmget(self, name, keys):
+        return [self.hashes.get(name, {}).get(key) for key in keys]
+
+    def set(self, name, value, ex=None):
+        self.strings[name] = (value, ex and time.monotonic() + ex)
+
+    def exists(self, name):
+        _, expires = self.strings.get(name, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.strings[name]
+        return int(name in self.strings)
+
+    def delete(self, *names):
+        for name in names:
+            for store in (self.zsets, self.hashes, self.strings):
+                store.pop(name, None)
+
+
+@pytest.fixture(params=["memory", "sorted_set"])
+def board(request):
+    if request.param == "memory":
+        return InMemoryLeaderboardBackend()
+    return SortedSetLeaderboardBackend(client=FakeSortedSetClient())
+
+
+def test_backend_ranks_top_k_and_pages(board):
+    quiz_id = uuid.uuid4()
+    board.record_many(
+        quiz_id,
+        [("a", 5, 50, "Ann"), ("b", 10, 100, "Bob"), ("c", 1, 50, "Cid")],
+    )
+    assert [row["participant"] for row in board.top(quiz_id, 2)] == ["Bob", "Ann"]
+    assert board.rank(quiz_id, "c") == 3
+
+    # score update keeps the stored name and moves the member up
+    board.record(quiz_id, "c", 20, 100)
+    page = board.page(quiz_id, offset=1, limit=2)
+    assert [(row["participant"], row["rank"]) for row in page] == [
+        ("Bob", 2),
+        ("Ann", 3),
+    ]
+    assert board.rank(quiz_id, "c") == 1
+    assert board.rank(quiz_id, "missing") is None
+    assert board.count(quiz_id) == 3
+
+    board.drop(quiz_id)
+    assert board.count(quiz_id) == 0 and not board.is_warm(quiz_id)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "make_board",
+    [
+        lambda ttl: InMemoryLeaderboardBackend(warm_ttl=ttl),
+        lambda ttl: SortedSetLeaderboardBackend(
+            client=FakeSortedSetClient(), warm_ttl=ttl
+        ),
+    ],
+    ids=["memory", "sorted_set"],
+)
+def test_board_is_rewarmed_after_its_ttl(owner, participant, monkeypatch, make_board):
+    quiz, _ = make_quiz(owner, state=QuizState.LIVE)
+    membership = Membership.objects.create(quiz=quiz, user=participant, active=True)
+    board = make_board(30)
+    monkeypatch.setattr("quiz.leaderboard.get_leaderboard", lambda: board)
+    assert get_warm_leaderboard(quiz.id).top(quiz.id, 1)[0]["total_score"] == 0
+
+    # a submit handled by another worker, or lost to a broker outage, never
+    # reaches this board
+    Membership.objects.filter(pk=membership.pk).update(total_score=5)
+    assert get_warm_leaderboard(quiz.id).top(quiz.id, 1)[0]["total_score"] == 0
+
+    now = time.monotonic()
+    monkeypatch.setattr("quiz.leaderboard.time.monotonic", lambda: now + 31)
+    assert get_warm_leaderboard(quiz.id).top(quiz.id, 1)[0]["total_score"] == 5
+
+
+@pytest.mark.django_db(transaction=True)
+def test_dashboard_follows_submissions(owner_api, owner, participant):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    progress_url = reverse("quiz:quiz-progress", args=[quiz.id])
+    assert _payload(owner_api.get(progress_url))[0]["total_score"] == 0
+
+    q1 = next(iter(qmap))
+    owner_api.credentials()
+    owner_api.force_authenticate(participant)
+    response = owner_api.post(
+        reverse("quiz:quiz-submit", args=[quiz.id]),
+        {
+            "quiz_id": str(quiz.id),
+            "question_id": str(q1),
+            "option_id": str(qmap[q1][0].id),
+        },
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    assert _payload(owner_api.get(progress_url))["rank"] == 1
+
+    owner_api.force_authenticate(owner)
+    rows = _payload(owner_api.get(progress_url, {"limit": 10}))
+    assert rows == [{"participant": "", "progress": 50.0, "total_score": 5, "rank": 1}]
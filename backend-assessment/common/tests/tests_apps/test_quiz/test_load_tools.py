@@ -0,0 +1,113 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from quiz.models import Membership, Quiz, Submission
+from quiz.services import reconcile_scores
+
+pytestmark = pytest.mark.django_db
+
+
+def test_seed_load_generates_consistent_data():
+    out = StringIO()
+    call_command(
+        "seed_load",
+        "--owners=2",
+        "--users=6",
+        "--quizzes=4",
+        "--questions=5",
+        "--members=3",
+        "--answered=0.4",
+        stdout=out,
+    )
+    assert "4 quizzes, 20 questions, 80 options, 12 memberships" in out.getvalue()
+    assert Submission.objects.count() == 12 * 2
+    # counters written by the generator agree with a full recount
+    assert reconcile_scores() == {"quizzes": [], "memberships": []}
+
+
+def test_bench_load_reports_every_scenario():
+    call_command(
+        "seed_load",
+        "--users=4",
+        "--quizzes=2",
+        "--questions=3",
+        "--members=2",
+        "--answered=0",
+        stdout=StringIO(),
+    )
+    out = StringIO()
+    call_command("bench_load", "--concurrency", "1", "--requests=3", stdout=out)
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["scenario"] for r in results] == [
+        "list",
+        "retrieve",
+        "progress",
+        "submit",
+    ]
+    for result in results:
+        assert result["n"] == 3 and result["errors"] == 0, result
+        assert {"p50_ms", "p95_ms", "p99_ms", "throughput_rps"} <= result.keys()
+    assert Membership.objects.filter(answered_count__gt=0).exists()
+    assert Quiz.objects.count() == 2
+
+
+def test_bench_load_asgi_uses_the_async_views():
+    call_command(
+        "seed_load",
+        "--users=4",
+        "--quizzes=2",
+        "--questions=3",
+        "--members=2",
+        "--answered=0",
+        stdout=StringIO(),
+    )
+    out = StringIO()
+    call_command(
+        "bench_load",
+        "--asgi",
+        "--concurrency",
+        "2",
+        "--requests=4",
+        "--scenario=progress",
+        "--scenario=submit",
+        stdout=out,
+    )
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(r["scenario"], r["server"]) for r in results] == [
+        ("progress", "asgi"),
+        ("submit", "asgi"),
+    ]
+    for result in results:
+        assert result["n"] == 4 and result["errors"] == 0, result
+    assert Submission.objects.count() == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_connections_compares_modes():
+    call_command(
+        "seed_load",
+        "--users=4",
+        "--quizzes=2",
+        "--questions=1",
+        "--members=2",
+        "--answered=0",
+        stdout=StringIO(),
+    )
+    out = StringIO()
+    call_command(
+        "bench_connections",
+        "--mode=new",
+        "--mode=persistent",
+        "--concurrency",
+        "1",
+        "--requests=5",
+        stdout=out,
+    )
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["mode"] for r in results] == ["new", "persistent"]
+    for result in results:
+        assert result["n"] == 5 and result["errors"] == 0, result
+        assert result["throughput_rps"] > 0
@@ -0,0 +1,142 @@
+"""
+Query budgets per endpoint (authentication itself is free: see
+users/authentication.py). Every test runs against quizzes of 1, 10 and
+100 questions (and as many members), so a change that makes the number of
+queries grow with the data fails here before it reaches production.
+"""
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from quiz.answer_keys import load_answer_key
+from quiz.models import Membership, QuizState
+
+pytestmark = pytest.mark.django_db
+
+SIZES = [1, 10, 100]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture(params=SIZES)
+def size(request):
+    return request.param
+
+
+def _enroll(quiz, users):
+    Membership.objects.bulk_create(Membership(quiz=quiz, user=u) for u in users)
+
+
+def test_list(owner_api, quiz_factory, size, django_assert_max_num_queries):
+    for _ in range(3):
+        quiz_factory(size)
+    # quiz page, questions, options
+    with django_assert_max_num_queries(3):
+        response = owner_api.get(reverse("quiz:quiz-list"))
+    assert len(response.data["results"]) == 3
+
+
+def test_retrieve_draft(owner_api, quiz_factory, size, django_assert_max_num_queries):
+    quiz = quiz_factory(size)
+    # access check, quiz, questions, options
+    with django_assert_max_num_queries(4):
+        response = owner_api.get(reverse("quiz:quiz-detail", args=[quiz.id]))
+    assert len(response.data["questions"]) == size
+
+
+def test_retrieve_live(
+    participant_api, participant, quiz_factory, size, django_assert_max_num_queries
+):
+    quiz = quiz_factory(size, state=QuizState.LIVE)
+    _enroll(quiz, [participant])
+    url = reverse("quiz:quiz-detail", args=[quiz.id])
+    # cold: access check, quiz, questions, options
+    with django_assert_max_num_queries(4):
+        assert participant_api.get(url).status_code == 200
+    # warm snapshot: access check
+    with django_assert_max_num_queries(1):
+        assert participant_api.get(url).status_code == 200
+
+
+def test_submit(
+    participant_api, participant, quiz_factory, size, django_assert_max_num_queries
+):
+    quiz = quiz_factory(size, state=QuizState.LIVE)
+    _enroll(quiz, [participant])
+    question = quiz.questions.last()
+    option = question.options.first()
+    payload = {
+        "quiz_id": str(quiz.id),
+        "question_id": str(question.id),
+        "option_id": str(option.id),
+    }
+    load_answer_key(quiz.id)  # as on publish
+    # lookup, savepoint, insert, update, refresh, release
+    with django_assert_max_num_queries(6) as ctx:
+        response = participant_api.post(
+            reverse("quiz:quiz-submit", args=[quiz.id]), payload, format="json"
+        )
+    assert response.status_code == 201, response.content
+    assert not any(
+        table in query["sql"]
+        for query in ctx.captured_queries
+        for table in ('FROM "quiz_option"', 'FROM "quiz_question"')
+    )
+
+
+def test_submit_batch(
+    participant_api, participant, quiz_factory, size, django_assert_max_num_queries
+):
+    quiz = quiz_factory(size, state=QuizState.LIVE)
+    _enroll(quiz, [participant])
+    answers = [
+        {"question_id": str(q.id), "option_id": str(q.options.all()[0].id)}
+        for q in quiz.questions.prefetch_related("options")
+    ]
+    load_answer_key(quiz.id)
+    # membership, answered, savepoint, insert, stored, recalculate (4), release
+    with django_assert_max_num_queries(10):
+        response = participant_api.post(
+            reverse("quiz:quiz-submit-batch", args=[quiz.id]),
+            {"quiz_id": str(quiz.id), "answers": answers},
+            format="json",
+        )
+    assert response.status_code == 201, response.content
+    assert len(response.data["data"]) == size
+
+
+def test_progress_owner(
+    owner_api, quiz_factory, user_factory, size, django_assert_max_num_queries
+):
+    quiz = quiz_factory(size)
+    _enroll(quiz, user_factory(size))
+    url = reverse("quiz:quiz-progress", args=[quiz.id])
+    # quiz, leaderboard warm-up from memberships
+    with django_assert_max_num_queries(2):
+        response = owner_api.get(url)
+    assert len(response.data["data"]) == size
+
+
+def test_progress_participant(
+    participant_api, participant, quiz_factory, size, django_assert_max_num_queries
+):
+    quiz = quiz_factory(size)
+    _enroll(quiz, [participant])
+    url = reverse("quiz:quiz-progress", args=[quiz.id])
+    # quiz with permission annotations, membership, leaderboard warm-up
+    with django_assert_max_num_queries(3):
+        assert participant_api.get(url).status_code == 200
+
+
+def test_members(
+    owner_api, quiz_factory, user_factory, size, django_assert_max_num_queries
+):
+    quiz = quiz_factory(size)
+    user_ids = [str(u.id) for u in user_factory(size)]
+    url = reverse("quiz:quiz-members", args=[quiz.id])
+    with django_assert_max_num_queries(7):
+        response = owner_api.post(url, {"user_ids": user_ids}, format="json")
+    assert response.data["data"]["created"] == size
@@ -1,13 +1,25 @@
+import json
+import uuid
+from datetime import timedelta
+from io import StringIO
+
 import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.urls import reverse
-from quiz.models import Membership, Option, Question, Quiz, QuizState
+from django.utils import timezone
+from quiz.answer_keys import load_answer_key
+from quiz.models import Membership, Option, Question, Quiz, QuizState, Submission
+from quiz.services import reconcile_scores
 
 pytestmark = pytest.mark.django_db
+User = get_user_model()
 
 
-def make_quiz(owner):
+def make_quiz(owner, state=QuizState.DRAFT):
     quiz = Quiz.objects.create(
-        owner=owner, title="QZ", description="d", randomized=False
+        owner=owner, title="QZ", description="d", randomized=False, state=state
     )
     q1 = Question.objects.create(quiz=quiz, body="2+2=?", points=5, position=1)
     q2 = Question.objects.create(quiz=quiz, body="3+3=?", points=5, position=2)
@@ -55,6 +67,32 @@ def test_owner_adds_members(owner_api, owner, participant):
     assert Membership.objects.filter(quiz=quiz, user=participant).exists()
 
 
+def test_owner_adds_members_in_bulk_from_roster(owner_api, owner, participant):
+    quiz, _ = make_quiz(owner)
+    others = [
+        User.objects.create_user(email=f"p{i}@example.com", role="PARTICIPANT")
+        for i in range(3)
+    ]
+    Membership.objects.create(quiz=quiz, user=participant)
+    url = reverse("quiz:quiz-members", args=[quiz.id])
+
+    roster = "user_id,email\n" + "".join(
+        f"{user.id},{user.email}\n" for user in [participant, *others]
+    )
+    roster += f"{uuid.uuid4()},ghost@example.com\nnot-a-uuid,x\n"
+    upload = SimpleUploadedFile("roster.csv", roster.encode(), "text/csv")
+    response = owner_api.post(url, {"file": upload}, format="multipart")
+    assert response.status_code == 201, response.content
+    data = _payload(response)
+    assert (data["created"], data["existing"], data["invalid"]) == (3, 1, 2)
+    assert quiz.memberships.count() == 4
+
+    ndjson = "\n".join(json.dumps({"user_id": str(user.id)}) for user in others)
+    upload = SimpleUploadedFile("roster.ndjson", ndjson.encode())
+    data = _payload(owner_api.post(url, {"file": upload}, format="multipart"))
+    assert (data["created"], data["existing"]) == (0, 3)
+
+
 def test_progress_for_owner_is_dashboard(owner_api, owner, participant):
     quiz, _ = make_quiz(owner)
     Membership.objects.create(quiz=quiz, user=participant, active=True)
@@ -77,7 +115,7 @@ def test_progress_for_participant_is_object(participant_api, owner, participant)
 
 
 def test_submit_flow_updates_membership(participant_api, owner, participant):
-    quiz, qmap = make_quiz(owner)
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
     Membership.objects.create(quiz=quiz, user=participant, active=True)
     url = reverse("quiz:quiz-submit", args=[quiz.id])
 
@@ -106,3 +144,375 @@ def test_submit_flow_updates_membership(participant_api, owner, participant):
     mem = Membership.objects.get(quiz=quiz, user=participant)
     assert mem.total_score >= 0
     assert 0.0 <= float(mem.progress_pct) <= 100.0
+
+
+def test_submit_applies_incremental_score(participant_api, owner, participant):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    quiz.refresh_from_db()
+    assert (quiz.question_count, quiz.points_total) == (2, 10)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    url = reverse("quiz:quiz-submit", args=[quiz.id])
+
+    q1 = next(iter(qmap))
+    correct1, _ = qmap[q1]
+    response = participant_api.post(
+        url,
+        {
+            "quiz_id": str(quiz.id),
+            "question_id": str(q1),
+            "option_id": str(correct1.id),
+        },
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    data = _payload(response)
+    assert data["score_total"] == 5
+    assert data["progress_pct"] == 50.0
+
+    mem = Membership.objects.get(quiz=quiz, user=participant)
+    assert (mem.answered_count, mem.total_score) == (1, 5)
+
+
+def test_reconcile_scores_reports_and_fixes_drift(owner, participant):
+    quiz, _ = make_quiz(owner)
+    mem = Membership.objects.create(quiz=quiz, user=participant, active=True)
+    Membership.objects.filter(pk=mem.pk).update(total_score=42, answered_count=3)
+    Quiz.objects.filter(pk=quiz.pk).update(question_count=7)
+
+    out = StringIO()
+    call_command("reconcile_scores", "--fix", stdout=out)
+    assert "1 quiz(zes), 1 membership(s) drifted (fixed)" in out.getvalue()
+
+    mem.refresh_from_db()
+    quiz.refresh_from_db()
+    assert (mem.answered_count, mem.total_score) == (0, 0)
+    assert quiz.question_count == 2
+    assert reconcile_scores() == {"quizzes": [], "memberships": []}
+
+
+def test_submit_reports_query_count_and_rejects_duplicates(
+    participant_api, owner, participant
+):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    url = reverse("quiz:quiz-submit", args=[quiz.id])
+    q1 = next(iter(qmap))
+    payload = {
+        "quiz_id": str(quiz.id),
+        "question_id": str(q1),
+        "option_id": str(qmap[q1][1].id),
+    }
+
+    load_answer_key(quiz.id)
+    response = participant_api.post(url, payload, format="json")
+    assert response.status_code == 201, response.content
+    # lookup + insert + score update + read-back, plus savepoint bookkeeping
+    assert int(response["X-Query-Count"]) <= 6
+    assert _payload(response)["correct_answer"] == "4"
+
+    response = participant_api.post(url, payload, format="json")
+    assert response.status_code == 400
+
+
+def test_submit_rejects_non_member(participant_api, owner):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    q1 = next(iter(qmap))
+    response = participant_api.post(
+        reverse("quiz:quiz-submit", args=[quiz.id]),
+        {
+            "quiz_id": str(quiz.id),
+            "question_id": str(q1),
+            "option_id": str(qmap[q1][0].id),
+        },
+        format="json",
+    )
+    assert response.status_code == 400
+
+
+def test_submit_batch_stores_valid_answers_once(participant_api, owner, participant):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    (q1, (correct1, wrong1)), (q2, (correct2, _)) = qmap.items()
+    answers = [
+        {"question_id": str(q1), "option_id": str(correct1.id)},
+        {"question_id": str(q2), "option_id": str(correct1.id)},
+        {"question_id": str(q1), "option_id": str(wrong1.id)},
+    ]
+    url = reverse("quiz:quiz-submit-batch", args=[quiz.id])
+    response = participant_api.post(
+        url, {"quiz_id": str(quiz.id), "answers": answers}, format="json"
+    )
+    assert response.status_code == 201, response.content
+    first, bad_option, duplicate = _payload(response)
+    assert first == {
+        "question": "2+2=?",
+        "your_answer": "4",
+        "correct": True,
+        "correct_answer": "4",
+        "score_total": 5,
+        "progress_pct": 50.0,
+    }
+    assert bad_option["detail"] == "Option not found for this question."
+    assert duplicate["detail"] == "You have already answered this question."
+
+    mem = Membership.objects.get(quiz=quiz, user=participant)
+    assert (mem.answered_count, mem.total_score) == (1, 5)
+    assert mem.submissions.count() == 1
+
+
+def test_submit_batch_reports_answers_lost_to_a_concurrent_submit(
+    participant_api, owner, participant, monkeypatch
+):
+    quiz, qmap = make_quiz(owner, state=QuizState.LIVE)
+    membership = Membership.objects.create(quiz=quiz, user=participant, active=True)
+    (q1, (correct1, wrong1)), (q2, (correct2, _)) = qmap.items()
+    bulk_create = Submission.objects.bulk_create
+
+    def racing(objs, **kwargs):
+        # another request stores its answer to q1 between our read and insert
+        Submission.objects.create(membership=membership, question_id=q1, option=wrong1)
+        return bulk_create(objs, **kwargs)
+
+    monkeypatch.setattr(Submission.objects, "bulk_create", racing)
+    answers = [
+        {"question_id": str(q1), "option_id": str(correct1.id)},
+        {"question_id": str(q2), "option_id": str(correct2.id)},
+    ]
+    response = participant_api.post(
+        reverse("quiz:quiz-submit-batch", args=[quiz.id]),
+        {"quiz_id": str(quiz.id), "answers": answers},
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    lost, stored = _payload(response)
+    assert lost["detail"] == "You have already answered this question."
+    assert stored["your_answer"] == "6" and stored["score_total"] == 5
+    assert membership.submissions.get(question_id=q1).option_id == wrong1.id
+
+
+def test_list_is_keyset_paginated_without_duplicates(
+    participant_api, owner, participant
+):
+    quizzes = [make_quiz(owner)[0] for _ in range(3)]
+    for quiz in quizzes:
+        Membership.objects.create(quiz=quiz, user=participant, active=True)
+    Quiz.objects.create(owner=owner, title="hidden")
+
+    url = reverse("quiz:quiz-list")
+    first = participant_api.get(url, {"page_size": 2})
+    assert first.status_code == 200
+    assert len(first.data["results"]) == 2 and first.data["next"]
+
+    second = participant_api.get(first.data["next"])
+    assert second.data["next"] is None
+    seen = [q["id"] for q in first.data["results"] + second.data["results"]]
+    assert seen == [str(q.id) for q in reversed(quizzes)]
+
+    assert participant_api.get(url, {"cursor": "garbage"}).status_code == 404
+
+
+def _question_payload(n, options=3):
+    return {
+        "body": f"Q{n}",
+        "points": 2,
+        "options": [{"text": f"{n}.{i}", "correct": i == 0} for i in range(options)],
+    }
+
+
+@pytest.mark.parametrize("size", [1, 50])
+def test_create_quiz_inserts_in_bulk(owner_api, size, django_assert_max_num_queries):
+    payload = {
+        "title": "bank",
+        "questions": [_question_payload(n) for n in range(size)],
+    }
+    # auth + quiz + 2 bulk inserts + totals, independent of size
+    with django_assert_max_num_queries(11):
+        response = owner_api.post(reverse("quiz:quiz-list"), payload, format="json")
+    assert response.status_code == 201, response.content
+    quiz = Quiz.objects.get(pk=response.data["id"])
+    assert (quiz.question_count, quiz.points_total) == (size, 2 * size)
+    assert [q.position for q in quiz.questions.all()] == list(range(1, size + 1))
+    assert Option.objects.filter(question__quiz=quiz).count() == 3 * size
+
+
+def test_update_replaces_nested_questions(owner_api, owner, participant):
+    quiz, qmap = make_quiz(owner)
+    (q1, (correct1, wrong1)), (q2, _) = qmap.items()
+    mem = Membership.objects.create(quiz=quiz, user=participant)
+    mem.submissions.create(question_id=q1, option=correct1, correct=True)
+    mem.recalculate()
+
+    payload = {
+        "title": "QZ v2",
+        "questions": [
+            _question_payload("new"),
+            {
+                "id": str(q1),
+                "body": "2+2=?",
+                "points": 5,
+                "options": [
+                    {"id": str(correct1.id), "text": "four", "correct": True},
+                    {"text": "22", "correct": False},
+                ],
+            },
+        ],
+    }
+    url = reverse("quiz:quiz-detail", args=[quiz.id])
+    response = owner_api.put(url, payload, format="json")
+    assert response.status_code == 200, response.content
+
+    quiz.refresh_from_db()
+    assert quiz.title == "QZ v2" and quiz.question_count == 2
+    bodies = [q.body for q in quiz.questions.all()]
+    assert bodies == ["Qnew", "2+2=?"]
+    assert not Question.objects.filter(pk=q2).exists()
+    assert not Option.objects.filter(pk=wrong1.pk).exists()
+    assert [o.text for o in Option.objects.filter(question_id=q1)] == ["four", "22"]
+
+    # the answer to the kept question survives; progress follows the new size
+    mem.refresh_from_db()
+    assert (mem.answered_count, mem.total_score) == (1, 5)
+    assert float(mem.progress_pct) == 50.0
+
+    bad = {
+        "title": "x",
+        "questions": [{**_question_payload(1), "id": str(uuid.uuid4())}],
+    }
+    assert owner_api.put(url, bad, format="json").status_code == 400
+
+
+def test_changing_the_correct_option_regrades_answers(owner_api, owner, participant):
+    quiz, qmap = make_quiz(owner)
+    (q1, (correct1, wrong1)), (q2, (correct2, wrong2)) = qmap.items()
+    mem = Membership.objects.create(quiz=quiz, user=participant)
+    mem.submissions.create(question_id=q1, option=wrong1, correct=False)
+    mem.submissions.create(question_id=q2, option=correct2, correct=True)
+    mem.recalculate()
+
+    def question(qid, body, options):
+        return {
+            "id": str(qid),
+            "body": body,
+            "points": 5,
+            "options": [
+                {"id": str(option.id), "text": option.text, "correct": correct}
+                for option, correct in options
+            ],
+        }
+
+    payload = {
+        "title": "QZ",
+        "questions": [
+            # the key said "4"; it was "5" all along
+            question(q1, "2+2=?", [(correct1, False), (wrong1, True)]),
+            question(q2, "3+3=?", [(correct2, True), (wrong2, False)]),
+        ],
+    }
+    response = owner_api.put(
+        reverse("quiz:quiz-detail", args=[quiz.id]), payload, format="json"
+    )
+    assert response.status_code == 200, response.content
+
+    assert mem.submissions.get(question_id=q1).correct is True
+    mem.refresh_from_db()
+    assert mem.total_score == 10
+
+
+def test_positions_come_from_the_counter(owner, django_assert_num_queries):
+    quiz, _ = make_quiz(owner)
+    Question.objects.filter(quiz=quiz, position=2).delete()
+
+    # MAX(position)+1 would hand out 2 again; the counter never goes back
+    q3 = Question.objects.create(quiz=quiz, body="new")
+    assert q3.position == 3
+    # counter UPDATE ... RETURNING, INSERT, quiz version bump
+    with django_assert_num_queries(3):
+        option = Option(question=q3, text="a")
+        option.save()
+    assert option.position == 1
+    assert Option.objects.create(question=q3, text="b").position == 2
+
+
+def test_reorder_questions(owner_api, owner):
+    quiz, _ = make_quiz(owner)
+    q1, q2 = quiz.questions.values_list("id", flat=True)
+    url = reverse("quiz:quiz-reorder", args=[quiz.id])
+    version = quiz.version
+
+    response = owner_api.post(url, {"question_ids": [q2, q1]}, format="json")
+    assert response.status_code == 200, response.content
+    assert [row["id"] for row in _payload(response)] == [q2, q1]
+    quiz.refresh_from_db()
+    assert quiz.version > version
+    assert Question.objects.create(quiz=quiz, body="last").position == 5
+
+    for ids in ([q1], [q1, q1, q2], [q1, q2, uuid.uuid4()]):
+        response = owner_api.post(url, {"question_ids": ids}, format="json")
+        assert response.status_code == 400
+
+
+def test_non_owner_cannot_reorder(participant_api, owner):
+    quiz, _ = make_quiz(owner)
+    url = reverse("quiz:quiz-reorder", args=[quiz.id])
+    ids = list(quiz.questions.values_list("id", flat=True))
+    response = participant_api.post(url, {"question_ids": ids}, format="json")
+    assert response.status_code in (401, 403, 404)
+
+
+def test_other_owner_cannot_manage_quiz(api, owner):
+    quiz, _ = make_quiz(owner)
+    other = User.objects.create_user(email="other@example.com", role="OWNER")
+    api.force_authenticate(other)
+    publish = reverse("quiz:quiz-publish", args=[quiz.id])
+    # not visible at all
+    assert api.post(publish, {}).status_code == 404
+
+    # visible as a member, but still not theirs
+    Membership.objects.create(quiz=quiz, user=other, active=True)
+    assert api.post(publish, {}).status_code == 403
+    ids = list(quiz.questions.values_list("id", flat=True))
+    url = reverse("quiz:quiz-reorder", args=[quiz.id])
+    assert api.post(url, {"question_ids": ids}, format="json").status_code == 403
+    url = reverse("quiz:quiz-detail", args=[quiz.id])
+    assert api.patch(url, {"title": "x"}, format="json").status_code == 403
+    quiz.refresh_from_db()
+    assert (quiz.state, quiz.title) == (QuizState.DRAFT, "QZ")
+
+
+@pytest.mark.parametrize(
+    "state, window",
+    [
+        (QuizState.DRAFT, {}),
+        (QuizState.CLOSED, {}),
+        (QuizState.SCHEDULED, {"starts_at": timedelta(hours=1)}),
+        (QuizState.LIVE, {"starts_at": timedelta(hours=1)}),
+        (QuizState.LIVE, {"ends_at": -timedelta(hours=1)}),
+    ],
+)
+def test_submit_outside_window_is_rejected(
+    participant_api, owner, participant, state, window
+):
+    quiz, qmap = make_quiz(owner, state=state)
+    Quiz.objects.filter(pk=quiz.pk).update(
+        **{field: timezone.now() + delta for field, delta in window.items()}
+    )
+    # the window is applied by moving state
+    call_command("run_scheduler", stdout=StringIO())
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    question_id, (option, _) = next(iter(qmap.items()))
+    answer = {"question_id": str(question_id), "option_id": str(option.id)}
+
+    response = participant_api.post(
+        reverse("quiz:quiz-submit", args=[quiz.id]),
+        {"quiz_id": str(quiz.id), **answer},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert response.data["detail"] == "This quiz is not open for submissions."
+    response = participant_api.post(
+        reverse("quiz:quiz-submit-batch", args=[quiz.id]),
+        {"quiz_id": str(quiz.id), "answers": [answer]},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert not Membership.objects.get(quiz=quiz).submissions.exists()
@@ -0,0 +1,99 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from quiz.models import Quiz, QuizState
+from quiz.scheduler import run_scheduler
+from quiz.snapshots import snapshot_key
+
+pytestmark = pytest.mark.django_db
+
+
+def _quiz(owner, state, **window):
+    now = timezone.now()
+    return Quiz.objects.create(
+        owner=owner,
+        title="Q",
+        state=state,
+        **{field: now + delta for field, delta in window.items()},
+    )
+
+
+def test_scheduler_opens_and_closes_due_quizzes_in_batches(owner, monkeypatch):
+    hour = timedelta(hours=1)
+    due = [_quiz(owner, QuizState.SCHEDULED, starts_at=-hour) for _ in range(3)]
+    ending = [
+        _quiz(owner, QuizState.LIVE, starts_at=-2 * hour, ends_at=-hour)
+        for _ in range(3)
+    ]
+    missed = _quiz(owner, QuizState.SCHEDULED, starts_at=-2 * hour, ends_at=-hour)
+    early = _quiz(owner, QuizState.LIVE, starts_at=hour)
+    untouched = [
+        _quiz(owner, QuizState.DRAFT, starts_at=-hour),  # never published
+        _quiz(owner, QuizState.SCHEDULED, starts_at=hour),
+        _quiz(owner, QuizState.LIVE, ends_at=hour),
+    ]
+    cache.set(snapshot_key(ending[0].id, ending[0].version), "stale")
+
+    assert run_scheduler(batch_size=2) == {"closed": 4, "rescheduled": 1, "opened": 3}
+
+    states = dict(Quiz.objects.values_list("id", "state"))
+    assert {states[q.id] for q in due} == {QuizState.LIVE}
+    assert {states[q.id] for q in ending + [missed]} == {QuizState.CLOSED}
+    assert states[early.id] == QuizState.SCHEDULED
+    assert [states[q.id] for q in untouched] == [q.state for q in untouched]
+    assert cache.get(snapshot_key(due[0].id, due[0].version)) is not None
+    assert cache.get(snapshot_key(ending[0].id, ending[0].version)) is None
+
+    out = StringIO()
+    # a one-shot run keeps the caller's connection (and its transaction)
+    monkeypatch.setattr(
+        "quiz.management.commands.run_scheduler.close_old_connections",
+        lambda: pytest.fail("closed the caller's connection"),
+    )
+    call_command("run_scheduler", stdout=out)
+    assert json.loads(out.getvalue()) == {"closed": 0, "rescheduled": 0, "opened": 0}
+
+
+def test_publish_respects_the_schedule(owner_api, owner):
+    scheduled = _quiz(owner, QuizState.DRAFT, starts_at=timedelta(hours=1))
+    response = owner_api.post(reverse("quiz:quiz-publish", args=[scheduled.id]))
+    assert response.status_code == 200
+    assert response.data["data"]["state"] == QuizState.SCHEDULED
+    scheduled.refresh_from_db()
+    assert scheduled.state == QuizState.SCHEDULED
+
+    ended = _quiz(owner, QuizState.DRAFT, ends_at=-timedelta(minutes=1))
+    response = owner_api.post(reverse("quiz:quiz-publish", args=[ended.id]))
+    assert response.status_code == 400
+    ended.refresh_from_db()
+    assert ended.state == QuizState.DRAFT
+
+
+def test_state_follows_publish_not_the_payload(owner_api, owner):
+    response = owner_api.post(
+        reverse("quiz:quiz-list"),
+        {"title": "Q", "state": QuizState.LIVE, "questions": []},
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    quiz = Quiz.objects.get()
+    assert quiz.state == QuizState.DRAFT
+
+    Quiz.objects.filter(pk=quiz.pk).update(state=QuizState.LIVE)
+    url = reverse("quiz:quiz-detail", args=[quiz.id])
+    later = (timezone.now() + timedelta(hours=1)).isoformat()
+    response = owner_api.patch(url, {"starts_at": later}, format="json")
+    assert response.status_code == 400
+    earlier = (timezone.now() - timedelta(hours=1)).isoformat()
+    response = owner_api.patch(url, {"ends_at": earlier}, format="json")
+    assert response.status_code == 400
+    response = owner_api.patch(url, {"title": "R", "state": "DRAFT"}, format="json")
+    assert response.status_code == 200
+    quiz.refresh_from_db()
+    assert (quiz.title, quiz.state) == ("R", QuizState.LIVE)
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from quiz.models import Membership, Option, Question
+from quiz.snapshots import snapshot_key
+
+from .test_quiz_api import make_quiz
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def _live_quiz(owner_api, owner, participant):
+    quiz, _ = make_quiz(owner)
+    shuffled = Question.objects.create(
+        quiz=quiz, body="pick", points=1, shuffle_options=True
+    )
+    for text in "abcdefgh":
+        Option.objects.create(question=shuffled, text=text)
+    Membership.objects.create(quiz=quiz, user=participant, active=True)
+    owner_api.post(reverse("quiz:quiz-publish", args=[quiz.id]), {})
+    quiz.refresh_from_db()
+    return quiz
+
+
+def test_publish_caches_snapshot_and_retrieve_skips_serializers(
+    owner_api, owner, participant, django_assert_num_queries
+):
+    quiz = _live_quiz(owner_api, owner, participant)
+    assert cache.get(snapshot_key(quiz.id, quiz.version)) is not None
+
+    owner_api.force_authenticate(participant)
+    url = reverse("quiz:quiz-detail", args=[quiz.id])
+    # only the visibility check; no question/option queries
+    with django_assert_num_queries(1):
+        first = owner_api.get(url)
+    assert first.status_code == 200
+    data = json.loads(first.content)
+    assert [q["body"] for q in data["questions"]] == ["2+2=?", "3+3=?", "pick"]
+
+    # the per-user shuffle is stable between requests
+    assert owner_api.get(url).content == first.content
+
+
+def test_edit_invalidates_snapshot(owner_api, owner, participant):
+    quiz = _live_quiz(owner_api, owner, participant)
+    question = quiz.questions.get(position=1)
+    question.body = "1+1=?"
+    question.save()
+
+    quiz.refresh_from_db()
+    assert cache.get(snapshot_key(quiz.id, quiz.version)) is None
+    response = owner_api.get(reverse("quiz:quiz-detail", args=[quiz.id]))
+    assert json.loads(response.content)["questions"][0]["body"] == "1+1=?"
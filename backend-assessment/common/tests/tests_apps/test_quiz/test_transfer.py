@@ -0,0 +1,126 @@
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from quiz.models import Option, Question, Quiz, QuizState
+from quiz.transfer import export_quizzes, import_quizzes
+from rest_framework.exceptions import ValidationError
+
+from .test_quiz_api import _payload, make_quiz
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+def _snapshot(quiz_id):
+    return [
+        (
+            q.id,
+            q.body,
+            q.position,
+            [(o.id, o.text, o.correct, o.position) for o in q.options.all()],
+        )
+        for q in Question.objects.filter(quiz_id=quiz_id).prefetch_related("options")
+    ]
+
+
+def test_export_import_round_trip_over_api(owner_api, owner):
+    quiz, _ = make_quiz(owner)
+    before = _snapshot(quiz.id)
+
+    response = owner_api.get(reverse("quiz:quiz-export"), {"id": str(quiz.id)})
+    assert response.status_code == 200
+    body = b"".join(response.streaming_content)
+    kinds = [json.loads(line)["t"] for line in body.splitlines()]
+    assert kinds == [
+        "quiz",
+        "question",
+        "question",
+        "option",
+        "option",
+        "option",
+        "option",
+    ]
+
+    quiz_id = quiz.id
+    quiz.delete()
+    upload = SimpleUploadedFile("bank.ndjson", body)
+    response = owner_api.post(
+        reverse("quiz:quiz-import"), {"file": upload}, format="multipart"
+    )
+    assert response.status_code == 201, response.content
+    assert _payload(response) == {"quizzes": 1, "questions": 2, "options": 4}
+
+    restored = Quiz.objects.get(pk=quiz_id)
+    assert restored.owner == owner and restored.question_count == 2
+    assert _snapshot(quiz_id) == before
+
+
+def test_export_rejects_malformed_ids(owner_api):
+    response = owner_api.get(reverse("quiz:quiz-export"), {"id": "garbage"})
+    assert response.status_code == 400
+
+
+def test_import_rejects_other_owners_quiz(api, owner):
+    quiz, _ = make_quiz(owner)
+    other = User.objects.create_user(email="other@example.com", role="OWNER")
+    api.force_authenticate(other)
+    body = "".join(export_quizzes(Quiz.objects.all()))
+    upload = SimpleUploadedFile("bank.ndjson", body.encode())
+    response = api.post(
+        reverse("quiz:quiz-import"), {"file": upload}, format="multipart"
+    )
+    assert response.status_code == 400
+    assert Quiz.objects.get(pk=quiz.pk).owner == owner
+
+
+def test_commands_round_trip(tmp_path, owner):
+    quiz, _ = make_quiz(owner)
+    path = tmp_path / "bank.ndjson"
+    call_command("quiz_export", "--owner", owner.email, "-o", str(path))
+
+    Option.objects.filter(question__quiz=quiz).update(text="changed")
+    out = StringIO()
+    call_command(
+        "quiz_import",
+        str(path),
+        "--owner",
+        owner.email,
+        "--batch-size",
+        "2",
+        stdout=out,
+    )
+    assert '"options": 4' in out.getvalue()
+    assert not Option.objects.filter(text="changed").exists()
+
+
+def test_import_leaves_state_to_publish(owner):
+    live, _ = make_quiz(owner, state=QuizState.LIVE)
+    closed, _ = make_quiz(owner, state=QuizState.CLOSED)
+    lines = list(export_quizzes(Quiz.objects.all()))
+    assert json.loads(lines[0])["state"] == QuizState.LIVE
+
+    closed_id = closed.pk
+    closed.delete()
+    import_quizzes(lines, owner)
+    assert Quiz.objects.get(pk=closed_id).state == QuizState.DRAFT
+    assert Quiz.objects.get(pk=live.pk).state == QuizState.LIVE
+
+
+def test_failed_import_keeps_whole_quizzes_only(owner):
+    first, second = make_quiz(owner)[0].pk, make_quiz(owner)[0].pk
+    lines = list(export_quizzes(Quiz.objects.all()))
+    Quiz.objects.all().delete()
+    # the second quiz's last option is broken
+    lines[-1] = lines[-1].replace('"correct":false', '"correct":"maybe"')
+
+    with pytest.raises(ValidationError):
+        import_quizzes(lines, owner, batch_size=2)
+    (stored,) = Quiz.objects.all()
+    assert stored.pk == first and stored.question_count == 2
+    assert Option.objects.filter(question__quiz=stored).count() == 4
+    assert not Question.objects.filter(quiz_id=second).exists()
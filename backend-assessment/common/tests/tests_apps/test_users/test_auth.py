@@ -1,5 +1,6 @@
 import pytest
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
 
 pytestmark = pytest.mark.django_db
 User = get_user_model()
@@ -20,3 +21,56 @@ def test_jwt_obtain_and_refresh(client):
     )
     assert response2.status_code == 200
     assert "access" in response2.data
+
+
+def _tokens(client, email, password):
+    response = client.post(
+        "/token/", {"email": email, "password": password}, format="json"
+    )
+    assert response.status_code == 200, response.content
+    return response.data
+
+
+def test_authenticated_request_does_not_load_the_user(
+    client, django_assert_num_queries
+):
+    user = User.objects.create_user(
+        email="u@example.com", password="secret", role="OWNER"
+    )
+    access = _tokens(client, user.email, "secret")["access"]
+    # the quiz page only; no users table lookup
+    with django_assert_num_queries(1):
+        response = client.get("/quizzes/", HTTP_AUTHORIZATION=f"Bearer {access}")
+    assert response.status_code == 200
+
+
+def test_revoked_tokens_are_rejected(client):
+    user = User.objects.create_user(
+        email="u@example.com", password="secret", role="OWNER"
+    )
+    tokens = _tokens(client, user.email, "secret")
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {tokens['access']}"}
+    assert client.get("/quizzes/", **auth).status_code == 200
+
+    user.revoke_tokens()
+    assert client.get("/quizzes/", **auth).status_code == 401
+    refresh = client.post(
+        "/token/refresh/", {"refresh": tokens["refresh"]}, format="json"
+    )
+    assert refresh.status_code == 401
+
+    fresh = _tokens(client, user.email, "secret")["access"]
+    response = client.get("/quizzes/", HTTP_AUTHORIZATION=f"Bearer {fresh}")
+    assert response.status_code == 200
+
+
+def test_role_claim_gates_owner_actions(participant_api):
+    response = participant_api.post("/quizzes/", {"title": "x"}, format="json")
+    assert response.status_code == 403
+
+
+def test_tokens_without_claims_fall_back_to_the_user_row(client):
+    user = User.objects.create_user(email="u@example.com", role="OWNER")
+    legacy = AccessToken.for_user(user)
+    response = client.get("/quizzes/", HTTP_AUTHORIZATION=f"Bearer {legacy}")
+    assert response.status_code == 200
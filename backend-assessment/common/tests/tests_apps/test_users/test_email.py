@@ -0,0 +1,63 @@
+import importlib
+
+import pytest
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.urls import reverse
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+backfill = importlib.import_module("users.migrations.0004_email_upper_unique")
+
+
+def test_emails_are_stored_lowercase_and_found_in_any_case(client):
+    user = User.objects.create_user(
+        email="  Mixed.Case@Example.COM ", password="secret", role="OWNER"
+    )
+    assert user.email == "mixed.case@example.com"
+    assert User.objects.by_email("MIXED.case@example.com ").get() == user
+
+    response = client.post(
+        "/token/", {"email": "Mixed.Case@example.com", "password": "secret"}
+    )
+    assert response.status_code == 200, response.content
+
+
+def test_login_lookup_uses_the_upper_expression(client, django_assert_num_queries):
+    User.objects.create_user(email="a@example.com", password="pw", role="OWNER")
+    with django_assert_num_queries(2) as ctx:  # lookup, last_login
+        response = client.post(
+            reverse("users:login"), {"email": "A@EXAMPLE.com", "password": "pw"}
+        )
+    assert response.status_code == 200, response.content
+    assert 'WHERE UPPER("users_user"."email") = ' in ctx.captured_queries[0]["sql"]
+
+
+def test_case_variants_are_rejected(client):
+    User.objects.create_user(email="taken@example.com", password="pw", role="OWNER")
+    response = client.post(
+        reverse("users:register"),
+        {
+            "email": "TAKEN@example.com",
+            "password": "Another-pass-123",
+            "first_name": "T",
+            "last_name": "U",
+        },
+    )
+    assert response.status_code == 400
+    with pytest.raises(IntegrityError):
+        User.objects.create(email="Taken@Example.com")
+
+
+def test_backfill_normalizes_in_batches(monkeypatch):
+    User.objects.bulk_create(
+        User(email=f" Legacy{i}@Example.com ", role="PARTICIPANT") for i in range(5)
+    )
+    monkeypatch.setattr(backfill, "BATCH_SIZE", 2)
+    schema_editor = type("SchemaEditor", (), {"connection": connection})
+    backfill.normalize_emails(apps, schema_editor)
+    assert sorted(User.objects.values_list("email", flat=True)) == [
+        f"legacy{i}@example.com" for i in range(5)
+    ]
@@ -0,0 +1,95 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+URL = reverse("users:login")
+FAST_HASHING = {"PBKDF2_ITERATIONS": 1_000}
+
+
+@pytest.fixture
+def user(db):
+    with override_settings(PASSWORD_HASHING=FAST_HASHING):
+        return User.objects.create_user(
+            email="login@example.com", password="right-pass", role="OWNER"
+        )
+
+
+@override_settings(PASSWORD_HASHING=FAST_HASHING)
+def test_login_checks_the_password(client, user):
+    response = client.post(URL, {"email": user.email, "password": "wrong"})
+    assert response.status_code == 403
+    assert json.loads(response.content)["success"] is False
+    response = client.post(URL, {"email": "nobody@example.com", "password": "x"})
+    assert response.status_code == 403
+
+    response = client.post(URL, {"email": user.email, "password": "right-pass"})
+    assert response.status_code == 200
+    assert json.loads(response.content)["data"]["id"] == str(user.id)
+
+
+@override_settings(PASSWORD_HASHING=FAST_HASHING)
+def test_disabled_accounts_fail_like_unknown_emails(client, user, monkeypatch):
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    hashed = []
+    set_password = User.set_password
+    monkeypatch.setattr(
+        User,
+        "set_password",
+        lambda self, raw: hashed.append(raw) or set_password(self, raw),
+    )
+    unknown = client.post(URL, {"email": "nobody@example.com", "password": "x"})
+    for password in ("wrong", "right-pass"):
+        response = client.post(URL, {"email": user.email, "password": password})
+        assert response.status_code == 403
+        assert json.loads(response.content) == json.loads(unknown.content)
+    assert hashed == ["x", "wrong", "right-pass"]
+
+
+@override_settings(PASSWORD_HASHING=FAST_HASHING, LAST_LOGIN_UPDATE_INTERVAL=300)
+def test_last_login_writes_are_throttled(client, user, django_assert_num_queries):
+    payload = {"email": user.email, "password": "right-pass"}
+    with django_assert_num_queries(2):  # lookup, last_login
+        assert client.post(URL, payload).status_code == 200
+    with django_assert_num_queries(1):  # lookup only
+        assert client.post(URL, payload).status_code == 200
+
+    User.objects.filter(pk=user.pk).update(
+        last_login=timezone.now() - timedelta(minutes=10)
+    )
+    with django_assert_num_queries(2):
+        assert client.post(URL, payload).status_code == 200
+
+
+def test_login_rehashes_to_the_configured_cost(client, user):
+    assert user.password.startswith("pbkdf2_sha256$1000$")
+    payload = {"email": user.email, "password": "right-pass"}
+    with override_settings(PASSWORD_HASHING={"PBKDF2_ITERATIONS": 2_000}):
+        assert client.post(URL, payload).status_code == 200
+        user.refresh_from_db()
+        assert user.password.startswith("pbkdf2_sha256$2000$")
+        assert user.check_password("right-pass")
+
+
+def test_bench_hashers_recommends_a_cost():
+    out = StringIO()
+    call_command(
+        "bench_hashers",
+        iterations=[1_000, 2_000],
+        repeat=2,
+        budget_ms=10_000,
+        stdout=out,
+    )
+    *rows, verdict = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [row["iterations"] for row in rows] == [1_000, 2_000]
+    assert all(row["logins_per_core_s"] > 0 for row in rows)
+    assert verdict == {"budget_ms": 10_000, "recommended_iterations": 2_000}
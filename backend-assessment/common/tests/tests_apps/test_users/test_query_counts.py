@@ -0,0 +1,14 @@
+import pytest
+from django.urls import reverse
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize("size", [1, 10, 100])
+def test_users_list(owner_api, user_factory, size, django_assert_max_num_queries):
+    user_factory(size)
+    # users
+    with django_assert_max_num_queries(1):
+        response = owner_api.get(reverse("users:user-list"))
+    assert response.status_code == 200
+    assert len(response.data["results"]) == min(size + 1, 20)
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from django.urls import reverse
+from users.authentication import access_token_for
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("users:user-list")
+
+
+def test_list_is_keyset_paginated(owner_api, owner, user_factory):
+    user_factory(5)
+    first = owner_api.get(URL, {"page_size": 4})
+    assert len(first.data["results"]) == 4 and first.data["next"]
+    second = owner_api.get(first.data["next"])
+    assert second.data["next"] is None
+    ids = [u["id"] for u in first.data["results"] + second.data["results"]]
+    assert len(ids) == len(set(ids)) == 6
+
+
+def test_list_filters_by_role_and_search_prefix(owner_api, owner, user_factory):
+    user_factory(3)
+    response = owner_api.get(URL, {"role": "OWNER"})
+    assert [u["email"] for u in response.data["results"]] == [owner.email]
+
+    def search(term):
+        response = owner_api.get(URL, {"search": term})
+        return sorted(u["email"] for u in response.data["results"])
+
+    assert search("USER1") == ["user1@example.com"]
+    assert search("u1") == ["user1@example.com"]  # first name
+    assert search("example") == []  # prefix only
+    assert len(search("  ")) == 4
+
+
+def test_list_renders_sparse_fieldsets(owner_api, owner, django_assert_num_queries):
+    with django_assert_num_queries(1) as ctx:
+        response = owner_api.get(URL, {"fields": "email,role"})
+    assert response.data["results"] == [{"email": owner.email, "role": "OWNER"}]
+    assert "first_name" not in ctx.captured_queries[0]["sql"]
+
+    detail = reverse("users:user-detail", args=[owner.id])
+    assert owner_api.get(detail, {"fields": "id"}).data == {"id": str(owner.id)}
+    response = owner_api.get(URL, {"fields": "email,password"})
+    assert response.status_code == 400
+
+
+def test_stream_writes_ndjson(owner_api, owner, user_factory):
+    user_factory(3)
+    response = owner_api.get(
+        reverse("users:user-stream"), {"role": "PARTICIPANT", "fields": "id,email"}
+    )
+    assert response.status_code == 200 and response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).split()]
+    assert sorted(row["email"] for row in rows) == [
+        f"user{i}@example.com" for i in range(3)
+    ]
+    assert all(set(row) == {"id", "email"} for row in rows)
+
+
+@pytest.mark.parametrize("name", ["users:user-list", "users:user-stream"])
+def test_listing_is_for_owners_only(api, participant, name):
+    url = reverse(name)
+    assert api.get(url, {"search": "o"}).status_code == 401
+    api.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token_for(participant)}")
+    assert api.get(url, {"search": "o"}).status_code == 403
+    detail = reverse("users:user-detail", args=[participant.id])
+    assert api.get(detail).status_code == 403
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "oper.settings")
+# a request's sync_to_async thread is not reused by the next request, so
+# persistent connections would pile up; reuse them through PG_POOL_MAX_SIZE
+os.environ.setdefault("PG_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
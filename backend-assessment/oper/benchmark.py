@@ -0,0 +1,145 @@
+import asyncio
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync
+from django.db import connections
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def summarize(samples, elapsed=None):
+    """Latency summary in milliseconds; throughput when wall time is given."""
+    ordered = sorted(samples)
+    summary = {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+    if elapsed:
+        summary["throughput_rps"] = round(len(ordered) / elapsed, 1)
+    return summary
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run_concurrent(make_worker, concurrency, requests):
+    """
+    Runs `requests` calls spread over `concurrency` threads and returns the
+    per-call latencies, the wall time and the number of failed calls.
+    make_worker() is called once per thread and returns the callable to
+    time; a call fails when it raises or returns False. With concurrency 1
+    everything runs in the calling thread.
+    """
+    samples, errors = [], 0
+    lock = threading.Lock()
+    quota = [
+        requests // concurrency + (i < requests % concurrency)
+        for i in range(concurrency)
+    ]
+
+    def work(count):
+        nonlocal errors
+        call = make_worker()
+        local, failed = [], 0
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                try:
+                    ok = call() is not False
+                except Exception:
+                    ok = False
+                local.append(time.perf_counter() - started)
+                failed += not ok
+        finally:
+            if concurrency > 1:
+                connections.close_all()
+        with lock:
+            samples.extend(local)
+            errors += failed
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        work(requests)
+    else:
+        threads = [threading.Thread(target=work, args=(n,)) for n in quota]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return samples, time.perf_counter() - started, errors
+
+
+def run_concurrent_async(make_worker, concurrency, requests):
+    """
+    run_concurrent() for coroutines: the calls are spread over `concurrency`
+    tasks on one event loop, so the concurrency comes from the code under
+    test yielding while it waits, not from threads. Like under an ASGI
+    server, sync_to_async() work runs back in the calling thread.
+    """
+    samples, errors = [], 0
+    quota = [
+        requests // concurrency + (i < requests % concurrency)
+        for i in range(concurrency)
+    ]
+
+    async def work(count):
+        nonlocal errors
+        call = make_worker()
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                ok = await call() is not False
+            except Exception:
+                ok = False
+            samples.append(time.perf_counter() - started)
+            errors += not ok
+
+    async def main():
+        await asyncio.gather(*(work(n) for n in quota))
+
+    started = time.perf_counter()
+    async_to_sync(main)()
+    return samples, time.perf_counter() - started, errors
+
+
+@contextmanager
+def connection_mode(mode, pool_size=10, alias="default"):
+    """
+    Temporarily changes how `alias` connects: "new" opens a connection per
+    request, "persistent" keeps one per thread and "pool" checks them out of
+    a psycopg 3 pool (PostgreSQL only). Applies to threads started inside.
+    """
+    connection = connections[alias]
+    db = connections.settings[alias]
+    saved = db["CONN_MAX_AGE"], db["OPTIONS"]
+    options = {key: value for key, value in saved[1].items() if key != "pool"}
+    if mode == "pool":
+        options["pool"] = saved[1].get("pool") or {"max_size": pool_size}
+    max_age = {"new": 0, "persistent": saved[0] or 60, "pool": 0}[mode]
+    connection.close()
+    db["CONN_MAX_AGE"], db["OPTIONS"] = max_age, options
+    try:
+        yield
+    finally:
+        connection.close()
+        if mode == "pool":
+            connection.close_pool()
+        db["CONN_MAX_AGE"], db["OPTIONS"] = saved
@@ -0,0 +1,96 @@
+"""
+Read-replica routing.
+
+Reads go to a replica only inside read_from_replica(), which ReplicaReadMixin
+enters for the read-only actions of a view; everything else, and every write,
+uses the primary. After a user writes, their reads stay on the primary for
+REPLICA_STICKY_SECONDS so they see their own changes despite replication lag.
+The window lives in the cache, so it holds across workers.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+_read_replica = ContextVar("read_replica", default=False)
+
+
+def _sticky_key(user_id):
+    return f"db:primary:{user_id}"
+
+
+def stick_to_primary(user_id):
+    """Keeps the user's reads on the primary for REPLICA_STICKY_SECONDS."""
+    if settings.DATABASE_REPLICAS and user_id:
+        cache.set(_sticky_key(user_id), 1, settings.REPLICA_STICKY_SECONDS)
+
+
+async def astick_to_primary(user_id):
+    if settings.DATABASE_REPLICAS and user_id:
+        await cache.aset(_sticky_key(user_id), 1, settings.REPLICA_STICKY_SECONDS)
+
+
+def replica_allowed(user_id):
+    """Whether the user's reads may go to a replica right now."""
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return cache.get(_sticky_key(user_id)) is None
+
+
+async def areplica_allowed(user_id):
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return await cache.aget(_sticky_key(user_id)) is None
+
+
+@contextmanager
+def read_from_replica(enabled=True):
+    token = _read_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    Runs `replica_actions` against a replica unless the user is inside their
+    sticky-primary window; every successful unsafe request opens the window.
+    """
+
+    replica_actions = set()
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_from_replica(False):
+            response = super().dispatch(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            stick_to_primary(getattr(self.request.user, "id", None))
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and replica_allowed(request.user.id):
+            # reset by dispatch() on the way out
+            _read_replica.set(True)
@@ -0,0 +1,92 @@
+import heapq
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements executed on a connection while the context is
+    active. Relies on execute_wrapper, so it also works with DEBUG=False.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+        self.count = 0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+
+
+class QueryProfiler(QueryCounter):
+    """
+    QueryCounter that also sums the time spent in the database and, when
+    `slowest` is set, keeps the N slowest statements as (seconds, sql).
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, slowest=0):
+        super().__init__(using)
+        self.duration = 0.0
+        self.slowest = slowest
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.duration += elapsed
+            if self.slowest:
+                entry = (elapsed, sql)
+                if len(self.statements) < self.slowest:
+                    heapq.heappush(self.statements, entry)
+                elif elapsed > self.statements[0][0]:
+                    heapq.heapreplace(self.statements, entry)
+
+    def slowest_statements(self):
+        return sorted(self.statements, reverse=True)
+
+
+def add_index_concurrently(app_label, model_name, index):
+    """
+    Migration operation adding `index` to the model state while PostgreSQL
+    builds it with CREATE INDEX CONCURRENTLY, so writes to a large table are
+    not blocked; the migration must be non-atomic. Other databases get a
+    plain build.
+    """
+    from django.db import migrations
+
+    def forwards(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(
+                index.create_sql(model, schema_editor, concurrently=True)
+            )
+        else:
+            schema_editor.add_index(model, index)
+
+    def backwards(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(
+                index.remove_sql(model, schema_editor, concurrently=True)
+            )
+        else:
+            schema_editor.remove_index(model, index)
+
+    return migrations.SeparateDatabaseAndState(
+        database_operations=[migrations.RunPython(forwards, backwards)],
+        state_operations=[migrations.AddIndex(model_name=model_name, index=index)],
+    )
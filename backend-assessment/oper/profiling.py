@@ -0,0 +1,324 @@
+"""
+Per-request profiling.
+
+ProfilingMiddleware records, for every view action, the request latency,
+the number of SQL statements, the time spent in the database and in
+serializers, and the response size. Observations go to in-process
+histograms that metrics_view exports in the Prometheus text format.
+Configured by settings.PROFILING; SLOW_SQL = N additionally logs the N
+slowest statements of every request, and SERVER_TIMING sends the numbers
+back in a Server-Timing header to staff users (to everyone in DEBUG).
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from heapq import nlargest
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from .db_utils import QueryProfiler
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SERVER_TIMING": False,
+    "SLOW_SQL": 0,
+    "METRICS_TOKEN": None,
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = contextvars.ContextVar("profile", default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "PROFILING", {})}
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with one series per label set."""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self, **labels):
+        """(count, sum) of one series; (0, 0.0) if nothing was observed."""
+        series = self._series.get(tuple(sorted(labels.items())))
+        return (series[2], series[1]) if series else (0, 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def expose(self):
+        with self._lock:
+            series = sorted(
+                (key, list(counts), total, n)
+                for key, (counts, total, n) in self._series.items()
+            )
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, counts, total, n in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _labels(key, le=bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {n}")
+            lines.append(f"{self.name}_sum{_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_labels(key)} {n}")
+        return "\n".join(lines)
+
+
+def _labels(key, **extra):
+    pairs = [*key, *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency.", LATENCY_BUCKETS
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements per request.", QUERY_BUCKETS
+)
+DB_SECONDS = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL.", LATENCY_BUCKETS
+)
+SERIALIZER_SECONDS = Histogram(
+    "http_request_serializer_duration_seconds",
+    "Time spent in serializers.",
+    LATENCY_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes", "Response body size.", SIZE_BUCKETS
+)
+HISTOGRAMS = (
+    REQUEST_SECONDS,
+    DB_QUERIES,
+    DB_SECONDS,
+    SERIALIZER_SECONDS,
+    RESPONSE_BYTES,
+)
+
+
+class Profile:
+    """Totals of one profiled block; filled in when the block exits."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.statements = []
+        self._serializing = False
+
+    def add_queries(self, profilers, slowest=0):
+        self.queries = sum(p.count for p in profilers)
+        self.db_time = sum(p.duration for p in profilers)
+        if slowest:
+            self.statements = nlargest(
+                slowest, (s for p in profilers for s in p.statements)
+            )
+
+
+def _enter_profilers(slowest):
+    """QueryProfilers entered on this thread's connections, and their ExitStack."""
+    profilers = [QueryProfiler(alias, slowest) for alias in connections]
+    stack = ExitStack()
+    for profiler in profilers:
+        stack.enter_context(profiler)
+    return profilers, stack
+
+
+@contextmanager
+def profile(slowest=0):
+    """
+    Profiles the enclosed block: SQL on every configured database (count,
+    time and, with `slowest`, the N slowest statements) and serializer time.
+    """
+    current = Profile()
+    profilers, stack = _enter_profilers(slowest)
+    token = _current.set(current)
+    try:
+        with stack:
+            yield current
+    finally:
+        _current.reset(token)
+        current.add_queries(profilers, slowest)
+
+
+@asynccontextmanager
+async def aprofile(slowest=0):
+    """
+    profile() for async code. Connections are per thread and the ORM runs in
+    the request's thread-sensitive sync_to_async thread, so the SQL wrappers
+    are installed (and removed) there rather than on the event loop's thread.
+    """
+    current = Profile()
+    profilers, stack = await sync_to_async(_enter_profilers)(slowest)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+        await sync_to_async(stack.close)()
+        current.add_queries(profilers, slowest)
+
+
+def measure_serializer(to_representation, instance):
+    """
+    Runs to_representation, adding its duration to the active profile.
+    Nested serializers run inside the outermost one and are not re-counted.
+    """
+    current = _current.get()
+    if current is None or current._serializing:
+        return to_representation(instance)
+    current._serializing = True
+    started = time.perf_counter()
+    try:
+        return to_representation(instance)
+    finally:
+        current.serializer_time += time.perf_counter() - started
+        current._serializing = False
+
+
+def view_label(request):
+    """Viewset actions as e.g. QuizViewSet.submit, other views by URL name."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    func = match.func
+    actions = getattr(func, "actions", None)
+    cls = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    method = request.method.lower()
+    if actions:
+        return f"{cls.__name__}.{actions.get(method, method)}"
+    if match.view_name:
+        return match.view_name
+    return f"{(cls or func).__name__}.{method}"
+
+
+def shows_timing(request):
+    """
+    Server-Timing exposes query counts and SQL time, so outside DEBUG only
+    staff see it. DRF authenticates in the view and copies the user onto the
+    underlying request; JWT users carry is_staff as a token claim.
+    """
+    if settings.DEBUG:
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+class ProfilingMiddleware:
+    # async-capable, so async views under ASGI are not pushed onto a thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with profile(get_config()["SLOW_SQL"]) as current:
+            response = self.get_response(request)
+        return self.record(request, response, current, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        async with aprofile(get_config()["SLOW_SQL"]) as current:
+            response = await self.get_response(request)
+        return self.record(request, response, current, started)
+
+    def record(self, request, response, current, started):
+        elapsed = time.perf_counter() - started
+        view = view_label(request)
+        REQUEST_SECONDS.observe(elapsed, view=view, method=request.method)
+        DB_QUERIES.observe(current.queries, view=view)
+        DB_SECONDS.observe(current.db_time, view=view)
+        SERIALIZER_SECONDS.observe(current.serializer_time, view=view)
+        if not response.streaming:
+            RESPONSE_BYTES.observe(len(response.content), view=view)
+
+        if get_config()["SERVER_TIMING"] and shows_timing(request):
+            response["Server-Timing"] = ", ".join(
+                [
+                    f"total;dur={elapsed * 1000:.1f}",
+                    f'db;dur={current.db_time * 1000:.1f};desc="{current.queries} queries"',
+                    f"serialize;dur={current.serializer_time * 1000:.1f}",
+                ]
+            )
+        if current.statements:
+            logger.warning(
+                "%s %s: %d queries, %.1f ms in SQL; slowest:\n%s",
+                request.method,
+                view,
+                current.queries,
+                current.db_time * 1000,
+                "\n".join(
+                    f"  {seconds * 1000:8.2f} ms  {sql}"
+                    for seconds, sql in current.statements
+                ),
+            )
+        return response
+
+
+def render_metrics():
+    return "\n".join(histogram.expose() for histogram in HISTOGRAMS) + "\n"
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Open to staff sessions, or to requests
+    carrying `Authorization: Bearer <PROFILING["METRICS_TOKEN"]>`.
+    """
+    token = get_config()["METRICS_TOKEN"]
+    header = request.headers.get("Authorization", "")
+    allowed = (token and constant_time_compare(header, f"Bearer {token}")) or (
+        request.user.is_authenticated and request.user.is_staff
+    )
+    if not allowed:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4")
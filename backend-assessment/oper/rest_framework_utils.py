@@ -1,20 +1,20 @@
-from copy import deepcopy
-
 from rest_framework import serializers
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 from rest_framework.views import exception_handler
 from users.models import User
 
+from .profiling import measure_serializer
+
 
 def custom_exception_handler(exc, context):
     response = exception_handler(exc, context)
     if not response:  # handle 500 responses
         return response
 
-    # Preserve the original error payload
-    original_errors = deepcopy(response.data)
-    return_data = {"success": "False", "data": original_errors}
+    # DRF builds response.data fresh for every exception, so it is wrapped
+    # as is rather than copied
+    return_data = {"success": False, "data": response.data}
 
     if response.status_code == HTTP_400_BAD_REQUEST:
         message = "Bad request"
@@ -39,6 +39,12 @@ def custom_exception_handler(exc, context):
 
 
 class APIResponse(Response):
+    """
+    Response wrapped in the {"data": ..., "success": bool, **kwargs}
+    envelope. The envelope is one flat dict, encoded in a single pass by
+    oper.renderers.JSONRenderer.
+    """
+
     def __init__(
         self,
         data: dict = None,
@@ -49,19 +55,13 @@ class APIResponse(Response):
         content_type=None,
         **kwargs,
     ):
-        is_success = True
-        return_data = {}
-
-        if status and status >= HTTP_400_BAD_REQUEST:
-            is_success = False
-
-        if data:
-            return_data["data"] = data
-
-        return_data.update({"success": str(is_success), **kwargs})
+        envelope = {"data": data} if data else {}
+        envelope["success"] = status is None or status < HTTP_400_BAD_REQUEST
+        if kwargs:
+            envelope.update(kwargs)
 
         super().__init__(
-            data=return_data,
+            data=envelope,
             status=status,
             template_name=template_name,
             headers=headers,
@@ -80,3 +80,6 @@ class Serializer(serializers.Serializer):
             exc.default_error_message = getattr(self, "default_error_message", False)
             raise exc
         return valid
+
+    def to_representation(self, instance):
+        return measure_serializer(super().to_representation, instance)
@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -51,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "oper.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -84,6 +87,12 @@ WSGI_APPLICATION = "oper.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
+# Connections are reused: per thread for PG_CONN_MAX_AGE seconds or, with
+# PG_POOL_MAX_SIZE > 0, from a process-wide psycopg 3 pool (needs
+# `psycopg[pool]`; the pool replaces persistent connections).
+PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", 0))
+PG_STATEMENT_TIMEOUT_MS = int(os.getenv("PG_STATEMENT_TIMEOUT_MS", 0))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -92,7 +101,107 @@ DATABASES = {
         "PASSWORD": os.getenv("PG_PASSWORD"),
         "HOST": os.getenv("PG_HOST"),
         "PORT": int(os.environ.get("PG_PORT")) if os.environ.get("PG_PORT") else None,
+        "CONN_MAX_AGE": (
+            0 if PG_POOL_MAX_SIZE else int(os.getenv("PG_CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": os.getenv("PG_CONN_HEALTH_CHECKS", "1") == "1",
+        "OPTIONS": {},
+    }
+}
+if PG_STATEMENT_TIMEOUT_MS:
+    DATABASES["default"]["OPTIONS"][
+        "options"
+    ] = f"-c statement_timeout={PG_STATEMENT_TIMEOUT_MS}"
+if PG_POOL_MAX_SIZE:
+    # Django would only notice at the first connection
+    if not (find_spec("psycopg") and find_spec("psycopg_pool")):
+        raise ImproperlyConfigured(
+            "PG_POOL_MAX_SIZE needs psycopg 3 and its pool, which the Pipfile "
+            'does not install: pip install "psycopg[binary,pool]".'
+        )
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("PG_POOL_MIN_SIZE", 2)),
+        "max_size": PG_POOL_MAX_SIZE,
+        "timeout": float(os.getenv("PG_POOL_TIMEOUT", 10)),
     }
+
+# Read replicas: PG_REPLICA_HOSTS="replica-1,replica-2" adds one alias per host
+# with the primary's credentials. Read-only actions of the quiz and users views
+# use them (oper/db_routers.py); a user's reads stay on the primary for
+# REPLICA_STICKY_SECONDS after they write.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, map(str.strip, os.getenv("PG_REPLICA_HOSTS", "").split(",")))
+):
+    DATABASE_REPLICAS.append(f"replica_{index}")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["oper.db_routers.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+        if os.getenv("REDIS_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
+# Pre-serialized LIVE quiz payloads, invalidated through Quiz.version
+QUIZ_SNAPSHOT_TTL = int(os.getenv("QUIZ_SNAPSHOT_TTL", 60 * 60 * 24))
+
+# Answer keys of published quizzes kept per process, see quiz/answer_keys.py
+QUIZ_ANSWER_KEY_CACHE_SIZE = int(os.getenv("QUIZ_ANSWER_KEY_CACHE_SIZE", 1024))
+
+# Quiz leaderboards: in-process by default, Redis sorted sets when REDIS_URL is set.
+# An in-process board misses other workers' submits, so it is rebuilt from the
+# database every LEADERBOARD_WARM_TTL seconds; deploy more than one process
+# with REDIS_URL. Redis boards expire on the same TTL, which repairs pushes
+# lost to a broker outage.
+LEADERBOARD_WARM_TTL = float(os.getenv("LEADERBOARD_WARM_TTL", 30))
+QUIZ_LEADERBOARD = (
+    {
+        "BACKEND": "quiz.leaderboard.SortedSetLeaderboardBackend",
+        "OPTIONS": {"url": os.getenv("REDIS_URL"), "warm_ttl": LEADERBOARD_WARM_TTL},
+    }
+    if os.getenv("REDIS_URL")
+    else {
+        "BACKEND": "quiz.leaderboard.InMemoryLeaderboardBackend",
+        "OPTIONS": {"warm_ttl": LEADERBOARD_WARM_TTL},
+    }
+)
+
+# Live dashboard events: in-process fan-out by default (a single ASGI process),
+# Redis pub/sub when REDIS_URL is set, see quiz/events.py
+QUIZ_EVENTS = (
+    {
+        "BACKEND": "quiz.events.RedisEventBackend",
+        "OPTIONS": {"url": os.getenv("REDIS_URL")},
+    }
+    if os.getenv("REDIS_URL")
+    else {"BACKEND": "quiz.events.InMemoryEventBackend"}
+)
+# seconds of submits coalesced into one event, and between keepalive comments
+QUIZ_EVENTS_TICK = float(os.getenv("QUIZ_EVENTS_TICK", 1.0))
+QUIZ_EVENTS_KEEPALIVE = float(os.getenv("QUIZ_EVENTS_KEEPALIVE", 15.0))
+
+# Per-request query/latency histograms, exported at /metrics; on by default
+# only in DEBUG
+PROFILING = {
+    "ENABLED": os.getenv("PROFILING_ENABLED", "1" if DEBUG else "0") == "1",
+    # Server-Timing header with SQL time and query count, sent only to staff
+    # (to anyone in DEBUG)
+    "SERVER_TIMING": os.getenv("PROFILING_SERVER_TIMING", "0") == "1",
+    # log the N slowest SQL statements of every request (0 = off)
+    "SLOW_SQL": int(os.getenv("PROFILING_SLOW_SQL", 0)),
+    # bearer token for scrapers; staff sessions are always allowed
+    "METRICS_TOKEN": os.getenv("METRICS_TOKEN"),
 }
 
 # Password validation
@@ -113,13 +222,45 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher encodes new passwords; hashes made by the others, or with
+# another cost, are re-encoded on the next successful login
+PASSWORD_HASHERS = [
+    "users.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_HASHING = {
+    # PBKDF2 rounds per hash; unset = Django's default. Pick with bench_hashers
+    "PBKDF2_ITERATIONS": int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 0))
+    or None,
+}
+# seconds during which repeated logins do not rewrite User.last_login
+LAST_LOGIN_UPDATE_INTERVAL = int(os.getenv("LAST_LOGIN_UPDATE_INTERVAL", 300))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson-backed when installed, same output as DRF's JSONRenderer
+    "DEFAULT_RENDERER_CLASSES": [
+        "oper.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+# Tokens carry id/role/active/version claims; requests are authenticated
+# without loading the user row (see users/authentication.py)
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "users.authentication.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.authentication.ClaimsTokenRefreshSerializer",
+    "TOKEN_USER_CLASS": "users.authentication.ClaimsUser",
 }
+# how long a user's token version / active flag may be served from cache
+JWT_REVOCATION_CACHE_TTL = int(os.getenv("JWT_REVOCATION_CACHE_TTL", 30))
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
@@ -21,6 +21,7 @@ from drf_spectacular.views import (
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
+from oper.profiling import metrics_view
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
@@ -29,7 +30,10 @@ urlpatterns = [
     path("token/refresh/", TokenRefreshView.as_view()),
     path("users/", include("users.urls")),
     path("quizzes/", include("quiz.urls")),
+    # async submit/progress, for ASGI deployments (oper.asgi)
+    path("async/quizzes/", include("quiz.async_urls")),
     path("api-auth/", include("rest_framework.urls")),
+    path("metrics", metrics_view, name="metrics"),
     path("swagger/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "swagger/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"
@@ -18,7 +18,15 @@ class QuestionInline(admin.StackedInline):
 @admin.register(Quiz)
 class QuizAdmin(admin.ModelAdmin):
     inlines = [QuestionInline]
-    list_display = ("title", "owner", "state", "starts_at", "ends_at", "created_at")
+    list_display = (
+        "title",
+        "owner",
+        "state",
+        "question_count",
+        "starts_at",
+        "ends_at",
+        "created_at",
+    )
     list_filter = ("state",)
     search_fields = ("title", "owner__email")
     autocomplete_fields = ("owner",)
@@ -52,6 +60,7 @@ class MembershipAdmin(admin.ModelAdmin):
         "user",
         "active",
         "progress_pct",
+        "answered_count",
         "total_score",
         "joined_at",
     )
@@ -0,0 +1,143 @@
+"""
+Answer keys of published quizzes.
+
+Grading an answer needs the question's body and points, its options' texts
+and which option is correct. A quiz's key is loaded with one query (on
+publish, or on the first submit after an edit) and kept in a small
+in-process LRU keyed by (quiz id, Quiz.version). Every content edit bumps the
+version, so an outdated key is never used and just ages out of the LRU.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Question
+
+
+class Grade(NamedTuple):
+    question: str
+    points: int
+    answer: str
+    correct: bool
+    correct_answer: str | None
+
+
+class AnswerKey:
+    """
+    One quiz version, flattened: questions and options are numbered in load
+    order and their attributes kept in parallel arrays, so a key costs two
+    dicts and a few arrays however many questions the quiz has.
+    """
+
+    __slots__ = (
+        "version",
+        "_questions",
+        "_options",
+        "_bodies",
+        "_points",
+        "_correct",
+        "_texts",
+        "_option_correct",
+        "_option_question",
+    )
+
+    def __init__(self, version, rows):
+        """rows: (question_id, body, points, option_id, text, correct)."""
+        self.version = version
+        self._questions = {}
+        self._options = {}
+        self._bodies = []
+        self._points = array("I")
+        self._correct = array("i")  # first correct option, -1 without one
+        self._texts = []
+        self._option_correct = array("b")
+        self._option_question = array("I")
+        for question_id, body, points, option_id, text, correct in rows:
+            number = self._questions.get(question_id)
+            if number is None:
+                number = self._questions[question_id] = len(self._bodies)
+                self._bodies.append(body)
+                self._points.append(points)
+                self._correct.append(-1)
+            if option_id is None:
+                continue
+            self._options[option_id] = len(self._texts)
+            if correct and self._correct[number] < 0:
+                self._correct[number] = len(self._texts)
+            self._texts.append(text)
+            self._option_correct.append(bool(correct))
+            self._option_question.append(number)
+
+    def __contains__(self, question_id):
+        return question_id in self._questions
+
+    def grade(self, question_id, option_id):
+        """The Grade of one answer, None if the option is not the question's."""
+        question = self._questions.get(question_id)
+        option = self._options.get(option_id)
+        if question is None or option is None:
+            return None
+        if self._option_question[option] != question:
+            return None
+        correct = self._correct[question]
+        return Grade(
+            question=self._bodies[question],
+            points=self._points[question],
+            answer=self._texts[option],
+            correct=bool(self._option_correct[option]),
+            correct_answer=self._texts[correct] if correct >= 0 else None,
+        )
+
+
+_keys = OrderedDict()
+_lock = threading.Lock()
+
+
+def load_answer_key(quiz_id, version=None):
+    """Loads the quiz's key with one query and caches it."""
+    rows = list(
+        Question.objects.filter(quiz_id=quiz_id)
+        .order_by("position", "id", "options__position", "options__id")
+        .values_list(
+            "quiz__version",
+            "id",
+            "body",
+            "points",
+            "options__id",
+            "options__text",
+            "options__correct",
+        )
+    )
+    # cached under the version read with the rows, which may be newer
+    key = AnswerKey(rows[0][0] if rows else version, (row[1:] for row in rows))
+    size = getattr(settings, "QUIZ_ANSWER_KEY_CACHE_SIZE", 1024)
+    with _lock:
+        _keys[(quiz_id, key.version)] = key
+        _keys.move_to_end((quiz_id, key.version))
+        while len(_keys) > size:
+            _keys.popitem(last=False)
+    return key
+
+
+def get_answer_key(quiz_id, version):
+    return _cached(quiz_id, version) or load_answer_key(quiz_id, version)
+
+
+async def aget_answer_key(quiz_id, version):
+    key = _cached(quiz_id, version)
+    if key is None:
+        key = await sync_to_async(load_answer_key)(quiz_id, version)
+    return key
+
+
+def _cached(quiz_id, version):
+    with _lock:
+        key = _keys.get((quiz_id, version))
+        if key is not None:
+            _keys.move_to_end((quiz_id, version))
+        return key
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import async_views
+
+app_name = "quiz_async"
+
+urlpatterns = [
+    path("<uuid:pk>/submit/", async_views.submit, name="quiz-submit"),
+    path("<uuid:pk>/progress/", async_views.progress, name="quiz-progress"),
+    path("<uuid:pk>/events/", async_views.events, name="quiz-events"),
+]
@@ -0,0 +1,172 @@
+"""
+Async versions of the participant hot paths, submit and progress, and the
+live event stream of owner dashboards.
+
+Mounted under /async/quizzes/ with the same authentication, payloads and
+envelope as the QuizViewSet actions. Served by an ASGI server, a request
+waiting on the database parks a coroutine instead of holding a worker
+thread, so one process keeps many more participants connected. Under WSGI
+they still work, one request per thread.
+"""
+
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from oper.db_routers import areplica_allowed, astick_to_primary, read_from_replica
+from oper.renderers import dumps
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    NotFound,
+    ParseError,
+    PermissionDenied,
+)
+from rest_framework.views import exception_handler
+from users.authentication import ClaimsJWTAuthentication, aauthenticate
+
+from .events import channel, coalesced, get_event_backend
+from .models import Membership
+from .serializers import SubmitSerializer
+from .services import (
+    asubmit_answer,
+    dashboard,
+    live_dashboard,
+    page_params,
+    participant_progress,
+    ranked,
+    visible_quizzes,
+    with_access,
+)
+
+
+def _response(data, status_code):
+    # same envelope as APIResponse
+    envelope = {"data": data} if data else {}
+    envelope["success"] = status_code < status.HTTP_400_BAD_REQUEST
+    return HttpResponse(
+        dumps(envelope), status=status_code, content_type="application/json"
+    )
+
+
+def _error_response(request, exc):
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        exc.auth_header = ClaimsJWTAuthentication().authenticate_header(request)
+    response = exception_handler(exc, {"request": request})
+    result = HttpResponse(
+        dumps(response.data),
+        status=response.status_code,
+        content_type="application/json",
+    )
+    if response.has_header("WWW-Authenticate"):
+        result["WWW-Authenticate"] = response["WWW-Authenticate"]
+    return result
+
+
+def async_api_view(view):
+    """Authenticates the request and renders API errors like DRF would."""
+
+    @csrf_exempt
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await aauthenticate(request)
+            if user is None:
+                raise NotAuthenticated()
+            request.user = user
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return _error_response(request, exc)
+
+    return wrapper
+
+
+@require_POST
+@async_api_view
+async def submit(request, pk):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise ParseError()
+    serializer = SubmitSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    payload = await asubmit_answer(request.user, **serializer.validated_data)
+    await astick_to_primary(request.user.id)
+    return _response(payload, status.HTTP_201_CREATED)
+
+
+@require_GET
+@async_api_view
+async def progress(request, pk):
+    with read_from_replica(await areplica_allowed(request.user.id)):
+        return await _progress(request, pk)
+
+
+async def _progress(request, pk):
+    user_id = request.user.id
+    quizzes = with_access(visible_quizzes(user_id), user_id)
+    quiz = await quizzes.filter(pk=pk).afirst()
+    if quiz is None:
+        raise NotFound()
+    if quiz.is_owner:
+        offset, limit = page_params(request.GET)
+        data = await sync_to_async(dashboard)(quiz, offset, limit)
+    else:
+        membership = await Membership.objects.aget(pk=quiz.membership_id)
+        data = await sync_to_async(participant_progress)(quiz, membership)
+    return _response(data, status.HTTP_200_OK)
+
+
+@require_GET
+@async_api_view
+async def events(request, pk):
+    """
+    The owner dashboard as server-sent events: a `dashboard` event with every
+    row, then at most one `progress` event per tick carrying the latest score
+    of each member that submitted since. Only useful under ASGI; under WSGI
+    every open stream holds a worker thread.
+    """
+    user_id = request.user.id
+    quizzes = with_access(visible_quizzes(user_id), user_id)
+    quiz = await quizzes.filter(pk=pk).afirst()
+    if quiz is None:
+        raise NotFound()
+    if not quiz.is_owner:
+        raise PermissionDenied()
+    # subscribe before reading the board, so no submit falls in between
+    subscription = await get_event_backend().subscribe(channel(quiz.id))
+    try:
+        rows = await sync_to_async(live_dashboard)(quiz.id)
+    except BaseException:
+        await subscription.close()
+        raise
+    response = StreamingHttpResponse(
+        _event_stream(quiz.id, subscription, rows), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def _event_stream(quiz_id, subscription, rows):
+    tick = getattr(settings, "QUIZ_EVENTS_TICK", 1.0)
+    keepalive = getattr(settings, "QUIZ_EVENTS_KEEPALIVE", 15.0)
+    try:
+        yield _event("dashboard", rows)
+        async for batch in coalesced(subscription, tick, keepalive):
+            if not batch:
+                yield b": keepalive\n\n"
+                continue
+            yield _event("progress", await sync_to_async(ranked)(quiz_id, batch))
+    finally:
+        await subscription.close()
+
+
+def _event(name, data):
+    return b"event: " + name.encode() + b"\ndata: " + dumps(data) + b"\n\n"
@@ -0,0 +1,178 @@
+"""
+Live progress events.
+
+Whenever a membership's score changes, its new score and progress are
+published on the quiz's channel once the transaction commits. Owner
+dashboards subscribe through the event stream in quiz/async_views.py instead
+of polling the progress endpoint. The pub/sub backend is chosen by
+settings.QUIZ_EVENTS, like the leaderboard backend.
+"""
+
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+def channel(quiz_id):
+    return f"quiz:{quiz_id}:progress"
+
+
+class BaseEventBackend:
+    """
+    publish() may be called from any thread; subscribe() is a coroutine that
+    returns once the channel is subscribed, with a Subscription bound to the
+    running event loop.
+    """
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    async def subscribe(self, channel):
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    async def get(self, timeout=None):
+        """The next message, or None once `timeout` seconds pass without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        pass
+
+
+class InMemoryEventBackend(BaseEventBackend):
+    """Per-process fan-out; meant for tests and a single ASGI process."""
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, subscription in subscribers:
+            try:
+                loop.call_soon_threadsafe(subscription.queue.put_nowait, message)
+            except RuntimeError:
+                # the subscriber's loop has closed; it unsubscribes on its own
+                pass
+
+    async def subscribe(self, channel):
+        backend = self
+        entry = None
+
+        class LocalSubscription(Subscription):
+            async def close(self):
+                with backend._lock:
+                    backend._subscribers.get(channel, []).remove(entry)
+
+        subscription = LocalSubscription()
+        entry = (asyncio.get_running_loop(), subscription)
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(entry)
+        return subscription
+
+
+class RedisEventBackend(BaseEventBackend):
+    """
+    Redis PUBLISH/SUBSCRIBE, so every worker sees every submit. Like the
+    sorted-set leaderboard, tests can pass local fakes of the redis-py sync
+    and asyncio clients via OPTIONS["client"] / OPTIONS["async_client"].
+    """
+
+    def __init__(self, url=None, client=None, async_client=None, **options):
+        if client is None or async_client is None:
+            try:
+                import redis
+                import redis.asyncio
+            except ImportError:
+                raise ImproperlyConfigured(
+                    "RedisEventBackend requires the 'redis' package."
+                )
+            if not url:
+                raise ImproperlyConfigured("RedisEventBackend requires OPTIONS['url'].")
+            client = client or redis.Redis.from_url(url)
+            async_client = async_client or redis.asyncio.Redis.from_url(url)
+        self.client = client
+        self.async_client = async_client
+
+    def publish(self, channel, message):
+        self.client.publish(channel, json.dumps(message))
+
+    async def subscribe(self, channel):
+        pubsub = self.async_client.pubsub()
+        # SUBSCRIBE is acknowledged before the caller reads any state, so no
+        # message published after that read can be missed
+        await pubsub.subscribe(channel)
+        return RedisSubscription(pubsub)
+
+
+class RedisSubscription(Subscription):
+    def __init__(self, pubsub):
+        super().__init__()
+        self.pubsub = pubsub
+        self.task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        async for message in self.pubsub.listen():
+            if message["type"] == "message":
+                self.queue.put_nowait(json.loads(message["data"]))
+
+    async def close(self):
+        self.task.cancel()
+        await self.pubsub.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_event_backend():
+    config = getattr(settings, "QUIZ_EVENTS", {})
+    backend = import_string(config.get("BACKEND", "quiz.events.InMemoryEventBackend"))
+    return backend(**config.get("OPTIONS", {}))
+
+
+def publish_progress(membership):
+    """Publishes a membership's current score once the transaction commits."""
+    quiz_id = membership.quiz_id
+    message = {
+        "member": str(membership.user_id),
+        "total_score": membership.total_score,
+        "progress": float(membership.progress_pct),
+    }
+    # robust: the submit has committed, so a broker outage is only logged
+    transaction.on_commit(
+        lambda: get_event_backend().publish(channel(quiz_id), message), robust=True
+    )
+
+
+async def coalesced(subscription, tick, keepalive):
+    """
+    Yields lists of messages: everything published within `tick` seconds of
+    the first one, the latest message per member only. Yields an empty list
+    after `keepalive` quiet seconds, so the caller can send a heartbeat.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        message = await subscription.get(keepalive)
+        if message is None:
+            yield []
+            continue
+        pending = {message["member"]: message}
+        deadline = loop.time() + tick
+        while (remaining := deadline - loop.time()) > 0:
+            message = await subscription.get(remaining)
+            if message is None:
+                break
+            pending[message["member"]] = message
+        yield list(pending.values())
@@ -0,0 +1,280 @@
+"""
+Materialized per-quiz leaderboards.
+
+Scores are pushed here whenever a membership's score changes, so the owner
+dashboard and participant ranks are served without touching Postgres.
+The storage backend is chosen by settings.QUIZ_LEADERBOARD, the same way
+Django picks a cache backend.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class BaseLeaderboardBackend:
+    """
+    Ranks are 1-based and ordered by score, highest first.
+    Each entry is {"member", "participant", "progress", "total_score", "rank"}.
+    """
+
+    def record(self, quiz_id, member, score, progress, participant=None):
+        self.record_many(quiz_id, [(member, score, progress, participant)])
+
+    def record_many(self, quiz_id, rows):
+        """rows: iterable of (member, score, progress, participant or None)."""
+        raise NotImplementedError
+
+    def page(self, quiz_id, offset=0, limit=None):
+        raise NotImplementedError
+
+    def top(self, quiz_id, k):
+        return self.page(quiz_id, 0, k)
+
+    def rank(self, quiz_id, member):
+        raise NotImplementedError
+
+    def count(self, quiz_id):
+        raise NotImplementedError
+
+    def is_warm(self, quiz_id):
+        raise NotImplementedError
+
+    def mark_warm(self, quiz_id):
+        raise NotImplementedError
+
+    def drop(self, quiz_id):
+        raise NotImplementedError
+
+
+class InMemoryLeaderboardBackend(BaseLeaderboardBackend):
+    """
+    Per-process sorted structure; meant for tests and single-process dev.
+    It only sees the submits of its own process, so with several workers a
+    board is dropped and rebuilt from Postgres `warm_ttl` seconds after it
+    was warmed (None keeps it forever).
+    """
+
+    def __init__(self, warm_ttl=None, **options):
+        self._lock = threading.Lock()
+        self._boards = {}
+        self.warm_ttl = warm_ttl
+
+    def _board(self, quiz_id):
+        return self._boards.setdefault(
+            str(quiz_id), {"order": [], "entries": {}, "warm": False}
+        )
+
+    def record_many(self, quiz_id, rows):
+        with self._lock:
+            board = self._board(quiz_id)
+            for member, score, progress, participant in rows:
+                member = str(member)
+                previous = board["entries"].get(member)
+                if previous:
+                    order = board["order"]
+                    del order[bisect_left(order, (-previous["total_score"], member))]
+                    if participant is None:
+                        participant = previous["participant"]
+                board["entries"][member] = {
+                    "participant": participant or "",
+                    "progress": float(progress),
+                    "total_score": int(score),
+                }
+                insort(board["order"], (-int(score), member))
+
+    def page(self, quiz_id, offset=0, limit=None):
+        with self._lock:
+            board = self._boards.get(str(quiz_id))
+            if not board:
+                return []
+            end = None if limit is None else offset + limit
+            return [
+                {"member": member, **board["entries"][member], "rank": offset + i + 1}
+                for i, (_, member) in enumerate(board["order"][offset:end])
+            ]
+
+    def rank(self, quiz_id, member):
+        member = str(member)
+        with self._lock:
+            board = self._boards.get(str(quiz_id))
+            entry = board and board["entries"].get(member)
+            if not entry:
+                return None
+            return bisect_left(board["order"], (-entry["total_score"], member)) + 1
+
+    def count(self, quiz_id):
+        with self._lock:
+            board = self._boards.get(str(quiz_id))
+            return len(board["entries"]) if board else 0
+
+    def is_warm(self, quiz_id):
+        with self._lock:
+            board = self._boards.get(str(quiz_id))
+            if not board or not board["warm"]:
+                return False
+            if board["warm"] is not True and board["warm"] <= time.monotonic():
+                del self._boards[str(quiz_id)]
+                return False
+            return True
+
+    def mark_warm(self, quiz_id):
+        ttl = self.warm_ttl
+        with self._lock:
+            self._board(quiz_id)["warm"] = (
+                True if ttl is None else time.monotonic() + ttl
+            )
+
+    def drop(self, quiz_id):
+        with self._lock:
+            self._boards.pop(str(quiz_id), None)
+
+
+class SortedSetLeaderboardBackend(BaseLeaderboardBackend):
+    """
+    Redis sorted-set storage. Any client exposing the redis-py API
+    (zadd/zrevrange/zrevrank/zcard/hset/hmget/...) works, so tests can pass a
+    local fake via OPTIONS["client"]; otherwise OPTIONS["url"] is used. The
+    warm flag expires after `warm_ttl` seconds like the in-process one, so a
+    board that missed a failed push is rebuilt from Postgres.
+    """
+
+    def __init__(
+        self, client=None, url=None, prefix="leaderboard", warm_ttl=None, **options
+    ):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImproperlyConfigured(
+                    "SortedSetLeaderboardBackend requires the 'redis' package."
+                )
+            if not url:
+                raise ImproperlyConfigured(
+                    "SortedSetLeaderboardBackend requires OPTIONS['url']."
+                )
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.warm_ttl = warm_ttl
+
+    def _key(self, quiz_id, suffix=None):
+        key = f"{self.prefix}:{quiz_id}"
+        return f"{key}:{suffix}" if suffix else key
+
+    def record_many(self, quiz_id, rows):
+        scores, progress, names = {}, {}, {}
+        for member, score, pct, participant in rows:
+            member = str(member)
+            scores[member] = int(score)
+            progress[member] = float(pct)
+            if participant is not None:
+                names[member] = participant
+        if not scores:
+            return
+        pipe = self.client.pipeline()
+        pipe.zadd(self._key(quiz_id), scores)
+        pipe.hset(self._key(quiz_id, "progress"), mapping=progress)
+        if names:
+            pipe.hset(self._key(quiz_id, "names"), mapping=names)
+        pipe.execute()
+
+    def page(self, quiz_id, offset=0, limit=None):
+        end = -1 if limit is None else offset + limit - 1
+        rows = self.client.zrevrange(self._key(quiz_id), offset, end, withscores=True)
+        if not rows:
+            return []
+        members = [member for member, _ in rows]
+        names = self.client.hmget(self._key(quiz_id, "names"), members)
+        progress = self.client.hmget(self._key(quiz_id, "progress"), members)
+        return [
+            {
+                "member": member,
+                "participant": names[i] or "",
+                "progress": float(progress[i] or 0),
+                "total_score": int(score),
+                "rank": offset + i + 1,
+            }
+            for i, (member, score) in enumerate(rows)
+        ]
+
+    def rank(self, quiz_id, member):
+        rank = self.client.zrevrank(self._key(quiz_id), str(member))
+        return None if rank is None else rank + 1
+
+    def count(self, quiz_id):
+        return self.client.zcard(self._key(quiz_id))
+
+    def is_warm(self, quiz_id):
+        return bool(self.client.exists(self._key(quiz_id, "warm")))
+
+    def mark_warm(self, quiz_id):
+        ttl = self.warm_ttl
+        # SET ... EX takes whole seconds
+        ex = None if ttl is None else max(1, math.ceil(ttl))
+        self.client.set(self._key(quiz_id, "warm"), 1, ex=ex)
+
+    def drop(self, quiz_id):
+        self.client.delete(
+            self._key(quiz_id),
+            self._key(quiz_id, "progress"),
+            self._key(quiz_id, "names"),
+            self._key(quiz_id, "warm"),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_leaderboard():
+    config = getattr(settings, "QUIZ_LEADERBOARD", {})
+    backend = import_string(
+        config.get("BACKEND", "quiz.leaderboard.InMemoryLeaderboardBackend")
+    )
+    return backend(**config.get("OPTIONS", {}))
+
+
+def participant_name(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+
+def record_membership(membership, participant=None):
+    """Pushes a membership's current score once the transaction commits."""
+    quiz_id, member = membership.quiz_id, membership.user_id
+    score, progress = membership.total_score, membership.progress_pct
+    # robust: the submit has committed, so a failed push is only logged
+    transaction.on_commit(
+        lambda: get_leaderboard().record(quiz_id, member, score, progress, participant),
+        robust=True,
+    )
+
+
+def warm_leaderboard(quiz_id):
+    """Rebuilds a quiz leaderboard from the memberships table."""
+    from .models import Membership
+
+    rows = Membership.objects.filter(quiz_id=quiz_id).values_list(
+        "user_id", "total_score", "progress_pct", "user__first_name", "user__last_name"
+    )
+    board = get_leaderboard()
+    board.record_many(
+        quiz_id,
+        (
+            (user_id, score, progress, participant_name(first, last))
+            for user_id, score, progress, first, last in rows.iterator()
+        ),
+    )
+    board.mark_warm(quiz_id)
+    return board
+
+
+def get_warm_leaderboard(quiz_id):
+    board = get_leaderboard()
+    if not board.is_warm(quiz_id):
+        board = warm_leaderboard(quiz_id)
+    return board
@@ -0,0 +1,77 @@
+import json
+import random
+from importlib.util import find_spec
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from oper.benchmark import connection_mode, run_concurrent, summarize
+from quiz.models import Membership, QuizState
+from quiz.services import visible_quizzes, with_access
+
+MODES = ["new", "persistent", "pool"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a new database connection per request, persistent "
+        "connections and the psycopg pool. Each request is the progress "
+        "lookup between the request_started/request_finished signals, where "
+        "Django closes connections or returns them to the pool. Prints "
+        "latency percentiles and throughput as JSON, one line per mode and "
+        "level."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            action="append",
+            dest="modes",
+            choices=MODES,
+            help="Repeatable; all modes by default (pool only on PostgreSQL with the psycopg 3 pool installed).",
+        )
+        parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Requests per level."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, modes, concurrency, requests, seed, **options):
+        pool = connection.vendor == "postgresql" and bool(find_spec("psycopg_pool"))
+        if modes is None:
+            modes = MODES if pool else MODES[:2]
+        elif "pool" in modes and not pool:
+            raise CommandError(
+                '--mode pool needs PostgreSQL and "psycopg[binary,pool]".'
+            )
+        members = list(
+            Membership.objects.filter(active=True, quiz__state=QuizState.LIVE)
+            .order_by("id")
+            .values_list("user_id", "quiz_id")[:1_000]
+        )
+        if not members:
+            raise CommandError("No LIVE memberships found; run seed_load first.")
+        rng = random.Random(seed)
+
+        def request():
+            user_id, quiz_id = rng.choice(members)
+            request_started.send(sender=self.__class__)
+            try:
+                quizzes = with_access(visible_quizzes(user_id), user_id)
+                return quizzes.filter(pk=quiz_id).first() is not None
+            finally:
+                request_finished.send(sender=self.__class__)
+
+        for mode in modes:
+            with connection_mode(mode, pool_size=max(concurrency)):
+                for level in concurrency:
+                    samples, elapsed, errors = run_concurrent(
+                        lambda: request, level, requests
+                    )
+                    result = {
+                        "mode": mode,
+                        "concurrency": level,
+                        **summarize(samples, elapsed),
+                        "errors": errors,
+                    }
+                    self.stdout.write(json.dumps(result))
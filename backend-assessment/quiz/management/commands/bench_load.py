@@ -0,0 +1,274 @@
+import json
+import random
+import subprocess
+import threading
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+from django.urls import reverse
+from oper.benchmark import run_concurrent, run_concurrent_async, summarize
+from quiz.models import Membership, Option, QuizState, Submission
+from rest_framework.test import APIClient
+from users.authentication import access_token_for
+
+User = get_user_model()
+
+SCENARIOS = ["list", "retrieve", "progress", "submit"]
+
+
+def _host():
+    # DEBUG allows localhost with empty ALLOWED_HOSTS; otherwise use a listed one
+    return next(
+        (h for h in settings.ALLOWED_HOSTS if h != "*" and h[0] != "."),
+        "localhost",
+    )
+
+
+class InProcessClient:
+    """Goes through the full middleware stack and oper/urls.py, no network."""
+
+    def __init__(self):
+        self.client = APIClient(HTTP_HOST=_host())
+
+    def request(self, method, path, token, body=None):
+        response = getattr(self.client, method)(
+            path, body, format="json", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        return response.status_code
+
+
+class AsyncInProcessClient:
+    """Same as InProcessClient, but through Django's ASGI handler."""
+
+    def __init__(self):
+        self.client = AsyncClient(headers={"host": _host()})
+
+    async def request(self, method, path, token, body=None):
+        headers = {"authorization": f"Bearer {token}"}
+        if body is None:
+            response = await self.client.get(path, headers=headers)
+        else:
+            response = await self.client.post(
+                path, body, content_type="application/json", headers=headers
+            )
+        return response.status_code
+
+
+class HttpClient:
+    """Talks to a running server, e.g. --url http://127.0.0.1:8000."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, token, body=None):
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            method=method.upper(),
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the API (list, retrieve, progress, submit) with seeded data "
+        "across concurrency levels and print latency percentiles and "
+        "throughput as JSON, one line per scenario and level."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            choices=SCENARIOS,
+            help="Repeatable; all scenarios by default.",
+        )
+        parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests per level."
+        )
+        parser.add_argument(
+            "--pool", type=int, default=1_000, help="Memberships to draw from."
+        )
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server; in-process when omitted.",
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Send progress/submit to the async views under /async/. "
+            "In-process, all requests then run as tasks on one event loop "
+            "through the ASGI handler; with --url, point it at an ASGI server.",
+        )
+        parser.add_argument("--output", help="Also write all results to a file.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        scenarios = options["scenarios"] or SCENARIOS
+        self.random = random.Random(options["seed"])
+        self.answers_lock = threading.Lock()
+        members = list(
+            Membership.objects.filter(active=True, quiz__state=QuizState.LIVE)
+            .order_by("id")
+            .values_list("id", "user_id", "quiz_id")[: options["pool"]]
+        )
+        if not members:
+            raise CommandError("No LIVE memberships found; run seed_load first.")
+        tokens = {
+            user.id: access_token_for(user)
+            for user in User.objects.filter(id__in={m[1] for m in members})
+        }
+        self.members = [(tokens[user_id], quiz_id) for _, user_id, quiz_id in members]
+        self.namespace = "quiz_async" if options["asgi"] else "quiz"
+        if options["url"]:
+            self.make_client = lambda: HttpClient(options["url"])
+        elif not options["asgi"]:
+            self.make_client = InProcessClient
+        else:
+            self.make_client = None
+
+        commit = self.commit()
+        results = []
+        for scenario in scenarios:
+            for concurrency in options["concurrency"]:
+                if scenario == "submit":
+                    self.answers = self.unanswered(members, options["requests"])
+                requests = getattr(self, f"requests_{scenario}")
+                if self.make_client is None:
+                    samples, elapsed, errors = run_concurrent_async(
+                        lambda: self.async_call(requests),
+                        concurrency,
+                        options["requests"],
+                    )
+                else:
+                    samples, elapsed, errors = run_concurrent(
+                        lambda: self.call(requests), concurrency, options["requests"]
+                    )
+                result = {
+                    "scenario": scenario,
+                    "server": "asgi" if options["asgi"] else "wsgi",
+                    "concurrency": concurrency,
+                    "commit": commit,
+                    **summarize(samples, elapsed),
+                    "errors": errors,
+                }
+                results.append(result)
+                self.stdout.write(json.dumps(result))
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def pick(self):
+        return self.random.choice(self.members)
+
+    def call(self, requests):
+        """A run_concurrent() worker sending the requests of one scenario."""
+        client = self.make_client()
+
+        def call():
+            request = requests()
+            if request is None:
+                return False
+            method, path, token, body, expected = request
+            return client.request(method, path, token, body) == expected
+
+        return call
+
+    def async_call(self, requests):
+        client = AsyncInProcessClient()
+
+        async def call():
+            request = requests()
+            if request is None:
+                return False
+            method, path, token, body, expected = request
+            return await client.request(method, path, token, body) == expected
+
+        return call
+
+    # each returns the next (method, path, token, body, expected status)
+
+    def requests_list(self):
+        token, _ = self.pick()
+        return "get", reverse("quiz:quiz-list"), token, None, 200
+
+    def requests_retrieve(self):
+        token, quiz_id = self.pick()
+        return "get", reverse("quiz:quiz-detail", args=[quiz_id]), token, None, 200
+
+    def requests_progress(self):
+        token, quiz_id = self.pick()
+        path = reverse(f"{self.namespace}:quiz-progress", args=[quiz_id])
+        return "get", path, token, None, 200
+
+    def requests_submit(self):
+        with self.answers_lock:
+            answer = next(self.answers, None)
+        if answer is None:
+            return None
+        token, quiz_id, question_id, option_id = answer
+        body = {
+            "quiz_id": str(quiz_id),
+            "question_id": str(question_id),
+            "option_id": str(option_id),
+        }
+        path = reverse(f"{self.namespace}:quiz-submit", args=[quiz_id])
+        return "post", path, token, body, 201
+
+    def unanswered(self, members, limit):
+        """(token, quiz, question, option) tuples nobody has submitted yet."""
+        quiz_ids = {quiz_id for _, _, quiz_id in members}
+        questions = {}
+        first_options = (
+            Option.objects.filter(question__quiz_id__in=quiz_ids)
+            .order_by("question_id", "position")
+            .values_list("question__quiz_id", "question_id", "id")
+        )
+        for quiz_id, question_id, option_id in first_options.iterator():
+            questions.setdefault(quiz_id, {}).setdefault(question_id, option_id)
+        answered = set(
+            Submission.objects.filter(
+                membership_id__in=[m[0] for m in members]
+            ).values_list("membership_id", "question_id")
+        )
+        tokens = dict(zip((m[0] for m in members), (t for t, _ in self.members)))
+        answers = [
+            (tokens[membership_id], quiz_id, question_id, option_id)
+            for membership_id, _, quiz_id in members
+            for question_id, option_id in questions.get(quiz_id, {}).items()
+            if (membership_id, question_id) not in answered
+        ]
+        self.random.shuffle(answers)
+        if len(answers) < limit:
+            self.stderr.write(
+                f"Only {len(answers)} unanswered questions left; "
+                "the remaining submit requests will count as errors."
+            )
+        return iter(answers[:limit])
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,82 @@
+import json
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.urls import reverse
+from oper.benchmark import summarize, timed
+from quiz.models import Membership, Quiz
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure GET /quizzes/ latency while the memberships table grows. "
+        "All generated rows are rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1_000, 10_000, 50_000],
+            help="Membership table sizes to measure at.",
+        )
+        parser.add_argument("--quizzes", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=30)
+
+    def handle(self, *args, sizes, quizzes, repeat, **options):
+        try:
+            with transaction.atomic():
+                self.run(sorted(sizes), quizzes, repeat)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, quiz_count, repeat):
+        tag = uuid.uuid4().hex[:8]
+        owner = User.objects.create(email=f"bench-owner-{tag}@example.com")
+        participant = User.objects.create(email=f"bench-part-{tag}@example.com")
+        quizzes = Quiz.objects.bulk_create(
+            Quiz(owner=owner, title=f"bench {i}") for i in range(quiz_count)
+        )
+        # the measured user sees a fixed slice of the quizzes
+        Membership.objects.bulk_create(
+            Membership(quiz=quiz, user=participant) for quiz in quizzes[::2]
+        )
+
+        client = APIClient(HTTP_HOST="localhost")
+        client.force_authenticate(participant)
+        url = reverse("quiz:quiz-list")
+        get_page = lambda: client.get(url)  # noqa: E731
+        created = len(quizzes[::2])
+        for size in sizes:
+            missing = size - created
+            if missing > 0:
+                users = User.objects.bulk_create(
+                    User(email=f"bench-{tag}-{created + i}@example.com")
+                    for i in range(missing)
+                )
+                Membership.objects.bulk_create(
+                    (
+                        Membership(quiz=quizzes[i % quiz_count], user=user)
+                        for i, user in enumerate(users)
+                    ),
+                    batch_size=5_000,
+                )
+                created = size
+            response = get_page()  # warm up
+            if response.status_code != 200:
+                raise CommandError(
+                    f"GET {url} returned {response.status_code}: {response.content!r}"
+                )
+            samples = timed(get_page, repeat)
+            self.stdout.write(json.dumps({"memberships": size, **summarize(samples)}))
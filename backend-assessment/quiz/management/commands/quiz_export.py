@@ -0,0 +1,35 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from quiz.models import Quiz
+from quiz.transfer import export_quizzes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Stream quizzes with their questions and options as NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quiz", action="append", dest="quiz_ids", help="Quiz id to export."
+        )
+        parser.add_argument("--owner", help="Only quizzes owned by this email.")
+        parser.add_argument(
+            "-o", "--output", help="Write to this file instead of stdout."
+        )
+
+    def handle(self, *args, quiz_ids=None, owner=None, output=None, **options):
+        quizzes = Quiz.objects.all()
+        if quiz_ids:
+            quizzes = quizzes.filter(id__in=quiz_ids)
+        if owner:
+            quizzes = quizzes.filter(owner__in=User.objects.by_email(owner))
+
+        stream = open(output, "w", encoding="utf-8") if output else sys.stdout
+        try:
+            stream.writelines(export_quizzes(quizzes))
+        finally:
+            if output:
+                stream.close()
@@ -0,0 +1,35 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from quiz.transfer import IMPORT_BATCH_SIZE, import_quizzes
+from rest_framework.exceptions import ValidationError
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import (upsert) quizzes from an NDJSON file produced by quiz_export."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file, '-' for stdin.")
+        parser.add_argument(
+            "--owner", required=True, help="Email of the user owning the quizzes."
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, path, owner, batch_size, **options):
+        user = User.objects.by_email(owner).first()
+        if user is None:
+            raise CommandError(f"No user with email {owner}.")
+
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        try:
+            counts = import_quizzes(stream, user, batch_size=batch_size)
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+        finally:
+            if path != "-":
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(json.dumps(counts)))
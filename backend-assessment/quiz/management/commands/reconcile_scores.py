@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+from quiz.services import reconcile_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute quiz totals and membership scores from scratch and report "
+        "drift from the incrementally maintained counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quiz", action="append", dest="quiz_ids", help="Limit to quiz id."
+        )
+        parser.add_argument(
+            "--fix", action="store_true", help="Overwrite drifted counters."
+        )
+
+    def handle(self, *args, quiz_ids=None, fix=False, **options):
+        drift = reconcile_scores(quiz_ids=quiz_ids, fix=fix)
+        self.stdout.write(json.dumps(drift, indent=2))
+        summary = (
+            f"{len(drift['quizzes'])} quiz(zes), "
+            f"{len(drift['memberships'])} membership(s) drifted"
+        )
+        if fix:
+            summary += " (fixed)"
+        self.stdout.write(self.style.SUCCESS(summary))
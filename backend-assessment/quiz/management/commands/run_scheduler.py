@@ -0,0 +1,33 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from quiz.scheduler import BATCH_SIZE, run_scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Open scheduled quizzes whose starts_at has passed and close LIVE "
+        "quizzes past their ends_at. Runs once, or every --interval seconds "
+        "with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep running.")
+        parser.add_argument(
+            "--interval", type=float, default=5, help="Seconds between runs."
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, loop, interval, batch_size, **options):
+        while True:
+            moved = run_scheduler(batch_size=batch_size)
+            if not loop or any(moved.values()):
+                self.stdout.write(json.dumps(moved))
+            if not loop:
+                return
+            time.sleep(interval)
+            # a long-running worker must not keep a broken or stale connection;
+            # a one-shot run may be inside the caller's transaction, so only here
+            close_old_connections()
@@ -0,0 +1,161 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from quiz.models import Membership, Option, Question, Quiz, QuizState, Submission
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, quizzes, questions, memberships and "
+        "submissions with bulk inserts, for load tests and benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owners", type=int, default=10)
+        parser.add_argument("--users", type=int, default=1_000, help="Participants.")
+        parser.add_argument("--quizzes", type=int, default=50)
+        parser.add_argument(
+            "--questions", type=int, default=20, help="Questions per quiz."
+        )
+        parser.add_argument("--options", type=int, default=4, help="Per question.")
+        parser.add_argument("--members", type=int, default=100, help="Per quiz.")
+        parser.add_argument(
+            "--answered",
+            type=float,
+            default=0.5,
+            help="Share of each member's questions already answered (0..1).",
+        )
+        parser.add_argument(
+            "--password",
+            default="loadpass",
+            help="Password of every generated user.",
+        )
+        parser.add_argument("--tag", default="load", help="Email prefix.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        try:
+            from faker import Faker
+        except ImportError:
+            raise CommandError("seed_load requires the 'faker' dev dependency.")
+        if options["members"] > options["users"]:
+            raise CommandError("--members cannot exceed --users.")
+        if not 0 <= options["answered"] <= 1:
+            raise CommandError("--answered must be between 0 and 1.")
+
+        self.fake = Faker()
+        self.fake.seed_instance(options["seed"])
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.counts = dict.fromkeys(
+            ["users", "quizzes", "questions", "options", "memberships", "submissions"],
+            0,
+        )
+
+        password = make_password(options["password"])
+        with transaction.atomic():
+            owners = self.create_users(
+                options["owners"], "OWNER", password, f"{options['tag']}-owner"
+            )
+            participants = self.create_users(
+                options["users"], "PARTICIPANT", password, options["tag"]
+            )
+        for i in range(options["quizzes"]):
+            with transaction.atomic():
+                self.create_quiz(i, owners[i % len(owners)], participants, options)
+        self.stdout.write(
+            self.style.SUCCESS(
+                ", ".join(f"{count} {name}" for name, count in self.counts.items())
+            )
+        )
+
+    def create_users(self, count, role, password, prefix):
+        users = [
+            User(
+                email=f"{prefix}-{i}@example.com",
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                role=role,
+                password=password,
+            )
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.counts["users"] += count
+        return users
+
+    def create_quiz(self, index, owner, participants, options):
+        size, width = options["questions"], options["options"]
+        quiz = Quiz.objects.create(
+            owner=owner,
+            title=self.fake.sentence(nb_words=4).rstrip("."),
+            description=self.fake.paragraph(),
+            state=QuizState.LIVE if index % 4 else QuizState.DRAFT,
+            question_count=size,
+            question_seq=size,
+        )
+        questions, answers = [], []
+        for position in range(1, size + 1):
+            question = Question(
+                quiz=quiz,
+                body=self.fake.sentence() + "?",
+                position=position,
+                points=self.random.randint(1, 5),
+                shuffle_options=self.random.random() < 0.3,
+                option_seq=width,
+            )
+            correct = self.random.randrange(width)
+            choices = [
+                Option(
+                    question=question,
+                    text=self.fake.word(),
+                    correct=j == correct,
+                    position=j + 1,
+                )
+                for j in range(width)
+            ]
+            questions.append(question)
+            answers.append(choices)
+        Question.objects.bulk_create(questions, batch_size=self.batch_size)
+        Option.objects.bulk_create(
+            [o for choices in answers for o in choices], batch_size=self.batch_size
+        )
+        Quiz.objects.filter(pk=quiz.pk).update(
+            points_total=sum(q.points for q in questions)
+        )
+
+        members = self.random.sample(participants, options["members"])
+        answered = round(size * options["answered"])
+        memberships, submissions = [], []
+        for user in members:
+            membership = Membership(quiz=quiz, user=user, answered_count=answered)
+            for question, choices in zip(questions[:answered], answers):
+                option = self.random.choice(choices)
+                submissions.append(
+                    Submission(
+                        membership=membership,
+                        question=question,
+                        option=option,
+                        correct=option.correct,
+                    )
+                )
+                if option.correct:
+                    membership.total_score += question.points
+            if size:
+                membership.progress_pct = round(Decimal(100 * answered) / size, 2)
+            memberships.append(membership)
+        Membership.objects.bulk_create(memberships, batch_size=self.batch_size)
+        Submission.objects.bulk_create(submissions, batch_size=self.batch_size)
+
+        self.counts["quizzes"] += 1
+        self.counts["questions"] += size
+        self.counts["options"] += size * width
+        self.counts["memberships"] += len(memberships)
+        self.counts["submissions"] += len(submissions)
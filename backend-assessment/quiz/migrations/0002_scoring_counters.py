@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Quiz = apps.get_model("quiz", "Quiz")
+    Question = apps.get_model("quiz", "Question")
+    Membership = apps.get_model("quiz", "Membership")
+    Submission = apps.get_model("quiz", "Submission")
+
+    questions = Question.objects.filter(quiz=OuterRef("pk")).values("quiz")
+    Quiz.objects.update(
+        question_count=Coalesce(
+            Subquery(questions.annotate(c=Count("id")).values("c")), 0
+        ),
+        points_total=Coalesce(
+            Subquery(questions.annotate(p=Sum("points")).values("p")), 0
+        ),
+    )
+    answered = (
+        Submission.objects.filter(membership=OuterRef("pk"))
+        .values("membership")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+    Membership.objects.update(answered_count=Coalesce(Subquery(answered), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="membership",
+            name="answered_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="quiz",
+            name="points_total",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="quiz",
+            name="question_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
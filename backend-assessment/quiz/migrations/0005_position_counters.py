@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:02
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_position_counters(apps, schema_editor):
+    Quiz = apps.get_model("quiz", "Quiz")
+    Question = apps.get_model("quiz", "Question")
+    Option = apps.get_model("quiz", "Option")
+
+    def highest(queryset):
+        return Coalesce(
+            Subquery(queryset.order_by("-position").values("position")[:1]), 0
+        )
+
+    Quiz.objects.update(
+        question_seq=highest(Question.objects.filter(quiz=OuterRef("pk")))
+    )
+    Question.objects.update(
+        option_seq=highest(Option.objects.filter(question=OuterRef("pk")))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0004_quiz_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quiz",
+            name="question_seq",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="option_seq",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            backfill_position_counters, migrations.RunPython.noop
+        ),
+    ]
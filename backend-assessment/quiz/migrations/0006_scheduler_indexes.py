@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0005_position_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quiz",
+            index=models.Index(
+                fields=["state", "starts_at"], name="quiz_state_starts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="quiz",
+            index=models.Index(fields=["state", "ends_at"], name="quiz_state_ends_idx"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quiz", "0006_scheduler_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="quiz",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("DRAFT", "Draft"),
+                    ("SCHEDULED", "Scheduled"),
+                    ("LIVE", "Live"),
+                    ("CLOSED", "Closed"),
+                ],
+                default="DRAFT",
+                max_length=12,
+            ),
+        ),
+    ]
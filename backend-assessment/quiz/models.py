@@ -1,12 +1,78 @@
+import random
 import uuid
+from decimal import Decimal
 
-from django.db import models
+from django.db import connections, models, router
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, NullIf
 from django.utils import timezone
 from users.models import User
 
 
+def seeded_shuffle(items, *seed):
+    """Shuffles a copy of items, always in the same order for the same seed."""
+    items = list(items)
+    random.Random(":".join(str(part) for part in seed)).shuffle(items)
+    return items
+
+
+def allocate_positions(model, counter, pk, count=1):
+    """
+    Reserves `count` consecutive positions from a counter column with a single
+    UPDATE ... RETURNING and returns the first one. The row lock taken by the
+    UPDATE serializes concurrent writers, so two saves can never be handed
+    the same position.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    column = quote(model._meta.get_field(counter).column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(model._meta.db_table)} SET {column} = {column} + %s "
+            f"WHERE {quote(model._meta.pk.column)} = %s RETURNING {column}",
+            [count, model._meta.pk.get_db_prep_value(pk, connection)],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise model.DoesNotExist(f"{model._meta.object_name} {pk} does not exist.")
+    return row[0] - count + 1
+
+
+def claim_position(model, counter, pk, position):
+    """Raises the counter to an explicitly chosen position, if it is higher."""
+    model.objects.filter(pk=pk, **{f"{counter}__lt": position}).update(
+        **{counter: position}
+    )
+
+
+def sync_position_counters(quiz_ids):
+    """
+    Raises the position counters of the given quizzes (and their questions)
+    to at least the highest stored position, after rows were written with
+    explicit positions (bulk inserts, imports).
+    """
+
+    def highest(queryset):
+        return Coalesce(
+            Subquery(queryset.order_by("-position").values("position")[:1]), 0
+        )
+
+    Quiz.objects.filter(id__in=quiz_ids).update(
+        question_seq=Greatest(
+            F("question_seq"), highest(Question.objects.filter(quiz=OuterRef("pk")))
+        )
+    )
+    Question.objects.filter(quiz_id__in=quiz_ids).update(
+        option_seq=Greatest(
+            F("option_seq"), highest(Option.objects.filter(question=OuterRef("pk")))
+        )
+    )
+
+
 class QuizState(models.TextChoices):
     DRAFT = "DRAFT", "Draft"
+    # published with a future starts_at; run_scheduler opens it
+    SCHEDULED = "SCHEDULED", "Scheduled"
     LIVE = "LIVE", "Live"
     CLOSED = "CLOSED", "Closed"
 
@@ -26,24 +92,67 @@ class Quiz(models.Model):
     randomized = models.BooleanField(default=False)
     starts_at = models.DateTimeField(null=True, blank=True)
     ends_at = models.DateTimeField(null=True, blank=True)
+    # denormalized from questions, kept in sync by refresh_totals()
+    question_count = models.PositiveIntegerField(default=0, editable=False)
+    points_total = models.PositiveIntegerField(default=0, editable=False)
+    # bumped on every content change; cached read models are keyed by it
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # last question position handed out, see allocate_positions()
+    question_seq = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    DERIVED_FIELDS = ("question_count", "points_total", "version", "question_seq")
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # keyset pagination of the quiz list
+            models.Index(fields=["-created_at", "-id"], name="quiz_created_id_idx"),
+            # due quizzes of the scheduler, see quiz/scheduler.py
+            models.Index(fields=["state", "starts_at"], name="quiz_state_starts_idx"),
+            models.Index(fields=["state", "ends_at"], name="quiz_state_ends_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
-    def is_open_for(self, user) -> bool:
-        now = timezone.now()
-        if self.state != QuizState.LIVE:
-            return False
-        if self.starts_at and now < self.starts_at:
-            return False
-        if self.ends_at and now > self.ends_at:
-            return False
-        return Membership.objects.filter(user=user, quiz=self, active=True).exists()
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get("update_fields") is not None:
+            return super().save(*args, **kwargs)
+        # full save of an edited quiz: never write back derived fields from a
+        # possibly stale instance, and invalidate cached read models
+        kwargs["update_fields"] = [
+            field.name
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.DERIVED_FIELDS
+        ] + ["version"]
+        self.version = F("version") + 1
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=["version"])
+
+    @classmethod
+    def bump_version(cls, **lookup):
+        cls.objects.filter(**lookup).update(version=F("version") + 1)
+
+    @classmethod
+    def allocate_positions(cls, quiz_id, count=1):
+        """First of `count` fresh question positions for the quiz."""
+        return allocate_positions(cls, "question_seq", quiz_id, count)
+
+    def refresh_totals(self):
+        """Re-derives the cached totals after the question set changed."""
+        totals = self.questions.aggregate(
+            count=models.Count("id"), points=models.Sum("points")
+        )
+        self.question_count = totals["count"]
+        self.points_total = totals["points"] or 0
+        Quiz.objects.filter(pk=self.pk).update(
+            question_count=self.question_count,
+            points_total=self.points_total,
+            version=F("version") + 1,
+        )
+        self.refresh_from_db(fields=["version"])
 
 
 class Question(models.Model):
@@ -53,6 +162,8 @@ class Question(models.Model):
     position = models.PositiveIntegerField(default=0, db_index=True)
     points = models.PositiveSmallIntegerField(default=1)
     shuffle_options = models.BooleanField(default=False)
+    # last option position handed out, see allocate_positions()
+    option_seq = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -68,14 +179,29 @@ class Question(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.position:
-            last = (
-                Question.objects.filter(quiz=self.quiz).aggregate(
-                    mx=models.Max("position")
-                )["mx"]
-                or 0
-            )
-            self.position = last + 1
+            self.position = Quiz.allocate_positions(self.quiz_id)
+        else:
+            claim_position(Quiz, "question_seq", self.quiz_id, self.position)
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # the counter is only moved by the allocator; a full save must not
+            # write back a stale copy of it
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "option_seq"
+            ]
         super().save(*args, **kwargs)
+        self.quiz.refresh_totals()
+
+    @classmethod
+    def allocate_positions(cls, question_id, count=1):
+        """First of `count` fresh option positions for the question."""
+        return allocate_positions(cls, "option_seq", question_id, count)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.quiz.refresh_totals()
+        return result
 
 
 class Option(models.Model):
@@ -92,14 +218,16 @@ class Option(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.position:
-            last = (
-                Option.objects.filter(question=self.question).aggregate(
-                    mx=models.Max("position")
-                )["mx"]
-                or 0
-            )
-            self.position = last + 1
+            self.position = Question.allocate_positions(self.question_id)
+        else:
+            claim_position(Question, "option_seq", self.question_id, self.position)
         super().save(*args, **kwargs)
+        Quiz.bump_version(questions=self.question_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        Quiz.bump_version(questions=self.question_id)
+        return result
 
 
 class Membership(models.Model):
@@ -113,6 +241,7 @@ class Membership(models.Model):
         max_digits=5, decimal_places=2, default=0
     )  # 0..100
     total_score = models.IntegerField(default=0)
+    answered_count = models.PositiveIntegerField(default=0)
     joined_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -124,6 +253,7 @@ class Membership(models.Model):
         return f"{self.user} → {self.quiz}"
 
     def recalculate(self):
+        """Full recount from submissions; apply_submission() is the hot path."""
         total_questions = self.quiz.questions.count()
         answered = Submission.objects.filter(membership=self).count()
         correct_points = (
@@ -134,10 +264,71 @@ class Membership(models.Model):
             or 0
         )
         self.total_score = int(correct_points)
+        self.answered_count = answered
         self.progress_pct = (
             round(100 * (answered / total_questions), 2) if total_questions else 0
         )
-        self.save(update_fields=["total_score", "progress_pct", "updated_at"])
+        self.save(
+            update_fields=[
+                "total_score",
+                "answered_count",
+                "progress_pct",
+                "updated_at",
+            ]
+        )
+
+    def apply_submission(self, submission):
+        """
+        Applies the score delta of a freshly created submission in a single
+        UPDATE, using the question count cached on the quiz.
+        """
+        points = submission.question.points if submission.correct else 0
+        answered = F("answered_count") + 1
+        Membership.objects.filter(pk=self.pk).update(
+            answered_count=answered,
+            total_score=F("total_score") + points,
+            progress_pct=progress_expression(answered),
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(
+            fields=["answered_count", "total_score", "progress_pct", "updated_at"]
+        )
+
+    @classmethod
+    def rescore(cls, quiz_id):
+        """Set-based recalculate() of every membership of a quiz, one UPDATE."""
+        submissions = Submission.objects.filter(membership=OuterRef("pk")).values(
+            "membership"
+        )
+        answered = Coalesce(
+            Subquery(submissions.annotate(c=models.Count("id")).values("c")), 0
+        )
+        score = Subquery(
+            submissions.filter(correct=True)
+            .annotate(p=models.Sum("question__points"))
+            .values("p")
+        )
+        cls.objects.filter(quiz_id=quiz_id).update(
+            answered_count=answered,
+            total_score=Coalesce(score, 0),
+            progress_pct=progress_expression(answered),
+            updated_at=timezone.now(),
+        )
+
+
+def progress_expression(answered):
+    """SQL for round(100 * answered / quiz.question_count, 2), capped at 100."""
+    question_count = Subquery(
+        Quiz.objects.filter(pk=OuterRef("quiz_id")).values("question_count")[:1]
+    )
+    progress = Coalesce(
+        Least(
+            answered * Value(Decimal(100)) / NullIf(question_count, 0),
+            Value(Decimal(100)),
+        ),
+        Value(Decimal(0)),
+    )
+    return Cast(progress, models.DecimalField(max_digits=5, decimal_places=2))
 
 
 class Submission(models.Model):
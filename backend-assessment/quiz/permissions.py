@@ -1,11 +1,41 @@
+from quiz.models import Membership
 from rest_framework.permissions import BasePermission
+from users.permissions import IsOwnerUser  # noqa: F401
 
 
-class IsOwnerUser(BasePermission):
+class IsParticipantUser(BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated
 
 
-class IsParticipantUser(BasePermission):
-    def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated
+class IsQuizOwner(BasePermission):
+    """
+    Object level. Reads the `is_owner` annotation QuizViewSet.get_queryset()
+    puts on the quiz, so it costs no query.
+    """
+
+    message = "Only the quiz owner can do this."
+
+    def has_object_permission(self, request, view, obj):
+        is_owner = getattr(obj, "is_owner", None)
+        if is_owner is None:
+            is_owner = obj.owner_id == request.user.id
+        return is_owner
+
+
+class IsQuizMember(BasePermission):
+    """
+    Object level: the owner or an active member. Reads the `is_owner` and
+    `membership_id` annotations when present.
+    """
+
+    message = "You are not a member of this quiz."
+
+    def has_object_permission(self, request, view, obj):
+        if IsQuizOwner().has_object_permission(request, view, obj):
+            return True
+        if hasattr(obj, "membership_id"):
+            return obj.membership_id is not None
+        return Membership.objects.filter(
+            quiz_id=obj.pk, user_id=request.user.id, active=True
+        ).exists()
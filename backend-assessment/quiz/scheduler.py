@@ -0,0 +1,100 @@
+"""
+Time-window transitions of quizzes.
+
+Publishing a quiz whose starts_at lies ahead makes it SCHEDULED: it goes
+LIVE once starts_at has passed, and a LIVE (or still SCHEDULED) quiz is
+CLOSED once its ends_at has. Drafts are never opened, and a LIVE quiz whose
+starts_at was moved ahead outside the API goes back to SCHEDULED. The submit
+path then
+only has to look at Quiz.state. Run by `manage.py run_scheduler` (once, or
+with --loop as a worker); each batch is claimed with SELECT ... FOR UPDATE
+SKIP LOCKED, so several schedulers never move the same quiz twice.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Quiz, QuizState
+from .snapshots import build_snapshot, evict_snapshot
+
+BATCH_SIZE = 500
+
+
+# both walk the (state, starts_at) / (state, ends_at) indexes in order
+def due_to_open(now):
+    return (
+        Quiz.objects.filter(state=QuizState.SCHEDULED, starts_at__lte=now)
+        .filter(Q(ends_at__isnull=True) | Q(ends_at__gt=now))
+        .order_by("starts_at")
+    )
+
+
+def due_to_reschedule(now):
+    return Quiz.objects.filter(state=QuizState.LIVE, starts_at__gt=now).order_by(
+        "starts_at"
+    )
+
+
+def due_to_close(now):
+    return Quiz.objects.filter(
+        state__in=[QuizState.SCHEDULED, QuizState.LIVE], ends_at__lte=now
+    ).order_by("ends_at")
+
+
+def open_due_quizzes(now=None, batch_size=BATCH_SIZE):
+    """Moves scheduled quizzes to LIVE and warms their snapshots."""
+    now = now or timezone.now()
+    opened = 0
+    while ids := _transition(due_to_open(now), QuizState.LIVE, now, batch_size):
+        opened += len(ids)
+        for quiz in Quiz.objects.filter(id__in=ids).prefetch_related(
+            "questions__options"
+        ):
+            build_snapshot(quiz)
+    return opened
+
+
+def close_due_quizzes(now=None, batch_size=BATCH_SIZE):
+    """Moves quizzes past their ends_at to CLOSED and evicts snapshots."""
+    now = now or timezone.now()
+    closed = 0
+    while ids := _transition(due_to_close(now), QuizState.CLOSED, now, batch_size):
+        closed += len(ids)
+        for quiz in Quiz.objects.filter(id__in=ids).only("id", "version"):
+            evict_snapshot(quiz)
+    return closed
+
+
+def reschedule_early_quizzes(now=None, batch_size=BATCH_SIZE):
+    """Moves LIVE quizzes that start in the future back to SCHEDULED."""
+    now = now or timezone.now()
+    rescheduled = 0
+    while ids := _transition(
+        due_to_reschedule(now), QuizState.SCHEDULED, now, batch_size
+    ):
+        rescheduled += len(ids)
+        for quiz in Quiz.objects.filter(id__in=ids).only("id", "version"):
+            evict_snapshot(quiz)
+    return rescheduled
+
+
+def run_scheduler(now=None, batch_size=BATCH_SIZE):
+    now = now or timezone.now()
+    return {
+        "closed": close_due_quizzes(now, batch_size),
+        "rescheduled": reschedule_early_quizzes(now, batch_size),
+        "opened": open_due_quizzes(now, batch_size),
+    }
+
+
+def _transition(due, state, now, batch_size):
+    with transaction.atomic():
+        ids = list(
+            due.select_for_update(skip_locked=True).values_list("id", flat=True)[
+                :batch_size
+            ]
+        )
+        if ids:
+            Quiz.objects.filter(id__in=ids).update(state=state, updated_at=now)
+    return ids
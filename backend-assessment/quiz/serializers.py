@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 from oper.rest_framework_utils import Serializer
 from rest_framework import serializers
 
-from .models import Membership, Option, Question, Quiz, Submission
+from .models import Membership, Option, Question, Quiz, QuizState, seeded_shuffle
+from .services import create_questions, submit_answer, submit_answers, sync_questions
 
 User = get_user_model()
 
@@ -12,28 +15,29 @@ User = get_user_model()
 
 
 class OptionWriteSerializer(Serializer, serializers.ModelSerializer):
+    id = serializers.UUIDField(required=False)
+
     class Meta:
         model = Option
         fields = ["id", "text", "correct", "position"]
-        read_only_fields = ["id", "position"]
+        read_only_fields = ["position"]
 
 
 class QuestionWriteSerializer(Serializer, serializers.ModelSerializer):
+    # writable so that nested updates can match existing rows
+    id = serializers.UUIDField(required=False)
     options = OptionWriteSerializer(many=True)
 
     class Meta:
         model = Question
         fields = ["id", "body", "position", "points", "shuffle_options", "options"]
-        read_only_fields = ["id", "position"]
+        read_only_fields = ["position"]
 
     @transaction.atomic
     def create(self, validated_data):
-        options = validated_data.pop("options", [])
-        validated_data.pop("position", None)
-        question = Question.objects.create(**validated_data)
-        for option in options:
-            option.pop("position", None)
-            Option.objects.create(question=question, **option)
+        quiz = validated_data.pop("quiz")
+        (question,) = create_questions(quiz, [validated_data])
+        quiz.refresh_totals()
         return question
 
 
@@ -54,20 +58,51 @@ class QuizWriteSerializer(Serializer, serializers.ModelSerializer):
             "owner",
             "questions",
         ]
-        read_only_fields = ["id", "owner"]
+        # state moves only through publish/close and run_scheduler
+        read_only_fields = ["id", "state", "owner"]
+
+    def validate(self, attrs):
+        """Window edits must agree with the state, which submits rely on alone."""
+        if self.instance is not None:
+            starts_at = attrs.get("starts_at", self.instance.starts_at)
+            ends_at = attrs.get("ends_at", self.instance.ends_at)
+            now = timezone.now()
+            if self.instance.state == QuizState.LIVE:
+                if starts_at and starts_at > now:
+                    raise serializers.ValidationError(
+                        {"starts_at": "A live quiz cannot start in the future."}
+                    )
+                if ends_at and ends_at <= now:
+                    raise serializers.ValidationError(
+                        {"ends_at": "A live quiz cannot end in the past; close it."}
+                    )
+            if self.instance.state == QuizState.SCHEDULED and not starts_at:
+                raise serializers.ValidationError(
+                    {"starts_at": "A scheduled quiz needs a start."}
+                )
+        return attrs
 
     @transaction.atomic
     def create(self, validated_data):
         request = self.context["request"]
         questions = validated_data.pop("questions", [])
-        quiz = Quiz.objects.create(owner=request.user, **validated_data)
-        for qd in questions:
-            options = qd.pop("options", [])
-            qd.pop("position", None)
-            question = Question.objects.create(quiz=quiz, **qd)
-            for od in options:
-                od.pop("position", None)
-                Option.objects.create(question=question, **od)
+        quiz = Quiz.objects.create(
+            owner_id=request.user.id, question_seq=len(questions), **validated_data
+        )
+        create_questions(quiz, questions, first_position=1)
+        quiz.refresh_totals()
+        # the response renders nested questions; load them in two queries
+        prefetch_related_objects([quiz], "questions__options")
+        return quiz
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        questions = validated_data.pop("questions", None)
+        quiz = super().update(instance, validated_data)
+        if questions is not None:
+            sync_questions(quiz, questions)
+            # a fresh instance: the view drops the stale prefetch of `instance`
+            quiz = Quiz.objects.prefetch_related("questions__options").get(pk=quiz.pk)
         return quiz
 
 
@@ -88,11 +123,12 @@ class QuestionReadSerializer(Serializer, serializers.ModelSerializer):
         fields = ["id", "body", "position", "points", "options"]
 
     def get_options(self, obj):
-        self.context["request"].user
-        qs = obj.options.all()
-        if obj.shuffle_options:
-            qs = qs.order_by("?")
-        return OptionReadSerializer(qs, many=True, context=self.context).data
+        # options come from the prefetch; shuffling happens in Python so it
+        # does not throw the prefetch away
+        options = obj.options.all()
+        if obj.shuffle_options and self.context.get("shuffle", True):
+            options = seeded_shuffle(options, self.context["request"].user.id, obj.id)
+        return OptionReadSerializer(options, many=True, context=self.context).data
 
 
 class QuizReadSerializer(Serializer, serializers.ModelSerializer):
@@ -136,53 +172,33 @@ class MembershipSerializer(Serializer, serializers.ModelSerializer):
 # ---- answering ----
 
 
+class ReorderSerializer(Serializer, serializers.Serializer):
+    question_ids = serializers.ListField(child=serializers.UUIDField())
+
+
 class SubmitSerializer(Serializer, serializers.Serializer):
     quiz_id = serializers.UUIDField()
     question_id = serializers.UUIDField()
     option_id = serializers.UUIDField()
 
     def create(self, validated_data):
-        user = self.context["request"].user
-        quiz = Quiz.objects.get(id=validated_data["quiz_id"])
-        membership = Membership.objects.filter(
-            quiz=quiz, user=user, active=True
-        ).first()
-        if not membership:
-            raise serializers.ValidationError(
-                {"detail": "You are not a member of this quiz."}
-            )
-
-        question = Question.objects.filter(
-            id=validated_data["question_id"], quiz=quiz
-        ).first()
-        if not question:
-            raise serializers.ValidationError(
-                {"detail": "Question not found in this quiz."}
-            )
-
-        option = Option.objects.filter(
-            id=validated_data["option_id"], question=question
-        ).first()
-        if not option:
-            raise serializers.ValidationError(
-                {"detail": "Option not found for this question."}
-            )
-
-        created = Submission.objects.create(
-            membership=membership,
-            question=question,
-            option=option,
-            correct=bool(option.correct),
+        payload, self.query_count = submit_answer(
+            self.context["request"].user, **validated_data
         )
-        membership.recalculate()
-        correct_text = (
-            question.options.filter(correct=True).values_list("text", flat=True).first()
+        return payload
+
+
+class SubmitAnswerSerializer(Serializer, serializers.Serializer):
+    question_id = serializers.UUIDField()
+    option_id = serializers.UUIDField()
+
+
+class SubmitBatchSerializer(Serializer, serializers.Serializer):
+    quiz_id = serializers.UUIDField()
+    answers = SubmitAnswerSerializer(many=True, allow_empty=False, max_length=500)
+
+    def create(self, validated_data):
+        results, self.query_count = submit_answers(
+            self.context["request"].user, **validated_data
         )
-        return {
-            "question": question.body,
-            "your_answer": option.text,
-            "correct": created.correct,
-            "correct_answer": correct_text,
-            "score_total": membership.total_score,
-            "progress_pct": float(membership.progress_pct),
-        }
+        return results
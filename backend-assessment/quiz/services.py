@@ -1,36 +1,613 @@
-from django.db.models import Sum
-from django.shortcuts import get_object_or_404
-from rest_framework.exceptions import ValidationError
+import csv
+import json
+import logging
+import uuid
+from decimal import Decimal
+from itertools import islice
 
-from .models import Membership, Quiz
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    BooleanField,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from oper.db_utils import QueryCounter
+from rest_framework.exceptions import NotFound, ValidationError
 
+from .answer_keys import aget_answer_key, get_answer_key
+from .events import publish_progress
+from .leaderboard import get_leaderboard, get_warm_leaderboard, record_membership
+from .models import (
+    Membership,
+    Option,
+    Question,
+    Quiz,
+    QuizState,
+    Submission,
+    sync_position_counters,
+)
 
-def add_members(owner, quiz_id, user_ids):
-    if not user_ids:
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+QUIZ_CLOSED = "This quiz is not open for submissions."
+QUESTION_NOT_FOUND = "Question not found in this quiz."
+OPTION_NOT_FOUND = "Option not found for this question."
+ALREADY_ANSWERED = "You have already answered this question."
+ENROLL_CHUNK_SIZE = 1000
+MAX_REPORTED_INVALID = 100
+
+
+def add_members(quiz, user_ids):
+    """
+    Enrolls users in `quiz` in chunks: one query validates the chunk's user
+    ids, one finds existing memberships and one bulk insert adds the rest.
+    user_ids may be any iterable (e.g. a generator over an uploaded roster),
+    so large rosters are never held in memory at once.
+    """
+    result = {"created": 0, "existing": 0, "invalid": 0, "invalid_ids": []}
+    received = False
+    for chunk in _chunks(user_ids, ENROLL_CHUNK_SIZE):
+        received = True
+        ids, invalid = set(), []
+        for raw in chunk:
+            try:
+                ids.add(uuid.UUID(str(raw).strip()))
+            except ValueError:
+                invalid.append(str(raw))
+        found = set(User.objects.filter(id__in=ids).values_list("id", flat=True))
+        invalid.extend(str(uid) for uid in ids - found)
+        with transaction.atomic():
+            existing = set(
+                Membership.objects.filter(quiz=quiz, user_id__in=found).values_list(
+                    "user_id", flat=True
+                )
+            )
+            # ignore_conflicts covers a concurrent enrollment of the same user
+            Membership.objects.bulk_create(
+                [Membership(quiz=quiz, user_id=uid) for uid in found - existing],
+                ignore_conflicts=True,
+            )
+        result["created"] += len(found - existing)
+        result["existing"] += len(existing)
+        result["invalid"] += len(invalid)
+        room = MAX_REPORTED_INVALID - len(result["invalid_ids"])
+        result["invalid_ids"].extend(invalid[:room])
+    if not received:
         raise ValidationError({"detail": "user_ids cannot be empty"})
-    quiz = get_object_or_404(Quiz, id=quiz_id, owner=owner)
-    memberships = []
-    for uid in user_ids:
-        memder, _ = Membership.objects.get_or_create(
-            quiz=quiz, user_id=uid, defaults={"active": True}
+    if result["created"]:
+        # new participants carry names the leaderboard does not know yet
+        get_leaderboard().drop(quiz.id)
+    return result
+
+
+def iter_roster(upload):
+    """
+    Yields user ids from an uploaded roster, line by line. NDJSON lines may
+    be bare ids or {"user_id": ...} objects; CSV takes the "user_id" column
+    when there is a header row, the first column otherwise.
+    """
+    lines = (line.decode("utf-8-sig") for line in upload)
+    name = (upload.name or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (upload.content_type or ""):
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                yield line.strip()
+                continue
+            yield item.get("user_id", "") if isinstance(item, dict) else item
+        return
+
+    column = 0
+    for i, row in enumerate(csv.reader(lines)):
+        if not row:
+            continue
+        if i == 0 and "user_id" in row:
+            column = row.index("user_id")
+            continue
+        yield row[column] if column < len(row) else ""
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def create_questions(quiz, questions_data, first_position=None):
+    """
+    Bulk-inserts nested question/option payloads: a block of positions is
+    reserved up front and assigned in list order, so this is one counter
+    UPDATE and two INSERTs whatever the quiz size. Callers that already
+    reserved the block (a new quiz) pass first_position instead.
+    """
+    if not questions_data:
+        return []
+    if first_position is None:
+        first_position = Quiz.allocate_positions(quiz.id, len(questions_data))
+    questions, options = [], []
+    for position, data in enumerate(questions_data, start=first_position):
+        question = Question(quiz=quiz, position=position, **_question_fields(data))
+        question_options = _build_options(question, data.get("options", []))
+        question.option_seq = len(question_options)
+        questions.append(question)
+        options.extend(question_options)
+    Question.objects.bulk_create(questions)
+    Option.objects.bulk_create(options)
+    return questions
+
+
+def sync_questions(quiz, questions_data):
+    """
+    Replaces the quiz's questions with questions_data. Items carrying the id
+    of an existing question (or option) are updated in place, so answers to
+    them survive; items without an id are created; anything not listed is
+    deleted. The payload's list order becomes the new question order.
+    """
+    existing = {q.id: q for q in quiz.questions.prefetch_related("options")}
+    old_points = {q.id: q.points for q in existing.values()}
+    unknown = {d["id"] for d in questions_data if d.get("id")} - existing.keys()
+    if unknown:
+        raise ValidationError(
+            {
+                "questions": [
+                    f"Question {qid} does not belong to this quiz." for qid in unknown
+                ]
+            }
         )
-        memberships.append(memder)
-    return memberships
 
+    kept_ids = {d["id"] for d in questions_data if d.get("id")}
+    Question.objects.filter(quiz=quiz).exclude(id__in=kept_ids).delete()
+
+    # fresh positions from the counter lie above every current one, so the
+    # single bulk UPDATE can never collide with uq_question_position_per_quiz
+    first = Quiz.allocate_positions(quiz.id, len(questions_data))
+    updated, created, stale_options = [], [], []
+    new_options, updated_options, regraded = [], [], set()
+    for position, data in enumerate(questions_data, start=first):
+        question = existing.get(data.get("id"))
+        if question is None:
+            question = Question(quiz=quiz, position=position, **_question_fields(data))
+            created.append(question)
+            new_options.extend(_build_options(question, data.get("options", [])))
+            continue
+        for field, value in _question_fields(data).items():
+            setattr(question, field, value)
+        question.position = position
+        updated.append(question)
 
-def dashboard(owner, quiz_id):
-    quiz = get_object_or_404(Quiz, id=quiz_id, owner=owner)
-    data = (
-        quiz.memberships.select_related("user")
-        .values("user__first_name", "user__last_name")
-        .annotate(progress=Sum("progress_pct"), score=Sum("total_score"))
-        .order_by("-score")
+        current = {o.id: o for o in question.options.all()}
+        listed = set()
+        for option_position, option_data in enumerate(data.get("options", []), 1):
+            option = current.get(option_data.get("id"))
+            if option is None:
+                new_options.extend(
+                    _build_options(question, [option_data], option_position)
+                )
+                continue
+            listed.add(option.id)
+            correct = option_data.get("correct", False)
+            if option.correct != correct:
+                regraded.add(question.id)
+            option.text = option_data["text"]
+            option.correct = correct
+            option.position = option_position
+            updated_options.append(option)
+        stale_options.extend(current.keys() - listed)
+
+    Option.objects.filter(id__in=stale_options).delete()
+    Question.objects.bulk_update(
+        updated, ["body", "points", "shuffle_options", "position"]
     )
+    Question.objects.bulk_create(created)
+    Option.objects.bulk_update(updated_options, ["text", "correct", "position"])
+    Option.objects.bulk_create(new_options)
+    sync_position_counters([quiz.id])
+    if regraded:
+        # the answer key changed: grade the stored answers against it again
+        Submission.objects.filter(question_id__in=regraded).update(
+            correct=Subquery(
+                Option.objects.filter(pk=OuterRef("option_id")).values("correct")[:1]
+            )
+        )
+
+    quiz.refresh_totals()
+    if (
+        existing.keys() != kept_ids
+        or created
+        or stale_options
+        or regraded
+        or any(old_points[q.id] != q.points for q in updated)
+    ):
+        # answers may have been deleted, re-graded or re-weighted; scores follow
+        Membership.rescore(quiz.id)
+        get_leaderboard().drop(quiz.id)
+
+
+def reorder_questions(quiz, question_ids):
+    """
+    Moves the quiz's questions into the order of question_ids, which must list
+    every question exactly once. The questions take a fresh block of
+    positions, so the reorder is one counter UPDATE and one bulk UPDATE.
+    """
+    existing = set(quiz.questions.values_list("id", flat=True))
+    if len(question_ids) != len(set(question_ids)) or set(question_ids) != existing:
+        raise ValidationError(
+            {"question_ids": ["Must list every question of the quiz exactly once."]}
+        )
+    if not question_ids:
+        return
+    first = Quiz.allocate_positions(quiz.id, len(question_ids))
+    Question.objects.bulk_update(
+        [
+            Question(id=question_id, position=position)
+            for position, question_id in enumerate(question_ids, start=first)
+        ],
+        ["position"],
+    )
+    Quiz.bump_version(pk=quiz.pk)
+
+
+def _question_fields(data):
+    return {
+        key: value
+        for key, value in data.items()
+        if key not in ("id", "options", "position")
+    }
+
+
+def _build_options(question, options_data, first_position=1):
+    return [
+        Option(
+            question=question,
+            position=position,
+            **{k: v for k, v in data.items() if k not in ("id", "position")},
+        )
+        for position, data in enumerate(options_data, start=first_position)
+    ]
+
+
+def visible_quizzes(user_id):
+    """Quizzes the user owns or is an active member of."""
+    # EXISTS instead of an OR-join over memberships: no duplicate rows, so
+    # no DISTINCT over whole quiz rows, and the page can be cut off early
+    is_member = Membership.objects.filter(
+        quiz=OuterRef("pk"), user_id=user_id, active=True
+    )
+    return Quiz.objects.filter(Q(owner_id=user_id) | Q(Exists(is_member)))
+
+
+def with_access(quizzes, user_id):
+    """Annotates is_owner and the user's active membership_id (or None)."""
+    membership = Membership.objects.filter(
+        quiz=OuterRef("pk"), user_id=user_id, active=True
+    )
+    return quizzes.annotate(
+        is_owner=ExpressionWrapper(Q(owner_id=user_id), BooleanField()),
+        membership_id=Subquery(membership.values("id")[:1]),
+    )
+
+
+def page_params(params):
+    """(offset, limit) of the dashboard from query params."""
+    try:
+        offset = int(params.get("offset", 0))
+        limit = params.get("limit")
+        limit = int(limit) if limit is not None else None
+    except ValueError:
+        raise ValidationError({"detail": "offset and limit must be integers"})
+    if offset < 0 or (limit is not None and limit < 1):
+        raise ValidationError({"detail": "offset and limit must be positive"})
+    return offset, limit
+
+
+def dashboard(quiz, offset=0, limit=None):
+    """Owner dashboard, served from the materialized leaderboard."""
+    board = get_warm_leaderboard(quiz.id)
     return [
         {
-            "participant": f"{row['user__first_name']} {row['user__last_name']}".strip(),
-            "progress": float(row["progress"]),
-            "total_score": row["score"],
+            "participant": row["participant"],
+            "progress": row["progress"],
+            "total_score": row["total_score"],
+            "rank": row["rank"],
         }
-        for row in data
+        for row in board.page(quiz.id, offset, limit)
     ]
+
+
+def live_dashboard(quiz_id):
+    """All dashboard rows with their member ids, the first frame of the stream."""
+    return get_warm_leaderboard(quiz_id).page(quiz_id)
+
+
+def ranked(quiz_id, rows):
+    """Adds the current leaderboard rank to progress events."""
+    board = get_leaderboard()
+    return [{**row, "rank": board.rank(quiz_id, row["member"])} for row in rows]
+
+
+def participant_progress(quiz, membership):
+    return {
+        "progress_pct": float(membership.progress_pct),
+        "total_score": membership.total_score,
+        "rank": get_warm_leaderboard(quiz.id).rank(quiz.id, membership.user_id),
+    }
+
+
+def submit_answer(user, quiz_id, question_id, option_id):
+    """
+    Grades and stores one answer. Quiz state, version and the active
+    membership are read in a single query; the answer is graded from the
+    cached answer key, and the submission and the score delta are written in
+    one transaction.
+    Returns the response payload and the number of queries that were run.
+    """
+    with QueryCounter() as counter:
+        quiz = _submit_lookup(user.id, quiz_id).first()
+        _check_submit(user, quiz_id, quiz)
+        key = get_answer_key(quiz_id, quiz["version"])
+        grade = _grade(key, question_id, option_id)
+        payload = _store_answer(user.id, quiz, question_id, option_id, grade)
+
+    logger.debug("submit_answer ran %d queries", counter.count)
+    return payload, counter.count
+
+
+async def asubmit_answer(user, quiz_id, question_id, option_id):
+    """
+    submit_answer() for async views. The lookup runs on the async ORM; the
+    write runs in a worker thread, since the ORM has no async transactions.
+    """
+    quiz = await _submit_lookup(user.id, quiz_id).afirst()
+    if quiz is None or quiz["membership_id"] is None or not quiz["open"]:
+        await sync_to_async(_check_submit)(user, quiz_id, quiz)
+    key = await aget_answer_key(quiz_id, quiz["version"])
+    grade = _grade(key, question_id, option_id)
+    return await sync_to_async(_store_answer)(
+        user.id, quiz, question_id, option_id, grade
+    )
+
+
+def _submit_lookup(user_id, quiz_id):
+    return (
+        Quiz.objects.filter(pk=quiz_id)
+        .annotate(
+            membership_id=Subquery(
+                Membership.objects.filter(
+                    quiz_id=OuterRef("pk"), user_id=user_id, active=True
+                ).values("id")[:1]
+            ),
+            # the time window is enforced by moving state, see quiz/scheduler.py
+            open=ExpressionWrapper(Q(state=QuizState.LIVE), BooleanField()),
+        )
+        .values("id", "version", "membership_id", "open")
+    )
+
+
+def _check_submit(user, quiz_id, quiz):
+    if quiz is None or quiz["membership_id"] is None:
+        _raise_submit_error(user, quiz_id)
+    if not quiz["open"]:
+        raise ValidationError({"detail": QUIZ_CLOSED})
+
+
+def _grade(key, question_id, option_id):
+    grade = key.grade(question_id, option_id)
+    if grade is None:
+        detail = OPTION_NOT_FOUND if question_id in key else QUESTION_NOT_FOUND
+        raise ValidationError({"detail": detail})
+    return grade
+
+
+def _store_answer(user_id, quiz, question_id, option_id, grade):
+    membership = Membership(
+        id=quiz["membership_id"], quiz_id=quiz["id"], user_id=user_id
+    )
+    # only the key's points are needed for the score delta
+    question = Question(id=question_id, quiz_id=quiz["id"], points=grade.points)
+    try:
+        with transaction.atomic():
+            submission = Submission.objects.create(
+                membership=membership,
+                question=question,
+                option_id=option_id,
+                correct=grade.correct,
+            )
+            membership.apply_submission(submission)
+            record_membership(membership)
+            publish_progress(membership)
+    except IntegrityError:
+        raise ValidationError({"detail": ALREADY_ANSWERED})
+    return _answer_payload(grade, membership)
+
+
+def _answer_payload(grade, membership):
+    return {
+        "question": grade.question,
+        "your_answer": grade.answer,
+        "correct": grade.correct,
+        "correct_answer": grade.correct_answer,
+        "score_total": membership.total_score,
+        "progress_pct": float(membership.progress_pct),
+    }
+
+
+def submit_answers(user, quiz_id, answers):
+    """
+    Grades and stores a batch of (question_id, option_id) answers with a fixed
+    number of set-based queries and recomputes the score once at the end.
+    Returns one result per answer, in input order: the submit_answer() payload
+    for stored answers, {"question_id", "detail"} for rejected ones.
+    """
+    with QueryCounter() as counter:
+        membership = (
+            Membership.objects.filter(quiz_id=quiz_id, user_id=user.id, active=True)
+            .select_related("quiz")
+            .first()
+        )
+        if membership is None:
+            _raise_submit_error(user, quiz_id)
+        if membership.quiz.state != QuizState.LIVE:
+            raise ValidationError({"detail": QUIZ_CLOSED})
+
+        key = get_answer_key(quiz_id, membership.quiz.version)
+        answered = set(
+            Submission.objects.filter(
+                membership=membership,
+                question_id__in=[
+                    a["question_id"] for a in answers if a["question_id"] in key
+                ],
+            ).values_list("question_id", flat=True)
+        )
+
+        results = []
+        pending = []
+        for answer in answers:
+            question_id = answer["question_id"]
+            grade = key.grade(question_id, answer["option_id"])
+            if grade is None:
+                detail = OPTION_NOT_FOUND if question_id in key else QUESTION_NOT_FOUND
+            elif question_id in answered:
+                detail = ALREADY_ANSWERED
+            else:
+                detail = None
+            if detail:
+                results.append({"question_id": question_id, "detail": detail})
+                continue
+            answered.add(question_id)
+            submission = Submission(
+                membership=membership,
+                question_id=question_id,
+                option_id=answer["option_id"],
+                correct=grade.correct,
+            )
+            pending.append(submission)
+            results.append((grade, submission))
+
+        stored = set()
+        if pending:
+            with transaction.atomic():
+                # a concurrent submit may win the (membership, question) race;
+                # its row is kept and ours is reported as already answered
+                Submission.objects.bulk_create(pending, ignore_conflicts=True)
+                stored = set(
+                    Submission.objects.filter(
+                        pk__in=[submission.pk for submission in pending]
+                    ).values_list("pk", flat=True)
+                )
+                membership.recalculate()
+                record_membership(membership)
+                publish_progress(membership)
+
+    logger.debug("submit_answers ran %d queries", counter.count)
+    return [_batch_result(item, membership, stored) for item in results], counter.count
+
+
+def _batch_result(item, membership, stored):
+    if isinstance(item, dict):
+        return item
+    grade, submission = item
+    if submission.pk not in stored:
+        return {"question_id": submission.question_id, "detail": ALREADY_ANSWERED}
+    return _answer_payload(grade, membership)
+
+
+def _raise_submit_error(user, quiz_id):
+    # cold path: no active membership was found, tell a missing quiz apart
+    if not Quiz.objects.filter(id=quiz_id).exists():
+        raise NotFound("Quiz not found.")
+    raise ValidationError({"detail": "You are not a member of this quiz."})
+
+
+def reconcile_scores(quiz_ids=None, fix=False):
+    """
+    Recomputes quiz totals and membership scores from scratch and reports
+    every row where the incrementally maintained counters drifted.
+    With fix=True the drifted rows are overwritten with the recomputed values.
+    """
+    quizzes = Quiz.objects.annotate(
+        real_count=Count("questions"), real_points=Sum("questions__points")
+    )
+    memberships = Membership.objects.annotate(
+        real_answered=Count("submissions"),
+        real_score=Sum(
+            "submissions__question__points", filter=Q(submissions__correct=True)
+        ),
+    )
+    if quiz_ids:
+        quizzes = quizzes.filter(id__in=quiz_ids)
+        memberships = memberships.filter(quiz_id__in=quiz_ids)
+
+    drift = {"quizzes": [], "memberships": []}
+    question_counts = {}
+    stale_quizzes = []
+    for quiz in quizzes:
+        real_points = quiz.real_points or 0
+        question_counts[quiz.id] = quiz.real_count
+        if (quiz.question_count, quiz.points_total) != (quiz.real_count, real_points):
+            drift["quizzes"].append(
+                {
+                    "quiz": str(quiz.id),
+                    "question_count": [quiz.question_count, quiz.real_count],
+                    "points_total": [quiz.points_total, real_points],
+                }
+            )
+            quiz.question_count = quiz.real_count
+            quiz.points_total = real_points
+            stale_quizzes.append(quiz)
+
+    stale_memberships = []
+    for membership in memberships.iterator():
+        total = question_counts.get(membership.quiz_id, 0)
+        real_score = membership.real_score or 0
+        real_progress = (
+            round(Decimal(100) * membership.real_answered / total, 2)
+            if total
+            else Decimal(0)
+        )
+        expected = (membership.real_answered, real_score, min(real_progress, 100))
+        actual = (
+            membership.answered_count,
+            membership.total_score,
+            membership.progress_pct,
+        )
+        if actual != expected:
+            drift["memberships"].append(
+                {
+                    "membership": str(membership.id),
+                    "answered_count": [actual[0], expected[0]],
+                    "total_score": [actual[1], expected[1]],
+                    "progress_pct": [float(actual[2]), float(expected[2])],
+                }
+            )
+            (
+                membership.answered_count,
+                membership.total_score,
+                membership.progress_pct,
+            ) = expected
+            stale_memberships.append(membership)
+
+    if fix:
+        with transaction.atomic():
+            Quiz.objects.bulk_update(
+                stale_quizzes, ["question_count", "points_total"], batch_size=500
+            )
+            Membership.objects.bulk_update(
+                stale_memberships,
+                ["answered_count", "total_score", "progress_pct"],
+                batch_size=500,
+            )
+        for quiz_id in {m.quiz_id for m in stale_memberships}:
+            get_leaderboard().drop(quiz_id)
+    return drift
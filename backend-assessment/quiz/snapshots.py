@@ -0,0 +1,59 @@
+"""
+Published quiz snapshots.
+
+A LIVE quiz is serialized once (on publish, or on the first read after an
+edit) and cached as ready-to-send JSON bytes keyed by Quiz.version, so
+retrieving it does not re-run the nested serializers or their queries.
+Per-user option shuffling is applied in Python from a deterministic seed.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from oper.renderers import dumps, loads
+
+from .models import Quiz, seeded_shuffle
+from .serializers import QuizReadSerializer
+
+
+def snapshot_key(quiz_id, version):
+    return f"quiz:{quiz_id}:snapshot:v{version}"
+
+
+def build_snapshot(quiz):
+    """Serializes quiz (questions/options prefetched) and caches the bytes."""
+    data = QuizReadSerializer(quiz, context={"shuffle": False}).data
+    shuffled = [str(q.id) for q in quiz.questions.all() if q.shuffle_options]
+    snapshot = (dumps(data), shuffled)
+    cache.set(
+        snapshot_key(quiz.id, quiz.version),
+        snapshot,
+        getattr(settings, "QUIZ_SNAPSHOT_TTL", 60 * 60 * 24),
+    )
+    return snapshot
+
+
+def get_snapshot(quiz_id, version):
+    snapshot = cache.get(snapshot_key(quiz_id, version))
+    if snapshot is None:
+        quiz = Quiz.objects.prefetch_related("questions__options").get(pk=quiz_id)
+        snapshot = build_snapshot(quiz)
+    return snapshot
+
+
+def evict_snapshot(quiz):
+    cache.delete(snapshot_key(quiz.id, quiz.version))
+
+
+def render_snapshot(snapshot, user_id):
+    """Returns the response body for one user."""
+    body, shuffled = snapshot
+    if not shuffled:
+        return body
+    shuffled = set(shuffled)
+    data = loads(body)
+    for question in data["questions"]:
+        if question["id"] in shuffled:
+            question["options"] = seeded_shuffle(
+                question["options"], user_id, question["id"]
+            )
+    return dumps(data)
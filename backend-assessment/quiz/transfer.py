@@ -0,0 +1,208 @@
+"""
+Quiz import/export as NDJSON.
+
+One record per line, parents before children, with short keys:
+
+    {"t": "quiz", "id": ..., "title": ..., "description": ..., "state": ...,
+     "randomized": ..., "starts_at": ..., "ends_at": ...}
+    {"t": "question", "id": ..., "quiz": ..., "body": ..., "position": ...,
+     "points": ..., "shuffle": ...}
+    {"t": "option", "id": ..., "question": ..., "text": ..., "correct": ...,
+     "position": ...}
+
+Both directions work on generators and batches of about a fixed size, so
+memory stays flat however large the question bank is. IDs and positions
+round-trip; state is exported for reference only, since it moves through
+publish/close and run_scheduler: imported quizzes are created as DRAFT and
+existing ones keep their state.
+"""
+
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Option, Question, Quiz, sync_position_counters
+
+EXPORT_CHUNK_SIZE = 500
+IMPORT_BATCH_SIZE = 1000
+
+QUIZ_FIELDS = {
+    "title": "title",
+    "description": "description",
+    "randomized": "randomized",
+    "starts_at": "starts_at",
+    "ends_at": "ends_at",
+}
+QUESTION_FIELDS = {
+    "quiz": "quiz_id",
+    "body": "body",
+    "position": "position",
+    "points": "points",
+    "shuffle": "shuffle_options",
+}
+OPTION_FIELDS = {
+    "question": "question_id",
+    "text": "text",
+    "correct": "correct",
+    "position": "position",
+}
+
+
+def _line(record):
+    return json.dumps(record, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
+
+
+def export_quizzes(quizzes):
+    """Yields NDJSON lines for every quiz in the queryset."""
+    for quiz in quizzes.order_by("created_at", "id").iterator():
+        record = {"t": "quiz", "id": quiz.id, "state": quiz.state}
+        record.update({key: getattr(quiz, attr) for key, attr in QUIZ_FIELDS.items()})
+        yield _line(record)
+
+        questions = Question.objects.filter(quiz=quiz).order_by("position")
+        chunk = []
+        for question in questions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            chunk.append(question)
+            if len(chunk) == EXPORT_CHUNK_SIZE:
+                yield from _export_questions(chunk)
+                chunk = []
+        yield from _export_questions(chunk)
+
+
+def _export_questions(questions):
+    for question in questions:
+        record = {"t": "question", "id": question.id}
+        record.update(
+            {key: getattr(question, attr) for key, attr in QUESTION_FIELDS.items()}
+        )
+        yield _line(record)
+    options = Option.objects.filter(question__in=questions).order_by(
+        "question_id", "position"
+    )
+    for option in options.iterator():
+        record = {"t": "option", "id": option.id}
+        record.update(
+            {key: getattr(option, attr) for key, attr in OPTION_FIELDS.items()}
+        )
+        yield _line(record)
+
+
+def import_quizzes(lines, owner, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Upserts quizzes, questions and options read from NDJSON lines (str or
+    bytes) for `owner`, one transaction per batch. A batch closes at the
+    first quiz record after `batch_size` records, so every quiz commits
+    whole with its questions and options; when a line is invalid or a batch
+    fails, the quizzes of earlier batches stay imported. Records that would
+    touch another owner's rows are rejected with a ValidationError.
+    """
+    counts = {"quizzes": 0, "questions": 0, "options": 0}
+    batch = {"quiz": [], "question": [], "option": []}
+    pending = last = 0
+    for number, raw in enumerate(lines, start=1):
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+            kind = record.pop("t")
+            row = _build(kind, record, owner)
+        except (ValueError, KeyError, TypeError, DjangoValidationError) as exc:
+            raise ValidationError({"detail": f"Line {number}: invalid record ({exc})."})
+        if kind == "quiz" and pending >= batch_size:
+            _flush(batch, owner, counts, last)
+            pending = 0
+        batch[kind].append(row)
+        pending += 1
+        last = number
+    _flush(batch, owner, counts, "end")
+    return counts
+
+
+def _build(kind, record, owner):
+    if kind == "quiz":
+        model, fields, extra = Quiz, QUIZ_FIELDS, {"owner_id": owner.id}
+    elif kind == "question":
+        model, fields, extra = Question, QUESTION_FIELDS, {}
+    elif kind == "option":
+        model, fields, extra = Option, OPTION_FIELDS, {}
+    else:
+        raise KeyError(kind)
+    values = {"id": model._meta.pk.to_python(record["id"]), **extra}
+    for key, attr in fields.items():
+        field = model._meta.get_field(attr.removesuffix("_id"))
+        if key in record:
+            values[attr] = field.to_python(record[key])
+    return model(**values)
+
+
+def _flush(batch, owner, counts, line):
+    touched = {q.id for q in batch["quiz"]} | {q.quiz_id for q in batch["question"]}
+    try:
+        with transaction.atomic():
+            _write_batch(batch, owner)
+            # the cached totals commit with the rows they describe
+            sync_position_counters(touched)
+            for quiz in Quiz.objects.filter(id__in=touched):
+                quiz.refresh_totals()
+    except IntegrityError as exc:
+        raise ValidationError(
+            {"detail": f"Batch ending at line {line} could not be stored ({exc})."}
+        )
+    counts["quizzes"] += len(batch["quiz"])
+    counts["questions"] += len(batch["question"])
+    counts["options"] += len(batch["option"])
+    for rows in batch.values():
+        rows.clear()
+
+
+def _write_batch(batch, owner):
+    quizzes, questions, options = batch["quiz"], batch["question"], batch["option"]
+    _check_ownership(quizzes, questions, options, owner)
+    if quizzes:
+        Quiz.objects.bulk_create(
+            quizzes,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["owner", "updated_at", *QUIZ_FIELDS.values()],
+        )
+    if questions:
+        Question.objects.bulk_create(
+            questions,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=list(QUESTION_FIELDS.values()),
+        )
+    if options:
+        Option.objects.bulk_create(
+            options,
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=list(OPTION_FIELDS.values()),
+        )
+
+
+def _check_ownership(quizzes, questions, options, owner):
+    foreign = (
+        Quiz.objects.filter(
+            id__in={q.id for q in quizzes} | {q.quiz_id for q in questions}
+        )
+        .exclude(owner_id=owner.id)
+        .exists()
+        or Question.objects.filter(
+            id__in={q.id for q in questions} | {o.question_id for o in options}
+        )
+        .exclude(quiz__owner_id=owner.id)
+        .exists()
+        or Option.objects.filter(id__in={o.id for o in options})
+        .exclude(question__quiz__owner_id=owner.id)
+        .exists()
+    )
+    if foreign:
+        raise ValidationError(
+            {"detail": "The import references quizzes owned by another user."}
+        )
@@ -1,17 +1,37 @@
+import uuid
+
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from oper.db_routers import ReplicaReadMixin
+from oper.pagination import KeysetPagination
 from oper.rest_framework_utils import APIResponse
+from quiz.answer_keys import load_answer_key
 from quiz.models import Membership, Quiz, QuizState
-from quiz.permissions import IsOwnerUser, IsParticipantUser
+from quiz.permissions import IsOwnerUser, IsParticipantUser, IsQuizMember, IsQuizOwner
 from quiz.serializers import (
-    MembershipSerializer,
     QuizReadSerializer,
     QuizWriteSerializer,
+    ReorderSerializer,
+    SubmitBatchSerializer,
     SubmitSerializer,
 )
-from quiz.services import add_members, dashboard
+from quiz.services import (
+    add_members,
+    dashboard,
+    iter_roster,
+    page_params,
+    participant_progress,
+    reorder_questions,
+    visible_quizzes,
+    with_access,
+)
+from quiz.snapshots import build_snapshot, evict_snapshot, get_snapshot, render_snapshot
+from quiz.transfer import export_quizzes, import_quizzes
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 
 
@@ -23,14 +43,16 @@ from rest_framework.permissions import IsAuthenticated
     partial_update=extend_schema(tags=["quiz"], summary="Patch quiz"),
     destroy=extend_schema(tags=["quiz"], summary="Delete quiz"),
 )
-class QuizViewSet(viewsets.ModelViewSet):
+class QuizViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Quiz.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    replica_actions = {"list", "retrieve", "progress"}
 
     def get_permissions(self):
         owner_crud = {"create", "update", "partial_update", "destroy"}
         if self.action in owner_crud:
-            return [IsAuthenticated(), IsOwnerUser()]
+            return [IsAuthenticated(), IsOwnerUser(), IsQuizOwner()]
         return super().get_permissions()
 
     def get_serializer_class(self):
@@ -41,10 +63,33 @@ class QuizViewSet(viewsets.ModelViewSet):
         )
 
     def get_queryset(self):
-        u = self.request.user
-        owned = Quiz.objects.filter(owner=u)
-        member = Quiz.objects.filter(memberships__user=u, memberships__active=True)
-        return (owned | member).distinct().prefetch_related("questions__options")
+        quizzes = self._visible_quizzes()
+        if self.action in {"list", "retrieve"}:
+            # only these render nested questions; owner/member actions must not
+            # pay for loading the whole question bank
+            return quizzes.prefetch_related("questions__options")
+        # everything the object permissions need, in the get_object() query
+        return with_access(quizzes, self.request.user.id)
+
+    def _visible_quizzes(self):
+        return visible_quizzes(self.request.user.id)
+
+    def retrieve(self, request, *args, **kwargs):
+        quiz = (
+            self._visible_quizzes()
+            .filter(pk=kwargs["pk"])
+            .values("id", "state", "version")
+            .first()
+        )
+        if quiz is None:
+            raise NotFound()
+        if quiz["state"] != QuizState.LIVE:
+            return super().retrieve(request, *args, **kwargs)
+        snapshot = get_snapshot(quiz["id"], quiz["version"])
+        return HttpResponse(
+            render_snapshot(snapshot, request.user.id),
+            content_type="application/json",
+        )
 
     def perform_create(self, serializer):
         serializer.save()
@@ -54,18 +99,29 @@ class QuizViewSet(viewsets.ModelViewSet):
         methods=["post"],
         detail=True,
         url_path="publish",
-        permission_classes=[IsAuthenticated, IsOwnerUser],
+        permission_classes=[IsAuthenticated, IsOwnerUser, IsQuizOwner],
     )
     def publish(self, request, pk=None):
         quiz = self.get_object()
-        if quiz.owner != request.user:
+        now = timezone.now()
+        if quiz.ends_at and quiz.ends_at <= now:
+            raise ValidationError({"ends_at": "The quiz has already ended."})
+        if quiz.starts_at and quiz.starts_at > now:
+            # run_scheduler opens it at starts_at
+            quiz.state = QuizState.SCHEDULED
+            quiz.save(update_fields=["state"])
             return APIResponse(
-                data={"detail": "Not allowed"}, status=status.HTTP_403_FORBIDDEN
+                data={"state": quiz.state, "starts_at": quiz.starts_at},
+                status=status.HTTP_200_OK,
             )
         quiz.state = QuizState.LIVE
         if not quiz.starts_at:
-            quiz.starts_at = timezone.now()
+            quiz.starts_at = now
         quiz.save(update_fields=["state", "starts_at"])
+        build_snapshot(
+            Quiz.objects.prefetch_related("questions__options").get(pk=quiz.pk)
+        )
+        load_answer_key(quiz.pk)
         return APIResponse(data={"state": quiz.state}, status=status.HTTP_200_OK)
 
     @extend_schema(tags=["quiz"], summary="Close quiz")
@@ -73,60 +129,83 @@ class QuizViewSet(viewsets.ModelViewSet):
         methods=["post"],
         detail=True,
         url_path="close",
-        permission_classes=[IsAuthenticated, IsOwnerUser],
+        permission_classes=[IsAuthenticated, IsOwnerUser, IsQuizOwner],
     )
     def close(self, request, pk=None):
         quiz = self.get_object()
-        if quiz.owner != request.user:
-            return APIResponse(
-                data={"detail": "Not allowed"}, status=status.HTTP_403_FORBIDDEN
-            )
         quiz.state = QuizState.CLOSED
         quiz.save(update_fields=["state"])
+        evict_snapshot(quiz)
         return APIResponse(data={"state": quiz.state}, status=status.HTTP_200_OK)
 
-    @extend_schema(tags=["quiz"], summary="Add members")
+    @extend_schema(
+        tags=["quiz"],
+        summary="Add members",
+        description='JSON body {"user_ids": [...]} or a multipart `file` '
+        "roster (CSV with a user_id column, or NDJSON).",
+    )
     @action(
         methods=["post"],
         detail=True,
         url_path="members",
-        permission_classes=[IsAuthenticated, IsOwnerUser],
+        permission_classes=[IsAuthenticated, IsOwnerUser, IsQuizOwner],
     )
     def members(self, request, pk=None):
         quiz = self.get_object()
-        if quiz.owner != request.user:
-            return APIResponse(
-                data={"detail": "Not allowed"}, status=status.HTTP_403_FORBIDDEN
-            )
-        user_ids = request.data.get("user_ids") or []
-        memberships = add_members(request.user, pk, user_ids)
-        data = MembershipSerializer(memberships, many=True).data
-        return APIResponse(data=data, status=status.HTTP_201_CREATED)
+        roster = request.FILES.get("file")
+        if roster is not None:
+            user_ids = iter_roster(roster)
+        else:
+            user_ids = request.data.get("user_ids") or []
+        result = add_members(quiz, user_ids)
+        return APIResponse(data=result, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        tags=["quiz"],
+        summary="Reorder questions",
+        description='{"question_ids": [...]} listing every question of the quiz '
+        "once, in the new order.",
+        request=ReorderSerializer,
+    )
+    @action(
+        methods=["post"],
+        detail=True,
+        url_path="reorder",
+        permission_classes=[IsAuthenticated, IsOwnerUser, IsQuizOwner],
+    )
+    def reorder(self, request, pk=None):
+        quiz = self.get_object()
+        serializer = ReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            reorder_questions(quiz, serializer.validated_data["question_ids"])
+        order = quiz.questions.order_by("position").values("id", "position")
+        return APIResponse(data=list(order), status=status.HTTP_200_OK)
 
-    @extend_schema(tags=["quiz"], summary="Get progress/dashboard")
+    @extend_schema(
+        tags=["quiz"],
+        summary="Get progress/dashboard",
+        parameters=[
+            OpenApiParameter("offset", int, description="Dashboard offset"),
+            OpenApiParameter("limit", int, description="Dashboard page size"),
+        ],
+    )
     @action(
         methods=["get"],
         detail=True,
         url_path="progress",
-        permission_classes=[IsAuthenticated, IsParticipantUser],
+        permission_classes=[IsAuthenticated, IsParticipantUser, IsQuizMember],
     )
     def progress(self, request, pk=None):
         quiz = self.get_object()
-        if quiz.owner == request.user:
+        if quiz.is_owner:
+            offset, limit = page_params(request.query_params)
             return APIResponse(
-                data=dashboard(request.user, pk), status=status.HTTP_200_OK
-            )
-        membership = Membership.objects.filter(quiz=quiz, user=request.user).first()
-        if not membership:
-            return APIResponse(
-                data={"detail": "Not a member"}, status=status.HTTP_404_NOT_FOUND
+                data=dashboard(quiz, offset, limit), status=status.HTTP_200_OK
             )
+        membership = Membership.objects.get(pk=quiz.membership_id)
         return APIResponse(
-            data={
-                "progress_pct": float(membership.progress_pct),
-                "total_score": membership.total_score,
-            },
-            status=status.HTTP_200_OK,
+            data=participant_progress(quiz, membership), status=status.HTTP_200_OK
         )
 
     @extend_schema(tags=["quiz"], summary="Submit answer")
@@ -140,4 +219,71 @@ class QuizViewSet(viewsets.ModelViewSet):
         serializer = SubmitSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
         payload = serializer.save()
-        return APIResponse(data=payload, status=status.HTTP_201_CREATED)
+        response = APIResponse(data=payload, status=status.HTTP_201_CREATED)
+        response["X-Query-Count"] = serializer.query_count
+        return response
+
+    @extend_schema(
+        tags=["quiz"], summary="Submit answers in bulk", request=SubmitBatchSerializer
+    )
+    @action(
+        methods=["post"],
+        detail=True,
+        url_path="submit-batch",
+        permission_classes=[IsAuthenticated, IsParticipantUser],
+    )
+    def submit_batch(self, request, pk=None):
+        serializer = SubmitBatchSerializer(
+            data=request.data, context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        response = APIResponse(data=results, status=status.HTTP_201_CREATED)
+        response["X-Query-Count"] = serializer.query_count
+        return response
+
+    @extend_schema(
+        tags=["quiz"],
+        summary="Export quizzes as NDJSON",
+        parameters=[OpenApiParameter("id", str, many=True, description="Quiz id")],
+        responses={(200, "application/x-ndjson"): str},
+    )
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAuthenticated, IsOwnerUser],
+    )
+    def export(self, request):
+        quizzes = Quiz.objects.filter(owner_id=request.user.id)
+        try:
+            ids = [uuid.UUID(value) for value in request.query_params.getlist("id")]
+        except ValueError:
+            raise ValidationError({"detail": "id must be a quiz id"})
+        if ids:
+            quizzes = quizzes.filter(id__in=ids)
+        response = StreamingHttpResponse(
+            export_quizzes(quizzes), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = 'attachment; filename="quizzes.ndjson"'
+        return response
+
+    @extend_schema(
+        tags=["quiz"],
+        summary="Import quizzes from NDJSON",
+        description="Multipart upload of a quiz_export NDJSON `file`. Records "
+        "are upserted by id for the current user, in batched transactions.",
+    )
+    @action(
+        methods=["post"],
+        detail=False,
+        url_path="import",
+        url_name="import",
+        permission_classes=[IsAuthenticated, IsOwnerUser],
+    )
+    def import_(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"detail": "file is required"})
+        counts = import_quizzes(upload, request.user)
+        return APIResponse(data=counts, status=status.HTTP_201_CREATED)
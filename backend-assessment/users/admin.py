@@ -14,3 +14,9 @@ class UserAdmin(admin.ModelAdmin):
         "is_superuser",
     )
     search_fields = ["email", "first_name", "last_name"]
+    actions = ["revoke_tokens"]
+
+    @admin.action(description="Revoke issued tokens")
+    def revoke_tokens(self, request, queryset):
+        for user in queryset:
+            user.revoke_tokens()
@@ -0,0 +1,162 @@
+"""
+Stateless JWT authentication.
+
+Tokens carry the claims the API needs to authorize a request (user id,
+role, active and staff flags and token version), so authentication builds a
+ClaimsUser from the token instead of loading the User row. Revocation is
+checked against User.token_version through a short-lived cache entry:
+bumping the version (User.revoke_tokens()) rejects every token issued
+before it, at the latest after JWT_REVOCATION_CACHE_TTL seconds.
+"""
+
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User, token_state_key
+
+ROLE_CLAIM = "role"
+ACTIVE_CLAIM = "active"
+TOKEN_VERSION_CLAIM = "ver"
+# the claim TokenUser.is_staff reads
+STAFF_CLAIM = "is_staff"
+
+
+def add_user_claims(token, user):
+    token[ROLE_CLAIM] = user.role
+    token[ACTIVE_CLAIM] = user.is_active
+    token[STAFF_CLAIM] = user.is_staff
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    remember_token_state(user.pk, user.token_version, user.is_active)
+    return token
+
+
+def access_token_for(user):
+    return str(add_user_claims(AccessToken.for_user(user), user))
+
+
+def remember_token_state(user_id, version, is_active):
+    cache.set(
+        token_state_key(user_id),
+        (version, is_active),
+        getattr(settings, "JWT_REVOCATION_CACHE_TTL", 30),
+    )
+
+
+def _token_state_row(user_id):
+    return User.objects.filter(pk=user_id).values_list("token_version", "is_active")
+
+
+def _check_state(state, version):
+    current, is_active = state
+    if not is_active or version != current:
+        raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+
+
+def check_token_state(user_id, version):
+    state = cache.get(token_state_key(user_id))
+    if state is None:
+        state = _token_state_row(user_id).first() or (None, False)
+        remember_token_state(user_id, *state)
+    _check_state(state, version)
+
+
+async def acheck_token_state(user_id, version):
+    state = await cache.aget(token_state_key(user_id))
+    if state is None:
+        state = await _token_state_row(user_id).afirst() or (None, False)
+        await cache.aset(
+            token_state_key(user_id),
+            state,
+            getattr(settings, "JWT_REVOCATION_CACHE_TTL", 30),
+        )
+    _check_state(state, version)
+
+
+class ClaimsUser(TokenUser):
+    """Request user built from token claims; no database row is loaded."""
+
+    @cached_property
+    def id(self):
+        return uuid.UUID(str(self.token[api_settings.USER_ID_CLAIM]))
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def role(self):
+        return self.token[ROLE_CLAIM]
+
+    @cached_property
+    def is_active(self):
+        return self.token[ACTIVE_CLAIM]
+
+    @cached_property
+    def token_version(self):
+        return self.token[TOKEN_VERSION_CLAIM]
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            # issued before tokens carried claims: load the row as before
+            return JWTAuthentication.get_user(self, validated_token)
+        user = super().get_user(validated_token)
+        check_token_state(user.id, user.token_version)
+        return user
+
+
+async def aauthenticate(request):
+    """
+    ClaimsJWTAuthentication for plain async views: the request user, or None
+    without credentials. Raises AuthenticationFailed/InvalidToken like it.
+    """
+    auth = ClaimsJWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    validated_token = auth.get_validated_token(raw_token)
+    if TOKEN_VERSION_CLAIM not in validated_token:
+        return await sync_to_async(auth.get_user)(validated_token)
+    user = JWTStatelessUserAuthentication.get_user(auth, validated_token)
+    await acheck_token_state(user.id, user.token_version)
+    return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Rejects revoked refresh tokens and re-stamps claims from the row."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first()
+        if (
+            user is None
+            or not api_settings.USER_AUTHENTICATION_RULE(user)
+            or refresh.get(TOKEN_VERSION_CLAIM, user.token_version)
+            != user.token_version
+        ):
+            raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+        add_user_claims(refresh, user)
+        return {"access": str(refresh.access_token)}
@@ -0,0 +1,27 @@
+from django.db.models import Q
+from django_filters import rest_framework as filters
+from users.models import User
+
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+
+
+class UserFilter(filters.FilterSet):
+    search = filters.CharFilter(
+        method="filter_search",
+        help_text="Case-insensitive prefix of email, first or last name.",
+    )
+
+    class Meta:
+        model = User
+        fields = ["role"]
+
+    def filter_search(self, queryset, name, value):
+        # istartswith compiles to UPPER(col::text) LIKE UPPER('value%') on
+        # PostgreSQL, which the users_*_prefix_idx expression indexes serve
+        value = value.strip()
+        if not value:
+            return queryset
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f"{field}__istartswith": value})
+        return queryset.filter(condition)
@@ -0,0 +1,17 @@
+"""
+PBKDF2 with the iteration count taken from settings.PASSWORD_HASHING, so the
+cost can be tuned to the CPU budget (measure with `manage.py bench_hashers`)
+without a code change. Changing it needs no migration: Django's
+check_password() re-encodes a hash made with another iteration count on the
+user's next successful login.
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        configured = getattr(settings, "PASSWORD_HASHING", {}).get("PBKDF2_ITERATIONS")
+        return configured or hashers.PBKDF2PasswordHasher.iterations
@@ -0,0 +1,47 @@
+import json
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from oper.benchmark import summarize, timed
+
+
+class Command(BaseCommand):
+    help = (
+        "Time one PBKDF2 password check per iteration count and print the "
+        "latency and logins per second per core as JSON, one line per count. "
+        "With --budget-ms, also print the highest count whose p95 fits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            nargs="+",
+            type=int,
+            default=[100_000, 200_000, 390_000, 600_000, 1_000_000],
+        )
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument(
+            "--budget-ms", type=float, help="CPU time one login may spend hashing."
+        )
+
+    def handle(self, *args, iterations, repeat, budget_ms, **options):
+        hasher = get_hasher("pbkdf2_sha256")
+        salt = hasher.salt()
+        fitting = None
+        for count in sorted(iterations):
+            encoded = hasher.encode("bench-password", salt, count)
+            samples = timed(lambda: hasher.verify("bench-password", encoded), repeat)
+            summary = summarize(samples)
+            result = {
+                "hasher": hasher.algorithm,
+                "iterations": count,
+                **summary,
+                "logins_per_core_s": round(1000 / summary["mean_ms"], 1),
+            }
+            self.stdout.write(json.dumps(result))
+            if budget_ms and summary["p95_ms"] <= budget_ms:
+                fitting = count
+        if budget_ms:
+            self.stdout.write(
+                json.dumps({"budget_ms": budget_ms, "recommended_iterations": fitting})
+            )
@@ -1,4 +1,6 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db.models import Value
+from django.db.models.functions import Upper
 
 
 class UserManager(BaseUserManager):
@@ -8,6 +10,23 @@ class UserManager(BaseUserManager):
     https://docs.djangoproject.com/en/3.0/topics/auth/customizing/#a-full-example
     """
 
+    @classmethod
+    def normalize_email(cls, email):
+        """Emails are stored stripped and lowercased, local part included."""
+        return (email or "").strip().lower()
+
+    def by_email(self, email):
+        """
+        Case-insensitive lookup, spelled as UPPER(email) = UPPER(%s) so it is
+        served by the user_email_upper_uniq functional index.
+        """
+        return self.alias(email_upper=Upper("email")).filter(
+            email_upper=Upper(Value(self.normalize_email(email)))
+        )
+
+    def get_by_natural_key(self, email):
+        return self.by_email(email).get()
+
     def _create_user(self, email, password, **extra_fields):
         """
         Creates and saves a User with the given email and password.
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:20
+
+from django.db import migrations, models
+from oper.db_utils import add_index_concurrently
+
+# ?search= runs `UPPER(col::text) LIKE UPPER('prefix%')` (istartswith); a
+# text_pattern_ops b-tree on the same expression turns it into a range scan
+# whatever the database collation is
+PREFIX_INDEXES = {
+    "users_email_prefix_idx": "email",
+    "users_first_name_prefix_idx": "first_name",
+    "users_last_name_prefix_idx": "last_name",
+}
+
+
+def create_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = schema_editor.quote_name(apps.get_model("users", "User")._meta.db_table)
+    for name, column in PREFIX_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} "
+            f"(UPPER({schema_editor.quote_name(column)}::text) text_pattern_ops)"
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in PREFIX_INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; building
+    # the indexes must not block writes to a large users table
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0002_user_token_version"),
+    ]
+
+    operations = [
+        add_index_concurrently(
+            "users",
+            "user",
+            models.Index(fields=["-created_at", "-id"], name="user_created_id_idx"),
+        ),
+        add_index_concurrently(
+            "users",
+            "user",
+            models.Index(
+                fields=["role", "-created_at", "-id"], name="user_role_created_id_idx"
+            ),
+        ),
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:24
+
+from django.db import migrations, transaction
+from django.db.models.functions import Lower, Trim
+
+BATCH_SIZE = 1000
+
+
+def normalize_emails(apps, schema_editor):
+    """
+    Strips and lowercases stored emails like UserManager.normalize_email,
+    one transaction per batch of BATCH_SIZE rows walked by primary key. A row
+    whose normalized email is already taken is left alone; such duplicates
+    would violate the unique index of 0005, so they are listed for manual
+    resolution instead.
+    """
+    User = apps.get_model("users", "User")
+    users = User.objects.using(schema_editor.connection.alias)
+    pending = users.exclude(email=Lower(Trim("email"))).order_by("pk")
+    collisions, last = [], None
+    while True:
+        batch = list((pending.filter(pk__gt=last) if last else pending)[:BATCH_SIZE])
+        if not batch:
+            break
+        last = batch[-1].pk
+        lowered = {user.email.strip().lower() for user in batch}
+        taken = set(users.filter(email__in=lowered).values_list("email", flat=True))
+        changed = []
+        for user in batch:
+            email = user.email.strip().lower()
+            if email in taken:
+                collisions.append(user.email)
+                continue
+            taken.add(email)
+            user.email = email
+            changed.append(user)
+        with transaction.atomic(using=schema_editor.connection.alias):
+            users.bulk_update(changed, ["email"])
+    if collisions:
+        raise RuntimeError(
+            "These emails differ from another user's only by case or spaces; merge or "
+            "rename them, then migrate again: " + ", ".join(collisions)
+        )
+
+
+class Migration(migrations.Migration):
+    # every backfill batch commits on its own; re-running is safe
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0003_user_list_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+CONSTRAINT = models.UniqueConstraint(
+    Upper("email"),
+    name="user_email_upper_uniq",
+    violation_error_message="Email is already in use.",
+)
+
+
+def create_unique_index(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.add_constraint(User, CONSTRAINT)
+        return
+    # a failed concurrent build leaves an INVALID index behind; drop it so a
+    # rerun builds it afresh instead of keeping a unique index that is not
+    # enforced
+    schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {CONSTRAINT.name}")
+    # the index PostgreSQL uses for a UniqueConstraint over an expression,
+    # built without blocking writes
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX CONCURRENTLY {CONSTRAINT.name} "
+        f"ON {schema_editor.quote_name(User._meta.db_table)} "
+        f"(UPPER({schema_editor.quote_name('email')}))"
+    )
+
+
+def drop_unique_index(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.remove_constraint(User, CONSTRAINT)
+        return
+    schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {CONSTRAINT.name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("users", "0004_email_upper_unique"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_unique_index, drop_unique_index)
+            ],
+            state_operations=[
+                migrations.AddConstraint(model_name="user", constraint=CONSTRAINT)
+            ],
+        ),
+    ]
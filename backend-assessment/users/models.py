@@ -1,15 +1,21 @@
 import uuid
+from datetime import timedelta
 
-from django.contrib.auth.models import (
-    AbstractBaseUser,
-    PermissionsMixin,
-    update_last_login,
-)
+from django.conf import settings
+from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.core.cache import cache
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
+from django.utils import timezone
 from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
 from users.managers import UserManager
 
 
+def token_state_key(user_id):
+    return f"users:{user_id}:token_state"
+
+
 class UserRole(models.TextChoices):
     OWNER = "OWNER", "Owner"
     PARTICIPANT = "PARTICIPANT", "Participant"
@@ -25,15 +31,45 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
+    # carried in issued JWTs; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            # keyset pagination of the user list, with and without ?role=
+            models.Index(fields=["-created_at", "-id"], name="user_created_id_idx"),
+            models.Index(
+                fields=["role", "-created_at", "-id"], name="user_role_created_id_idx"
+            ),
+            # ?search= prefix indexes are PostgreSQL-only expression indexes,
+            # see migration 0003_user_list_indexes
+        ]
+        constraints = [
+            # case-insensitive uniqueness; also serves UserManager.by_email()
+            models.UniqueConstraint(
+                Upper("email"),
+                name="user_email_upper_uniq",
+                violation_error_message="Email is already in use.",
+            ),
+        ]
+
     def __str__(self):
         return self.email
 
+    def clean(self):
+        super().clean()
+        self.email = self.__class__.objects.normalize_email(self.email)
+
+    def revoke_tokens(self):
+        User.objects.filter(pk=self.pk).update(token_version=F("token_version") + 1)
+        self.refresh_from_db(fields=["token_version"])
+        cache.delete(token_state_key(self.pk))
+
     def authenticate(self, request=None, password=None):
         """
         Passwordless (no password) -> ensure active, update last_login, return self.
@@ -43,11 +79,26 @@ class User(AbstractBaseUser, PermissionsMixin):
             raise PermissionDenied("User account is disabled.")
 
         if password is None:
-            update_last_login(None, self)
+            self.touch_last_login()
             return self
 
+        # rehashes the stored password when the preferred hasher or its
+        # cost changed (settings.PASSWORD_HASHING)
         if not self.check_password(password):
             raise AuthenticationFailed("Invalid credentials.")
 
-        update_last_login(None, self)
+        self.touch_last_login()
         return self
+
+    def touch_last_login(self):
+        """
+        Records the login with a single UPDATE, skipped while last_login is
+        younger than settings.LAST_LOGIN_UPDATE_INTERVAL seconds, so bursts
+        of logins do not turn into bursts of row writes.
+        """
+        now = timezone.now()
+        interval = timedelta(seconds=getattr(settings, "LAST_LOGIN_UPDATE_INTERVAL", 0))
+        if self.last_login and now - self.last_login < interval:
+            return
+        User.objects.filter(pk=self.pk).update(last_login=now)
+        self.last_login = now
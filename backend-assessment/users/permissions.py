@@ -0,0 +1,12 @@
+from rest_framework.permissions import BasePermission
+from users.models import UserRole
+
+
+class IsOwnerUser(BasePermission):
+    def has_permission(self, request, view):
+        # role comes from the token claims, so this costs no query
+        return (
+            request.user
+            and request.user.is_authenticated
+            and request.user.role == UserRole.OWNER
+        )
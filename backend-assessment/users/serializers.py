@@ -1,6 +1,7 @@
 from django.contrib.auth import password_validation
 from oper.rest_framework_utils import Serializer
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from users.models import User, UserRole
 
 
@@ -24,22 +25,20 @@ class UserLoginSerializer(UserBaseSerializer):
         },
     )
 
-
-class UserLoginModelSerializer(UserBaseSerializer, serializers.ModelSerializer):
-    email = serializers.CharField()
-    password = serializers.CharField()
-
-    def validate(self, data):
-        email = (data.get("email") or "").strip()
-        user = User.objects.filter(email__iexact=email).first()
-        if not user:
-            raise serializers.ValidationError("Invalid credentials.")
-        self.instance = user
-        return data
-
-    class Meta:
-        model = User
-        fields = ("email", "password")
+    def authenticate(self):
+        """
+        The user matching the validated credentials, or None. One query loads
+        the user; the password is always hashed once, even for unknown emails
+        and disabled accounts, so every failure looks and takes the same.
+        """
+        user = User.objects.by_email(self.validated_data["email"]).first()
+        if user is None or not user.is_active:
+            User().set_password(self.validated_data["password"])
+            return None
+        try:
+            return user.authenticate(password=self.validated_data["password"])
+        except AuthenticationFailed:
+            return None
 
 
 class UserRegisterSerializer(UserBaseSerializer):
@@ -82,8 +81,8 @@ class UserRegisterModelSerializer(UserBaseSerializer, serializers.ModelSerialize
         fields = ["first_name", "last_name", "email", "password"]
 
     def validate_email(self, value: str) -> str:
-        value = (value or "").strip()
-        if User.objects.filter(email__iexact=value).exists():
+        value = User.objects.normalize_email(value)
+        if User.objects.by_email(value).exists():
             raise serializers.ValidationError("Email is already in use.")
         return value
 
@@ -96,10 +95,18 @@ class UserRegisterModelSerializer(UserBaseSerializer, serializers.ModelSerialize
         return User.objects.create_user(**validated_data)
 
 
-class UserViewSerializer(serializers.ModelSerializer):
+class UserViewSerializer(Serializer, serializers.ModelSerializer):
+    """Pass `fields` to render only a subset (sparse fieldsets)."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = User
-        fields = ["email", "first_name", "last_name", "role"]
+        fields = ["id", "email", "first_name", "last_name", "role"]
 
 
 class UserGenericLoginResponseSerializer(serializers.Serializer):
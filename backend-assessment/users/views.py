@@ -1,19 +1,33 @@
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import OpenApiResponse, extend_schema
+from drf_spectacular.utils import (
+    OpenApiParameter,
+    OpenApiResponse,
+    extend_schema,
+    extend_schema_view,
+)
+from oper.db_routers import ReplicaReadMixin
+from oper.pagination import KeysetPagination
+from oper.renderers import dumps
 from oper.rest_framework_utils import APIResponse, custom_exception_handler
 from rest_framework import status, viewsets
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
+from users.filters import UserFilter
 from users.models import User
+from users.permissions import IsOwnerUser
 from users.serializers import (
     UserGenericLoginResponseSerializer,
-    UserLoginModelSerializer,
     UserLoginSerializer,
     UserRegisterModelSerializer,
     UserRegisterSerializer,
     UserViewSerializer,
 )
 
+STREAM_CHUNK_SIZE = 2000
+
 
 @extend_schema(
     tags=["auth"],
@@ -57,18 +71,16 @@ class LoginView(APIView):
     permission_classes = (AllowAny,)
 
     def post(self, request):
-        input_simple_serializer = UserLoginSerializer(data=request.data)
-        input_simple_serializer.is_valid(raise_exception=True)
+        serializer = UserLoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        user_serializer = UserLoginModelSerializer(data=request.data)
-        if not user_serializer.is_valid():
+        user = serializer.authenticate()
+        if user is None:
             return APIResponse(
-                data=user_serializer.errors, status=status.HTTP_403_FORBIDDEN
+                data={"non_field_errors": ["Invalid credentials."]},
+                status=status.HTTP_403_FORBIDDEN,
             )
 
-        user = user_serializer.instance
-        user.authenticate()
-
         response_serializer = UserGenericLoginResponseSerializer(user)
         return APIResponse(data=response_serializer.data, status=status.HTTP_200_OK)
 
@@ -76,8 +88,68 @@ class LoginView(APIView):
         return custom_exception_handler
 
 
-class UserView(viewsets.ReadOnlyModelViewSet):
-    queryset = User.objects.all()
+FIELDS_PARAMETER = OpenApiParameter(
+    "fields", str, description="Comma-separated subset of fields to return"
+)
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=[FIELDS_PARAMETER]),
+    retrieve=extend_schema(parameters=[FIELDS_PARAMETER]),
+)
+class UserView(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Owners only. Keyset-paginated on (created_at, id), filterable by `role`
+    and by a `search` prefix. Only the requested `fields` are loaded and
+    rendered.
+    """
+
     serializer_class = UserViewSerializer
+    permission_classes = [IsAuthenticated, IsOwnerUser]
+    pagination_class = KeysetPagination
+    replica_actions = {"list", "retrieve", "stream"}
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["role"]
+    filterset_class = UserFilter
+
+    def get_queryset(self):
+        users = User.objects.all()
+        fields = self.requested_fields()
+        if fields:
+            users = users.only("id", "created_at", *fields)
+        return users
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def requested_fields(self):
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        fields = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = set(fields) - set(UserViewSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError(
+                {"fields": f"Unknown fields: {', '.join(sorted(unknown))}."}
+            )
+        return fields
+
+    @extend_schema(
+        summary="Stream users as NDJSON",
+        description="Every user matching the filters, one JSON object per "
+        "line, newest first. Rows are read from the database in chunks.",
+        parameters=[FIELDS_PARAMETER],
+        responses={(200, "application/x-ndjson"): str},
+    )
+    @action(methods=["get"], detail=False, url_path="stream")
+    def stream(self, request):
+        fields = self.requested_fields() or UserViewSerializer.Meta.fields
+        users = self.filter_queryset(User.objects.order_by("-created_at", "-id"))
+        # pin the database now: the body is read after the view has returned
+        rows = (
+            users.using(users.db).values(*fields).iterator(chunk_size=STREAM_CHUNK_SIZE)
+        )
+        return StreamingHttpResponse(
+            (dumps(row) + b"\n" for row in rows),
+            content_type="application/x-ndjson",
+        )